@@ -0,0 +1,113 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import time
+
+from proton.reactor import Container
+
+from swim_pubsub.core import utils
+from swim_pubsub.core.topics.topics import AT_LEAST_ONCE, AT_MOST_ONCE
+from swim_pubsub.publisher.handler import PublisherBrokerHandler
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# Compares the throughput of at-least-once (unsettled) against at-most-once (pre-settled) publishing. It needs a running
+# broker configured in the BROKER section of the provided config file, e.g.
+#
+#   python benchmarks/delivery_modes.py swim_pubsub/examples/publisher/config.yml --messages 100000
+
+
+class BenchmarkBrokerHandler(PublisherBrokerHandler):
+
+    def __init__(self, connector, messages: int, payload: str, **kwargs) -> None:
+        """
+        Publishes the given number of messages upon start and stops as soon as all of them have been sent and, in case
+        of at-least-once delivery, settled by the broker.
+        """
+        super().__init__(connector, buffer_size=messages, track_deliveries=True, **kwargs)
+
+        self.messages = messages
+        self.payload = payload
+        self.started_at = None
+        self.elapsed = None
+
+    def on_start(self, event):
+        super().on_start(event)
+
+        self.started_at = time.monotonic()
+        self.send_batch((self.payload, 'benchmark.delivery_modes') for _ in range(self.messages))
+        self._check_done()
+
+    def on_sendable(self, event):
+        super().on_sendable(event)
+        self._check_done()
+
+    def on_settled(self, event):
+        self._check_done()
+
+    def _check_done(self):
+        if self.elapsed is not None:
+            return
+
+        sent = sum(link.sent for link in self._links.values())
+
+        if sent == self.messages and self.in_flight == 0:
+            self.elapsed = time.monotonic() - self.started_at
+            self.conn.close()
+
+
+def run(broker_config, delivery_mode: str, messages: int, payload_size: int) -> None:
+    handler = BenchmarkBrokerHandler.create(**broker_config,
+                                            messages=messages,
+                                            payload='x' * payload_size,
+                                            delivery_mode=delivery_mode)
+    Container(handler).run()
+
+    stats = handler.delivery_stats()
+    print(f"{delivery_mode:>14}: {messages} messages in {handler.elapsed:.3f}s "
+          f"({messages / handler.elapsed:.0f} msg/s), outcomes: {stats['outcomes']}, "
+          f"accept latency p50/p99: {stats['accept_latency']['p50']}/{stats['accept_latency']['p99']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares at-least-once against at-most-once publishing')
+    parser.add_argument('config_file')
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--payload-size', type=int, default=256)
+    args = parser.parse_args()
+
+    broker_config = utils.yaml_file_to_dict(args.config_file)['BROKER']
+
+    for delivery_mode in (AT_LEAST_ONCE, AT_MOST_ONCE):
+        run(broker_config, delivery_mode, args.messages, args.payload_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import json
+import time
+
+import proton
+
+from swim_pubsub.core.broker_handlers import Connector
+from swim_pubsub.core.topics.topics import Topic
+from swim_pubsub.publisher.handler import PublisherBrokerHandler
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# Compares the per send cost of building and encoding a new message every time against reusing the cached encoded
+# message of a topic whose data have not changed. No broker is needed; the encoded messages are discarded by a null
+# sender, e.g.
+#
+#   python benchmarks/encoded_cache.py --messages 100000 --flights 10 100 1000
+
+
+class NullSender:
+    credit = float('inf')
+    snd_settle_mode = proton.Link.SND_SETTLED
+
+    def send(self, message):
+        # same as `proton.Sender.send`
+        return message.send(self)
+
+    def delivery_tag(self):
+        return b'0'
+
+    def delivery(self, tag):
+        return NullDelivery()
+
+    def stream(self, data):
+        return len(data)
+
+    def advance(self):
+        return True
+
+
+class NullDelivery:
+
+    def settle(self):
+        pass
+
+
+class LoopbackConnector(Connector):
+
+    def connect(self, container):
+        return None
+
+
+def run(messages: int, data, codec, cache_encoded_messages: bool):
+    handler = PublisherBrokerHandler(LoopbackConnector('loopback'), cache_encoded_messages=cache_encoded_messages)
+    handler._sender = NullSender()
+
+    topic = Topic('benchmark.encoded_cache', data_handler=lambda context=None: data, codec=codec)
+    handler.add_topic(topic)
+
+    started_at = time.process_time()
+    for _ in range(messages):
+        handler.trigger_topic(topic)
+    cpu_time = time.process_time() - started_at
+
+    return cpu_time, handler.encoded_cache_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares encoding every message against reusing the encoded one')
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--flights', type=int, nargs='+', default=[10, 1000], help='flights per message')
+    args = parser.parse_args()
+
+    for flights_count in args.flights:
+        flights = [{'icao24': f'abc{i:03}', 'origin': 'EBBR', 'destination': 'LEMD', 'altitude': 10000 + i}
+                   for i in range(flights_count)]
+
+        # the data handler returns either the JSON string of the flights or the flights themselves to be encoded by
+        # the json codec of the topic
+        for codec, data in [(None, json.dumps(flights)), ('json', flights)]:
+            results = {cache: run(args.messages, data, codec, cache) for cache in (False, True)}
+            (uncached, _), (cached, stats) = results[False], results[True]
+
+            print(f"{flights_count:>6} flights, codec {str(codec):>4}: "
+                  f"{uncached / args.messages * 1e6:.1f}us cpu per send without cache, "
+                  f"{cached / args.messages * 1e6:.1f}us with cache ({uncached / cached:.1f}x), "
+                  f"{stats['hits']} hits, {stats['misses']} misses")
+
+
+if __name__ == '__main__':
+    main()
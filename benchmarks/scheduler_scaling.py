@@ -0,0 +1,111 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import random
+import threading
+import time
+
+from proton.reactor import Container
+
+from swim_pubsub.core.broker_handlers import Connector
+from swim_pubsub.core.topics.topics import ScheduledTopic
+from swim_pubsub.publisher.handler import PublisherBrokerHandler
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# Compares the per tick overhead of scheduling thousands of topics via a timer each against the timing wheel of the
+# handler. No broker is needed; the messages are discarded by a null sender, e.g.
+#
+#   python benchmarks/scheduler_scaling.py --topics 1000 10000 50000 --duration 5
+
+
+class NullSender:
+    credit = float('inf')
+
+    def send(self, message):
+        return None
+
+
+class LoopbackConnector(Connector):
+
+    def connect(self, container):
+        return None
+
+
+class LoopbackBrokerHandler(PublisherBrokerHandler):
+
+    def _create_link_sender(self, link):
+        return NullSender()
+
+
+def _data_handler(context=None):
+    return 'data'
+
+
+def run(topics_count: int, duration: float, scheduler_tick_in_sec=None):
+    handler = LoopbackBrokerHandler(LoopbackConnector('loopback'), scheduler_tick_in_sec=scheduler_tick_in_sec)
+    topics = [ScheduledTopic(f'topic-{i}', data_handler=_data_handler, interval_in_sec=random.uniform(0.5, 2))
+              for i in range(topics_count)]
+    handler.topics = list(topics)
+
+    container = Container(handler)
+    thread = threading.Thread(target=container.run, daemon=True)
+
+    started_at = time.process_time()
+    thread.start()
+    time.sleep(duration)
+    handler.submit(container.stop).result()
+    thread.join()
+    cpu_time = time.process_time() - started_at
+
+    ticks = sum(topic.ticks for topic in topics)
+    lateness = [topic.lateness.mean for topic in topics if topic.ticks]
+
+    return ticks, cpu_time, sum(lateness) / len(lateness) if lateness else 0.
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares timer per topic against timing wheel scheduling')
+    parser.add_argument('--topics', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--duration', type=float, default=5., help='seconds per run')
+    parser.add_argument('--tick', type=float, default=0.05, help='the tick of the timing wheel in seconds')
+    args = parser.parse_args()
+
+    for topics_count in args.topics:
+        for name, tick in [('timer per topic', None), ('timing wheel', args.tick)]:
+            random.seed(0)
+            ticks, cpu_time, lateness = run(topics_count, args.duration, tick)
+
+            print(f"{topics_count:>7} topics, {name:>15}: {ticks} topic ticks, "
+                  f"{cpu_time / ticks * 1e6 if ticks else 0:.1f}us cpu per topic tick, mean lateness {lateness * 1e3:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
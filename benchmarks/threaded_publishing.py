@@ -0,0 +1,142 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import threading
+import time
+
+from proton.reactor import Container
+
+from swim_pubsub.core.broker_handlers import Connector
+from swim_pubsub.publisher.handler import PublisherBrokerHandler
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# Compares publishing from many producer threads via the hand-off to the container thread against calling the handler
+# directly from the producer threads (which is not thread safe). No broker is needed; the messages are discarded by a
+# null sender, so the numbers reflect the overhead of the publishing path itself, e.g.
+#
+#   python benchmarks/threaded_publishing.py --threads 8 --messages 20000
+
+
+class NullSender:
+    credit = float('inf')
+
+    def send(self, message):
+        return None
+
+
+class LoopbackConnector(Connector):
+
+    def connect(self, container):
+        return None
+
+
+class LoopbackBrokerHandler(PublisherBrokerHandler):
+
+    def _create_link_sender(self, link):
+        return NullSender()
+
+
+def _start_container(handler):
+    thread = threading.Thread(target=Container(handler).run, daemon=True)
+    thread.start()
+
+    while not handler.started:
+        time.sleep(0.01)
+
+    return thread
+
+
+def _run_producers(threads: int, produce) -> float:
+    producers = [threading.Thread(target=produce) for _ in range(threads)]
+
+    started_at = time.perf_counter()
+    for producer in producers:
+        producer.start()
+    for producer in producers:
+        producer.join()
+
+    return time.perf_counter() - started_at
+
+
+def direct(handler, threads: int, messages: int) -> float:
+    send_message = PublisherBrokerHandler.send_message.__wrapped__
+
+    def produce():
+        for _ in range(messages):
+            send_message(handler, 'data', 'benchmark')
+
+    return _run_producers(threads, produce)
+
+
+def handed_off(handler, threads: int, messages: int) -> float:
+    def produce():
+        future = None
+        for _ in range(messages):
+            future = handler.send_message('data', 'benchmark')
+        future.result()
+
+    return _run_producers(threads, produce)
+
+
+def handed_off_in_batches(handler, threads: int, messages: int, batch_size: int = 100) -> float:
+    def produce():
+        future = None
+        for _ in range(messages // batch_size):
+            future = handler.send_batch(('data', 'benchmark') for _ in range(batch_size))
+        future.result()
+
+    return _run_producers(threads, produce)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares thread safe publishing against direct calls')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=10000, help='number of messages per thread')
+    args = parser.parse_args()
+
+    for name, benchmark in [('direct (unsafe)', direct),
+                            ('handed off', handed_off),
+                            ('handed off in batches', handed_off_in_batches)]:
+        handler = LoopbackBrokerHandler(LoopbackConnector('loopback'))
+        container_thread = _start_container(handler)
+
+        elapsed = benchmark(handler, args.threads, args.messages)
+        total = args.threads * args.messages
+
+        handler._injector.close()
+        container_thread.join()
+
+        print(f"{name:>22}: {total} messages in {elapsed:.3f}s ({total / elapsed:.0f} msg/s), "
+              f"sent: {handler._default_link.sent}")
+
+
+if __name__ == '__main__':
+    main()
@@ -30,11 +30,14 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 
 import logging
-from typing import Optional
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Callable, Deque, Tuple
 
 import proton
 from proton.handlers import MessagingHandler
-from proton.reactor import Container
+from proton.reactor import Container, EventInjector, ApplicationEvent
 
 from swim_pubsub.core import ConfigDict
 from swim_pubsub.core import utils
@@ -111,6 +114,13 @@ class SASLConnector(Connector):
                                  password=self._password)
 
 
+def _copy_future_result(source: Future, target: Future) -> None:
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
 class BrokerHandler(MessagingHandler):
 
     def __init__(self, connector: Connector) -> None:
@@ -126,6 +136,12 @@ class BrokerHandler(MessagingHandler):
         self.container = None
         self.conn = None
 
+        # hand-off of calls from other threads to the thread of the container
+        self._injector: Optional[EventInjector] = None
+        self._container_thread_id: Optional[int] = None
+        self._submissions: Deque[Tuple[Callable, tuple, dict, Future]] = deque()
+        self._wakeup_pending = False
+
     def on_start(self, event: proton.Event):
         """
         Is triggered upon running the `proton.Container` that uses this handler. It creates a connection to the broker
@@ -134,13 +150,77 @@ class BrokerHandler(MessagingHandler):
         :param event:
         """
         self.container = event.container
+        self._container_thread_id = threading.get_ident()
+        self._injector = EventInjector()
+        self.container.selectable(self._injector)
         self.conn = self.connector.connect(self.container)
         self.started = True
         _logger.info(f'Connected to broker @ {self.connector.url}')
 
-    def _create_sender(self, endpoint: str) -> proton.Sender:
+    def on_connection_closed(self, event: proton.Event):
+        """
+        Closes the event injector as well so that the container can stop.
+
+        :param event:
+        """
+        if self._injector is not None:
+            self._injector.close()
+
+    def in_container_thread(self) -> bool:
+        """
+        Determines whether the caller runs in the thread of the container. It is also considered True while the
+        container is not running yet since there is no other thread to compete with.
+        """
+        return self._injector is None or threading.get_ident() == self._container_thread_id
+
+    def submit(self, f: Callable, *args, **kwargs) -> Future:
+        """
+        Hands off the call of `f` to the thread of the container, which is the only one allowed to interact with proton.
+        It can be safely called from any thread. The calls are queued and the container is woken up once for all the
+        calls that pile up until it gets to process them.
+
+        :param f:
+        :return: a future of the result of the call. If the result of the call is a future itself it is chained.
+        """
+        future = Future()
+        self._submissions.append((f, args, kwargs, future))
+
+        # a spurious extra wakeup is harmless whereas a missing one is not, so the flag is reset by the container
+        # before it processes the submissions
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._injector.trigger(ApplicationEvent('swim_pubsub_submissions'))
+
+        return future
+
+    def on_swim_pubsub_submissions(self, event: ApplicationEvent):
+        """
+        Is triggered in the thread of the container upon new submissions from other threads.
+
+        :param event:
+        """
+        self._wakeup_pending = False
+
+        while self._submissions:
+            f, args, kwargs, future = self._submissions.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = f(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+
+            if isinstance(result, Future):
+                result.add_done_callback(lambda done, chained=future: _copy_future_result(done, chained))
+            else:
+                future.set_result(result)
+
+    def _create_sender(self, endpoint: str, **kwargs) -> proton.Sender:
         try:
-            return self.container.create_sender(self.conn, endpoint)
+            return self.container.create_sender(self.conn, endpoint, **kwargs)
         except Exception as e:
             raise BrokerHandlerError(f'{str(e)}')
 
@@ -159,7 +239,8 @@ class BrokerHandler(MessagingHandler):
                cert_password: Optional[str] = None,
                sasl_user: Optional[str] = None,
                sasl_password: Optional[str] = None,
-               allowed_mechs: Optional[str] = 'PLAIN'):
+               allowed_mechs: Optional[str] = 'PLAIN',
+               **kwargs):
         """
 
         :param host:
@@ -170,6 +251,7 @@ class BrokerHandler(MessagingHandler):
         :param sasl_user:
         :param sasl_password:
         :param allowed_mechs:
+        :param kwargs: any extra settings to be passed to the constructor of the handler
         :return:
         """
         if cert_db and cert_file and cert_key:
@@ -183,7 +265,7 @@ class BrokerHandler(MessagingHandler):
         else:
             connector = Connector(host)
 
-        return cls(connector=connector)
+        return cls(connector=connector, **kwargs)
 
     @classmethod
     def create_from_config(cls, config: ConfigDict):
@@ -0,0 +1,253 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import importlib
+import json
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Dict, Optional, Union
+
+from swim_pubsub.core.metrics import Histogram
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+# upper bounds in seconds of the encoding and decoding times
+CODEC_TIME_BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+class CodecError(Exception):
+    pass
+
+
+class Codec(ABC):
+    name: str = ''
+    content_type: str = ''
+
+    def __init__(self) -> None:
+        """
+        Converts the data of a topic to the body of its messages and back. Every codec keeps track of the number and the
+        time of its encodings and decodings as well as of the size of the encoded payloads. Subclasses implement
+        `_encode` and `_decode`.
+        """
+        self.encoded = 0
+        self.decoded = 0
+        self.encoded_bytes = 0
+        self.encode_time = Histogram(CODEC_TIME_BUCKETS)
+        self.decode_time = Histogram(CODEC_TIME_BUCKETS)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.content_type}'>"
+
+    @abstractmethod
+    def _encode(self, data: Any) -> Union[str, bytes]:
+        pass
+
+    @abstractmethod
+    def _decode(self, payload: Union[str, bytes]) -> Any:
+        pass
+
+    def encode(self, data: Any) -> Union[str, bytes]:
+        """
+        :param data:
+        :return: the payload to be used as the body of the message
+        :raises: CodecError
+        """
+        start = time.perf_counter()
+        try:
+            payload = self._encode(data)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Error while encoding data with {self.name}: {str(e)}") from e
+
+        self.encode_time.observe(time.perf_counter() - start)
+        self.encoded += 1
+        self.encoded_bytes += len(payload)
+
+        return payload
+
+    def decode(self, payload: Union[str, bytes]) -> Any:
+        """
+        :param payload: the body of a message
+        :return: the data
+        :raises: CodecError
+        """
+        start = time.perf_counter()
+        try:
+            data = self._decode(payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Error while decoding payload with {self.name}: {str(e)}") from e
+
+        self.decode_time.observe(time.perf_counter() - start)
+        self.decoded += 1
+
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'content_type': self.content_type,
+            'encoded': self.encoded,
+            'decoded': self.decoded,
+            'encoded_bytes': self.encoded_bytes,
+            'encode_time': self.encode_time.stats(),
+            'decode_time': self.decode_time.stats()
+        }
+
+
+class JSONCodec(Codec):
+    name = 'json'
+    content_type = 'application/json'
+
+    def _encode(self, data: Any) -> str:
+        return json.dumps(data, separators=(',', ':'))
+
+    def _decode(self, payload: Union[str, bytes]) -> Any:
+        return json.loads(payload)
+
+
+class BytesCodec(Codec):
+    name = 'bytes'
+    content_type = 'application/octet-stream'
+
+    def _encode(self, data: Any) -> bytes:
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise CodecError(f"The bytes codec expects bytes-like data, got {type(data).__name__}")
+
+        return bytes(data)
+
+    def _decode(self, payload: Union[str, bytes]) -> bytes:
+        return payload
+
+
+class _OptionalDependencyCodec(Codec):
+    # the module that provides the format, which is imported upon first use
+    module_name: str = ''
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self.module_name)
+            except ImportError:
+                raise CodecError(f"The {self.name} codec requires the {self.module_name} package to be installed")
+
+        return self._module
+
+
+class MsgPackCodec(_OptionalDependencyCodec):
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+    module_name = 'msgpack'
+
+    def _encode(self, data: Any) -> bytes:
+        return self.module.packb(data, use_bin_type=True)
+
+    def _decode(self, payload: Union[str, bytes]) -> Any:
+        return self.module.unpackb(payload, raw=False)
+
+
+class CBORCodec(_OptionalDependencyCodec):
+    name = 'cbor'
+    content_type = 'application/cbor'
+    module_name = 'cbor2'
+
+    def _encode(self, data: Any) -> bytes:
+        return self.module.dumps(data)
+
+    def _decode(self, payload: Union[str, bytes]) -> Any:
+        return self.module.loads(payload)
+
+
+class CodecRegistry:
+
+    def __init__(self) -> None:
+        """
+        Keeps the available codecs by name and by content type
+        """
+        self._codecs: Dict[str, Codec] = {}
+        self._codecs_by_content_type: Dict[str, Codec] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._codecs
+
+    def register(self, codec: Codec) -> None:
+        """
+        Registers the codec, replacing any codec with the same name or content type
+
+        :param codec:
+        """
+        self._codecs[codec.name] = codec
+        self._codecs_by_content_type[codec.content_type] = codec
+
+    def get(self, name: str) -> Codec:
+        """
+        :param name:
+        :return:
+        :raises: CodecError if no codec is registered with this name
+        """
+        codec = self._codecs.get(name)
+
+        if codec is None:
+            raise CodecError(f"Unknown codec: {name}")
+
+        return codec
+
+    def for_content_type(self, content_type: Optional[str]) -> Optional[Codec]:
+        """
+        :param content_type: a content type optionally followed by parameters, e.g. 'application/json; charset=utf-8'
+        :return: the codec of the content type, if any
+        """
+        if not content_type:
+            return None
+
+        return self._codecs_by_content_type.get(content_type.split(';')[0].strip().lower())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: codec.stats() for name, codec in self._codecs.items()}
+
+
+def create_default_registry() -> CodecRegistry:
+    registry = CodecRegistry()
+
+    for codec_class in (JSONCodec, BytesCodec, MsgPackCodec, CBORCodec):
+        registry.register(codec_class())
+
+    return registry
+
+
+# the registry that is used by the broker handlers by default
+codecs = create_default_registry()
@@ -0,0 +1,306 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import bz2
+import logging
+import lzma
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type
+
+import proton
+
+from swim_pubsub.core.metrics import Histogram
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+
+# compression algorithms
+ZLIB = 'zlib'
+LZMA = 'lzma'
+BZ2 = 'bz2'
+
+COMPRESSIONS = (ZLIB, LZMA, BZ2)
+
+# the min size in bytes of the payloads to be compressed
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+
+# application property of the compressed messages whose body was a string before compression
+COMPRESSED_TEXT_PROPERTY = 'swim-pubsub-compressed-text'
+
+# upper bounds in seconds of the CPU time of the compressions and decompressions
+COMPRESSION_TIME_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.)
+
+
+class CompressionError(Exception):
+    pass
+
+
+class Compressor(ABC):
+    name: str = ''
+    content_encoding: str = ''
+
+    def __init__(self, threshold: int = DEFAULT_COMPRESSION_THRESHOLD) -> None:
+        """
+        Compresses the payloads of a topic which are not smaller than the threshold and decompresses them on the
+        subscriber side. Payloads that would not shrink are left uncompressed. Every compressor keeps track of the
+        number of its compressions, their sizes before and after as well as the CPU time they took. Only string or
+        binary payloads can be compressed; the rest are counted as unsupported. Subclasses implement `_compress` and
+        `_decompress`.
+
+        :param threshold: the min size in bytes of the payloads to be compressed
+        """
+        self.threshold = threshold
+        self.compressed = 0
+        self.skipped = 0
+        self.unsupported = 0
+        self.decompressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_time = Histogram(COMPRESSION_TIME_BUCKETS)
+        self.decompress_time = Histogram(COMPRESSION_TIME_BUCKETS)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.content_encoding}'>"
+
+    @abstractmethod
+    def _compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def _decompress(self, payload: bytes) -> bytes:
+        pass
+
+    def compress(self, data: bytes) -> Optional[bytes]:
+        """
+        :param data:
+        :return: the compressed payload or None if the data are below the threshold or do not shrink
+        :raises: CompressionError
+        """
+        if len(data) < self.threshold:
+            self.skipped += 1
+            return None
+
+        start = time.thread_time()
+        try:
+            payload = self._compress(data)
+        except Exception as e:
+            raise CompressionError(f"Error while compressing data with {self.name}: {str(e)}") from e
+        self.compress_time.observe(time.thread_time() - start)
+
+        if len(payload) >= len(data):
+            self.skipped += 1
+            return None
+
+        self.compressed += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(payload)
+
+        return payload
+
+    def decompress(self, payload: bytes) -> bytes:
+        """
+        :param payload:
+        :return: the original data
+        :raises: CompressionError
+        """
+        start = time.thread_time()
+        try:
+            data = self._decompress(payload)
+        except Exception as e:
+            raise CompressionError(f"Error while decompressing payload with {self.name}: {str(e)}") from e
+        self.decompress_time.observe(time.thread_time() - start)
+
+        self.decompressed += 1
+
+        return data
+
+    @property
+    def ratio(self) -> Optional[float]:
+        """
+        The size of the compressed payloads before compression over their size after it
+        """
+        return self.bytes_in / self.bytes_out if self.bytes_out else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'content_encoding': self.content_encoding,
+            'threshold': self.threshold,
+            'compressed': self.compressed,
+            'skipped': self.skipped,
+            'unsupported': self.unsupported,
+            'decompressed': self.decompressed,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.ratio,
+            'compress_time': self.compress_time.stats(),
+            'decompress_time': self.decompress_time.stats()
+        }
+
+
+class ZlibCompressor(Compressor):
+    name = ZLIB
+    content_encoding = 'deflate'
+
+    def _compress(self, data: bytes) -> bytes:
+        return zlib.compress(data)
+
+    def _decompress(self, payload: bytes) -> bytes:
+        return zlib.decompress(payload)
+
+
+class LZMACompressor(Compressor):
+    name = LZMA
+    content_encoding = 'xz'
+
+    def _compress(self, data: bytes) -> bytes:
+        return lzma.compress(data)
+
+    def _decompress(self, payload: bytes) -> bytes:
+        return lzma.decompress(payload)
+
+
+class BZ2Compressor(Compressor):
+    name = BZ2
+    content_encoding = 'bzip2'
+
+    def _compress(self, data: bytes) -> bytes:
+        return bz2.compress(data)
+
+    def _decompress(self, payload: bytes) -> bytes:
+        return bz2.decompress(payload)
+
+
+_COMPRESSOR_CLASSES: Dict[str, Type[Compressor]] = {
+    compressor_class.name: compressor_class for compressor_class in (ZlibCompressor, LZMACompressor, BZ2Compressor)
+}
+
+_COMPRESSOR_CLASSES_BY_CONTENT_ENCODING: Dict[str, Type[Compressor]] = {
+    compressor_class.content_encoding: compressor_class for compressor_class in _COMPRESSOR_CLASSES.values()
+}
+
+
+def create_compressor(name: str, threshold: int = DEFAULT_COMPRESSION_THRESHOLD) -> Compressor:
+    """
+    :param name: one of ZLIB, LZMA, BZ2
+    :param threshold:
+    :return:
+    :raises: CompressionError if the compression is unknown
+    """
+    compressor_class = _COMPRESSOR_CLASSES.get(name)
+
+    if compressor_class is None:
+        raise CompressionError(f"Unknown compression: {name}")
+
+    return compressor_class(threshold=threshold)
+
+
+def create_decompressor(content_encoding: str) -> Compressor:
+    """
+    :param content_encoding: the content encoding of a message, e.g. 'deflate'
+    :return:
+    :raises: CompressionError if the content encoding is unknown
+    """
+    compressor_class = _COMPRESSOR_CLASSES_BY_CONTENT_ENCODING.get(content_encoding.strip().lower())
+
+    if compressor_class is None:
+        raise CompressionError(f"Unknown content encoding: {content_encoding}")
+
+    return compressor_class()
+
+
+def compress_message(message: proton.Message, compressor: Compressor) -> proton.Message:
+    """
+    Compresses the string or binary body of the message and sets its content encoding accordingly. Bodies of other
+    types (e.g. AMQP maps) cannot be compressed, so they are left as they are and a warning is logged the first time,
+    i.e. the data handler of the topic should return strings or bytes unless the topic has a codec.
+
+    :param message:
+    :param compressor:
+    :return:
+    :raises: CompressionError
+    """
+    body = message.body
+    if isinstance(body, str):
+        payload = compressor.compress(body.encode('utf-8'))
+    elif isinstance(body, (bytes, bytearray, memoryview)):
+        payload = compressor.compress(bytes(body))
+    else:
+        if not compressor.unsupported:
+            _logger.warning(f"Cannot compress body of type {type(body).__name__} of message {message.subject}, a "
+                            f"string or bytes is expected, e.g. by setting a codec for the topic")
+        compressor.unsupported += 1
+        return message
+
+    if payload is not None:
+        message.body = payload
+        message.content_encoding = compressor.content_encoding
+        if isinstance(body, str):
+            message.properties = {**(message.properties or {}), COMPRESSED_TEXT_PROPERTY: True}
+
+    return message
+
+
+def get_content_encoding(message: proton.Message) -> Optional[str]:
+    content_encoding = message.content_encoding
+
+    # proton returns the symbol 'None' if the content encoding is not set
+    return None if content_encoding in (None, '', 'None') else str(content_encoding)
+
+
+def is_compressed(message: proton.Message) -> bool:
+    return isinstance(message, proton.Message) and get_content_encoding(message) is not None
+
+
+def decompress_message(message: proton.Message, decompressor: Compressor) -> proton.Message:
+    """
+    Restores the body of the message as it was before compression and clears its content encoding
+
+    :param message:
+    :param decompressor:
+    :return:
+    :raises: CompressionError
+    """
+    properties = message.properties or {}
+    data = decompressor.decompress(message.body)
+
+    if properties.get(COMPRESSED_TEXT_PROPERTY):
+        try:
+            data = data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise CompressionError(f"Error while decompressing payload with {decompressor.name}: {str(e)}") from e
+
+    message.body = data
+    message.content_encoding = None
+    message.properties = {key: value for key, value in properties.items() if key != COMPRESSED_TEXT_PROPERTY} or None
+
+    return message
@@ -0,0 +1,285 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import copy
+import json
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import proton
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+
+# application properties of delta encoded messages
+DELTA_KIND_PROPERTY = 'swim-pubsub-delta-kind'
+DELTA_SEQUENCE_PROPERTY = 'swim-pubsub-delta-sequence'
+
+# kinds of delta encoded messages
+SNAPSHOT = 'snapshot'
+DELTA = 'delta'
+
+JSONType = Union[Dict[str, Any], List[Any], str, int, float, bool, None]
+PatchType = List[Dict[str, Any]]
+
+
+class DeltaError(Exception):
+    pass
+
+
+def _escape(token: str) -> str:
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def diff(old: JSONType, new: JSONType, path: str = '') -> PatchType:
+    """
+    Computes a JSON patch (RFC 6902 add, remove and replace operations) that turns `old` into `new`. The items of lists
+    are compared by position, so an item inserted in the middle of a list yields a replace per following item.
+
+    :param old:
+    :param new:
+    :param path: the JSON pointer of the documents
+    :return: the list of operations
+    """
+    # bool is a subclass of int but they should not be considered the same
+    if type(old) != type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+
+    if isinstance(old, dict):
+        patch = [{'op': 'remove', 'path': f'{path}/{_escape(key)}'} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                patch.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+            else:
+                patch += diff(old[key], value, f'{path}/{_escape(key)}')
+        return patch
+
+    if isinstance(old, list):
+        patch = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            patch += diff(old_item, new_item, f'{path}/{index}')
+
+        patch += [{'op': 'add', 'path': f'{path}/{index}', 'value': new[index]} for index in range(len(old), len(new))]
+        # from the end so that the indexes stay valid
+        patch += [{'op': 'remove', 'path': f'{path}/{index}'} for index in reversed(range(len(new), len(old)))]
+        return patch
+
+    return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_patch(document: JSONType, patch: PatchType) -> JSONType:
+    """
+    Applies a JSON patch (RFC 6902 add, remove and replace operations) on a copy of the document.
+
+    :param document:
+    :param patch:
+    :return: the patched document
+    :raises DeltaError: if the patch does not fit the document
+    """
+    document = copy.deepcopy(document)
+
+    for operation in patch:
+        op, path = operation.get('op'), operation.get('path')
+
+        if path == '':
+            if op != 'replace':
+                raise DeltaError(f"Invalid operation on the root: {op}")
+            document = copy.deepcopy(operation['value'])
+            continue
+
+        *parent_tokens, token = [_unescape(token) for token in path.split('/')[1:]]
+
+        try:
+            parent = document
+            for parent_token in parent_tokens:
+                parent = parent[int(parent_token) if isinstance(parent, list) else parent_token]
+
+            key = token
+            if isinstance(parent, list):
+                key = len(parent) if token == '-' else int(token)
+
+            if op == 'add':
+                if isinstance(parent, list):
+                    parent.insert(key, copy.deepcopy(operation['value']))
+                else:
+                    parent[key] = copy.deepcopy(operation['value'])
+            elif op == 'remove':
+                del parent[key]
+            elif op == 'replace':
+                if isinstance(parent, dict) and key not in parent:
+                    raise KeyError(key)
+                parent[key] = copy.deepcopy(operation['value'])
+            else:
+                raise DeltaError(f"Unsupported operation: {op}")
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise DeltaError(f"Cannot apply {op} on {path}: {str(e)}")
+
+    return document
+
+
+def _body_to_document(body: Any) -> JSONType:
+    # JSON documents are usually sent as strings
+    return json.loads(body) if isinstance(body, (str, bytes)) else body
+
+
+class DeltaEncoder:
+
+    def __init__(self, snapshot_interval: int = 10) -> None:
+        """
+        Turns the consecutive bodies of a topic into a full snapshot followed by diffs against the previous body, so that
+        large documents that change slightly are not re-sent in full. A snapshot is sent every `snapshot_interval`
+        messages (so that subscribers who missed a message can resync) or whenever the diff is not smaller than the body.
+
+        Every message carries its kind and a sequence number in its application properties.
+
+        :param snapshot_interval: the max number of messages between two snapshots
+        """
+        if snapshot_interval < 1:
+            raise ValueError(f"snapshot_interval should be a positive integer, got {snapshot_interval}")
+
+        self.snapshot_interval = snapshot_interval
+        self.sequence = 0
+        self._document: JSONType = None
+        self._messages_since_snapshot: Optional[int] = None
+
+        self.snapshots = 0
+        self.deltas = 0
+
+    def encode(self, data: Any) -> proton.Message:
+        """
+        :param data: a JSON document (or its string) or a `proton.Message` with such a body
+        :return: the message to be sent
+        :raises DeltaError: if the data are not a valid JSON document
+        """
+        message = data if isinstance(data, proton.Message) else proton.Message(body=data)
+
+        snapshot_due = self._messages_since_snapshot is None \
+            or self._messages_since_snapshot + 1 >= self.snapshot_interval
+
+        try:
+            document = _body_to_document(message.body)
+            encoded_document = json.dumps(document)
+            encoded_patch = json.dumps(diff(self._document, document)) if not snapshot_due else None
+        except (TypeError, ValueError) as e:
+            raise DeltaError(f"Error while delta encoding data: {str(e)}") from e
+
+        self.sequence += 1
+
+        kind = SNAPSHOT
+        if encoded_patch is not None and len(encoded_patch) < len(encoded_document):
+            kind = DELTA
+            message.body = encoded_patch
+
+        if kind == SNAPSHOT:
+            self._messages_since_snapshot = 0
+            self.snapshots += 1
+        else:
+            self._messages_since_snapshot += 1
+            self.deltas += 1
+
+        self._document = document
+        message.properties = {**(message.properties or {}),
+                              DELTA_KIND_PROPERTY: kind,
+                              DELTA_SEQUENCE_PROPERTY: self.sequence}
+
+        return message
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'sequence': self.sequence,
+            'snapshots': self.snapshots,
+            'deltas': self.deltas
+        }
+
+
+def is_delta_encoded(message: proton.Message) -> bool:
+    return isinstance(message, proton.Message) and DELTA_KIND_PROPERTY in (message.properties or {})
+
+
+class DeltaDecoder:
+
+    def __init__(self) -> None:
+        """
+        Rebuilds the full documents out of the snapshots and diffs of a `DeltaEncoder`. In case of a gap in the sequence
+        numbers (a lost message) the diffs are dropped until the next snapshot.
+        """
+        self._document: JSONType = None
+        self._as_string = False
+        self._sequence: Optional[int] = None
+
+        self.gaps = 0
+
+    def decode(self, message: proton.Message) -> Optional[proton.Message]:
+        """
+        :param message: a delta encoded message
+        :return: a message with the full document as body in the same form (string or not) as the snapshots or None if
+                 it cannot be rebuilt until the next snapshot
+        """
+        properties = message.properties or {}
+        kind, sequence = properties.get(DELTA_KIND_PROPERTY), properties.get(DELTA_SEQUENCE_PROPERTY)
+
+        if kind == SNAPSHOT:
+            self._document = _body_to_document(message.body)
+            self._as_string = isinstance(message.body, (str, bytes))
+        elif kind == DELTA:
+            if self._sequence is None:
+                _logger.debug(f"Waiting for a snapshot, dropped delta {sequence}")
+                return None
+
+            if sequence != self._sequence + 1:
+                _logger.warning(f"Gap in the delta sequence ({self._sequence} -> {sequence}), "
+                                f"waiting for the next snapshot")
+                self.gaps += 1
+                self._sequence = None
+                return None
+
+            try:
+                self._document = apply_patch(self._document, json.loads(message.body))
+            except (DeltaError, ValueError) as e:
+                _logger.error(f"Error while applying delta {sequence}, waiting for the next snapshot: {str(e)}")
+                self._sequence = None
+                return None
+        else:
+            raise DeltaError(f"Invalid delta kind: {kind}")
+
+        self._sequence = sequence
+
+        decoded = proton.Message()
+        decoded.decode(message.encode())
+        decoded.body = json.dumps(self._document) if self._as_string else copy.deepcopy(self._document)
+        decoded.properties = {key: value for key, value in properties.items()
+                              if key not in (DELTA_KIND_PROPERTY, DELTA_SEQUENCE_PROPERTY)}
+
+        return decoded
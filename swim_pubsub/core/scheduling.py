@@ -0,0 +1,182 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+import math
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+# the fractional parts of its multiples are evenly spread over [0, 1) for any number of them
+_GOLDEN_RATIO_CONJUGATE = (5 ** 0.5 - 1) / 2
+
+# slots per level: 256 ticks in the first level and up to 256*64*64*64 ticks (~2 years of 1 second ticks) in total
+DEFAULT_WHEEL_SLOTS = (256, 64, 64, 64)
+
+
+def stagger_phase(index: int, interval: float) -> float:
+    """
+    Spreads the phases of periodic tasks that share the same interval so that they do not all run at the same time.
+    The phases are evenly spread over the interval without knowing the number of tasks in advance, so tasks can keep
+    being added, i.e. the first one gets 0, the second one 0.618 * interval, the third one 0.236 * interval etc.
+
+    :param index: the order of the task among the ones with the same interval
+    :param interval:
+    :return: the phase of the task in [0, interval)
+    """
+    return (index * _GOLDEN_RATIO_CONJUGATE) % 1 * interval
+
+
+class TimingWheel:
+
+    def __init__(self,
+                 tick_in_sec: float,
+                 slots: Sequence[int] = DEFAULT_WHEEL_SLOTS,
+                 origin: Optional[float] = None) -> None:
+        """
+        A hierarchical timing wheel for keeping track of a large number of timers with O(1) insertion and expiration.
+        The time is split in ticks and every level of the wheel is an array of slots. A slot of the first level holds
+        the items that expire in a specific tick whereas a slot of every next level spans a whole rotation of the
+        previous one. The items of a higher level slot are cascaded down to the lower levels as soon as the time
+        reaches it.
+
+        The items expire at tick granularity, i.e. they are due at the first tick after their deadline.
+
+        :param tick_in_sec: the duration of a tick
+        :param slots: the number of slots per level
+        :param origin: the monotonic time of tick 0. Defaults to now.
+        """
+        if tick_in_sec <= 0:
+            raise ValueError(f"tick_in_sec should be positive, got {tick_in_sec}")
+
+        self.tick_in_sec = tick_in_sec
+        self.origin = time.monotonic() if origin is None else origin
+
+        self._slots: List[int] = list(slots)
+        # the number of ticks a slot of each level spans
+        self._resolutions: List[int] = [1]
+        for count in self._slots[:-1]:
+            self._resolutions.append(self._resolutions[-1] * count)
+        self._span = self._resolutions[-1] * self._slots[-1]
+        self._wheels: List[List[List[Tuple[int, Any]]]] = [[[] for _ in range(count)] for count in self._slots]
+
+        self.current_tick = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"<TimingWheel tick={self.tick_in_sec}s current_tick={self.current_tick} items={self._size}>"
+
+    def schedule(self, item: Any, delay: float, now: Optional[float] = None) -> int:
+        """
+        :param item:
+        :param delay: in seconds
+        :param now: the current monotonic time. Defaults to now.
+        :return: the tick when the item will be due
+        """
+        now = time.monotonic() if now is None else now
+
+        expiry = max(self.current_tick + 1, math.ceil((now + delay - self.origin) / self.tick_in_sec))
+        self._insert(expiry, item)
+        self._size += 1
+
+        return expiry
+
+    def _insert(self, expiry: int, item: Any) -> None:
+        # items beyond the span of the wheel are placed in its farthest slot and are re-inserted once they get cascaded
+        slot_expiry = min(expiry, self.current_tick + self._span - 1)
+        ticks = slot_expiry - self.current_tick
+
+        level = 0
+        while level + 1 < len(self._slots) and ticks >= self._resolutions[level + 1]:
+            level += 1
+
+        index = (slot_expiry // self._resolutions[level]) % self._slots[level]
+        self._wheels[level][index].append((expiry, item))
+
+    def next_tick_delay(self, now: Optional[float] = None) -> float:
+        """
+        :param now: the current monotonic time. Defaults to now.
+        :return: the delay in seconds until the start of the next tick
+        """
+        now = time.monotonic() if now is None else now
+
+        return max(0., self.origin + (self.current_tick + 1) * self.tick_in_sec - now)
+
+    def advance(self, now: Optional[float] = None) -> List[Any]:
+        """
+        Moves the wheel up to the current time
+
+        :param now: the current monotonic time. Defaults to now.
+        :return: the items that became due in the order of their expiry
+        """
+        now = time.monotonic() if now is None else now
+
+        target_tick = math.floor((now - self.origin) / self.tick_in_sec)
+
+        due = []
+        while self.current_tick < target_tick:
+            due += self._tick()
+
+        return due
+
+    def _tick(self) -> List[Any]:
+        self.current_tick += 1
+
+        # cascade the higher levels which have reached a new slot, the highest one first
+        level = 1
+        while level < len(self._slots) and self.current_tick % self._resolutions[level] == 0:
+            level += 1
+
+        for cascaded_level in range(level - 1, 0, -1):
+            index = (self.current_tick // self._resolutions[cascaded_level]) % self._slots[cascaded_level]
+            entries = self._wheels[cascaded_level][index]
+            self._wheels[cascaded_level][index] = []
+
+            for expiry, item in entries:
+                self._insert(expiry, item)
+
+        index = self.current_tick % self._slots[0]
+        entries = self._wheels[0][index]
+        self._wheels[0][index] = []
+
+        due = []
+        for expiry, item in entries:
+            # only a single level wheel can hold items of a later rotation in its first level
+            if expiry > self.current_tick:
+                self._insert(expiry, item)
+            else:
+                due.append(item)
+        self._size -= len(due)
+
+        return due
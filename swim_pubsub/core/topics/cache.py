@@ -0,0 +1,130 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+from swim_pubsub.core.topics.utils import copy_topic_data
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+# a sentinel for cache misses since None can be valid topic data
+MISS = object()
+
+
+class TopicDataCache:
+
+    def __init__(self, ttl_in_sec: float, max_size: int = 128) -> None:
+        """
+        Keeps the data of a topic per context for `ttl_in_sec` seconds, so that consecutive triggers of the topic with
+        the same context do not call its data handler again. Once `max_size` contexts are cached the least recently used
+        one is evicted. It is thread safe since the data handlers may run in a worker pool.
+
+        :param ttl_in_sec: the time in seconds the data are valid for
+        :param max_size: the max number of contexts to keep data for
+        """
+        if ttl_in_sec <= 0:
+            raise ValueError(f"ttl_in_sec should be positive, got {ttl_in_sec}")
+
+        if max_size < 1:
+            raise ValueError(f"max_size should be a positive integer, got {max_size}")
+
+        self.ttl_in_sec = ttl_in_sec
+        self.max_size = max_size
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"<TopicDataCache ttl={self.ttl_in_sec}s size={len(self)}/{self.max_size}>"
+
+    def get(self, context: Hashable) -> Any:
+        """
+        :param context:
+        :return: the cached data of the context or MISS if there are no valid ones
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry: Tuple[float, Any] = self._entries.get(context, MISS)
+
+            if entry is not MISS and entry[0] <= now:
+                del self._entries[context]
+                self.expirations += 1
+                entry = MISS
+
+            if entry is MISS:
+                self.misses += 1
+                return MISS
+
+            self._entries.move_to_end(context)
+            self.hits += 1
+
+        return copy_topic_data(entry[1])
+
+    def put(self, context: Hashable, data: Any) -> None:
+        """
+        :param context:
+        :param data:
+        """
+        expires_at = time.monotonic() + self.ttl_in_sec
+
+        with self._lock:
+            self._entries[context] = (expires_at, copy_topic_data(data))
+            self._entries.move_to_end(context)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ttl_in_sec': self.ttl_in_sec,
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
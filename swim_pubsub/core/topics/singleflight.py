@@ -0,0 +1,157 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import asyncio
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+class _Call:
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+
+
+class SingleFlight:
+
+    def __init__(self) -> None:
+        """
+        Coalesces concurrent calls with the same key into a single one: the first caller makes the call while any other
+        caller with the same key waits for it and gets the same result (or exception). A new call is made once the one
+        in flight is done, so the results are never reused afterwards (see `TopicDataCache` for that).
+
+        It can be shared among callers, e.g. the data handlers of several topics that depend on the same upstream call.
+        Plain calls are coalesced among threads and coroutine calls among the tasks of the same event loop.
+        """
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+
+        self.calls = 0
+        self.shared = 0
+
+    def __repr__(self):
+        return f"<SingleFlight calls={self.calls} shared={self.shared}>"
+
+    def do(self, key: Hashable, f: Callable, *args, **kwargs) -> Any:
+        """
+        Calls `f` unless a call with the same key is already in flight, in which case it waits for its result.
+
+        :param key:
+        :param f:
+        :return: the result of the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = f(*args, **kwargs)
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    async def do_async(self, key: Hashable, f: Callable, *args, **kwargs) -> Any:
+        """
+        Awaits the coroutine function `f` unless a call with the same key is already in flight in the current event
+        loop, in which case it awaits its result. A caller that gets cancelled does not cancel the call for the rest.
+
+        :param key:
+        :param f: a coroutine function
+        :return: the result of the call
+        """
+        loop_key = (asyncio.get_event_loop(), key)
+
+        future = self._async_calls.get(loop_key)
+        if future is None:
+            future = self._async_calls[loop_key] = asyncio.ensure_future(f(*args, **kwargs))
+            future.add_done_callback(lambda done: self._forget_async_call(loop_key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(future)
+
+    def _forget_async_call(self, loop_key: Hashable, future: asyncio.Future) -> None:
+        if self._async_calls.get(loop_key) is future:
+            del self._async_calls[loop_key]
+
+    def wrap(self, f: Callable, key: Optional[Callable] = None) -> Callable:
+        """
+        Decorates a function or a coroutine function so that its concurrent calls are coalesced, e.g. an upstream call
+        that the data handlers of several topics depend on.
+
+        :param f:
+        :param key: computes the key of a call from its arguments. Defaults to the arguments themselves.
+        :return:
+        """
+        key = key or _arguments_key
+
+        if asyncio.iscoroutinefunction(f):
+            @wraps(f)
+            async def async_wrapper(*args, **kwargs):
+                return await self.do_async(key(*args, **kwargs), f, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            return self.do(key(*args, **kwargs), f, *args, **kwargs)
+        return wrapper
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'calls': self.calls,
+            'shared': self.shared
+        }
+
+
+def _arguments_key(*args, **kwargs) -> Hashable:
+    return args, tuple(sorted(kwargs.items()))
@@ -27,30 +27,79 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Callable, Any, Iterable
+import time
+from typing import Optional, Callable, Any, Iterable, Dict, List, Tuple, Mapping, Iterator
 
 import proton
 from proton.handlers import MessagingHandler
+from proton.reactor import Container
+
+from swim_pubsub.core.compression import COMPRESSIONS, DEFAULT_COMPRESSION_THRESHOLD
+from swim_pubsub.core.metrics import Histogram
+from swim_pubsub.core.topics.cache import TopicDataCache, MISS
+from swim_pubsub.core.topics.singleflight import SingleFlight
+from swim_pubsub.core.topics.utils import is_hashable, copy_topic_data, body_digest
 
 __author__ = "EUROCONTROL (SWIM)"
 
 _logger = logging.getLogger(__name__)
 
 
+# delivery modes
+AT_LEAST_ONCE = 'at_least_once'
+AT_MOST_ONCE = 'at_most_once'
+
+DELIVERY_MODES = (AT_LEAST_ONCE, AT_MOST_ONCE)
+
+# policies for the missed ticks of fixed rate scheduling
+CATCH_UP = 'catch_up'
+SKIP = 'skip'
+COALESCE = 'coalesce'
+
+MISSED_TICKS_POLICIES = (CATCH_UP, SKIP, COALESCE)
+
+# policies for the messages that exceed a rate limit
+DELAY = 'delay'
+CONFLATE = 'conflate'
+DROP = 'drop'
+
+RATE_LIMIT_POLICIES = (DELAY, CONFLATE, DROP)
+
+
 class TopicDataHandlerError(Exception):
     pass
 
 
 class Topic:
 
-    def __init__(self, topic_name: str, data_handler: Callable):
+    def __init__(self,
+                 topic_name: str,
+                 data_handler: Callable,
+                 delivery_mode: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 cache_ttl_in_sec: Optional[float] = None,
+                 cache_size: int = 128,
+                 single_flight: bool = False,
+                 delta: bool = False,
+                 snapshot_interval: int = 10,
+                 rate_limit: Optional[float] = None,
+                 rate_burst: Optional[int] = None,
+                 rate_limit_policy: Optional[str] = None,
+                 priority: Optional[int] = None,
+                 codec: Optional[str] = None,
+                 compression: Optional[str] = None,
+                 compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD):
         """
         Represents a topic in the broker identified by topic_id. The provided data_handler will generate the data to be
         sent in the broker for this topic.
 
         :param topic_name:
         :param data_handler: the callback to generate data for the specific topics
+                              - it can be a plain function or a coroutine function (`async def`)
                               - it accepts an optional parameter `context` for passing relevant data upon calling it
                               - it returns a proton.Message or any other type
                               - it raises a TopicDataHandlerError in case or error
@@ -60,13 +109,78 @@ class Topic:
                                 \"""
                                 :raises TopicDataHandlerError
                                 \"""
+        :param delivery_mode: AT_LEAST_ONCE or AT_MOST_ONCE (pre-settled, fire and forget) delivery of the messages of
+                              the topic. If not provided the delivery mode of the broker handler applies.
+        :param max_concurrency: the max number of concurrent calls of the data handler in case the broker handler runs
+                                them in a worker pool. Any trigger above this limit is skipped.
+        :param timeout: the max time in seconds to wait for the data handler in case the broker handler runs it in a
+                        worker pool. Late data are discarded.
+        :param cache_ttl_in_sec: if provided the data are cached per context for this many seconds and the data handler
+                                 is not called again for the same context in the meantime. The context has to be
+                                 hashable, otherwise the data handler is always called.
+        :param cache_size: the max number of contexts to cache data for. The least recently used one is evicted first.
+        :param single_flight: whether concurrent data fetches with the same context share a single data handler call,
+                              e.g. a scheduled tick that overlaps with an on demand trigger. The context has to be
+                              hashable, otherwise the data handler is always called.
+        :param delta: whether to send the JSON data of the topic as a full snapshot followed by diffs (JSON patches)
+                      against the previous data. The subscribers rebuild the full data before passing them on.
+        :param snapshot_interval: the max number of messages between two full snapshots in delta mode
+        :param rate_limit: the max number of messages per second of the topic on average, enforced by the broker
+                           handler via a token bucket
+        :param rate_burst: the max number of messages of the topic that can be sent at once. Defaults to the rate limit.
+        :param rate_limit_policy: what happens to the messages above the rate limit, one of DELAY, CONFLATE, DROP. If
+                                  not provided the policy of the broker handler applies.
+        :param priority: the AMQP priority (0-255, higher is more urgent) of the messages of the topic. Their buffered
+                         messages also go through the respective priority lane of the broker handler, if enabled.
+        :param codec: the name of the codec (see `CodecRegistry`), e.g. 'json' or 'msgpack', that the broker handler
+                      encodes the data with. The data handler returns plain data in this case, e.g. a dict instead of
+                      its JSON string. Topics in delta mode can only use the 'json' codec.
+        :param compression: one of ZLIB, LZMA, BZ2 in order for the broker handler to compress the payloads of the
+                            topic, setting the content encoding of the messages accordingly. Only string or binary
+                            payloads are compressed, i.e. the data handler should return strings or bytes unless a
+                            codec is set.
+        :param compression_threshold: the min size in bytes of the payloads to be compressed
         """
         self.name = topic_name
         self.data_handler = self._validate_data_handler(data_handler)
+        self.is_async = asyncio.iscoroutinefunction(data_handler)
+        self.delivery_mode = self._validate_delivery_mode(delivery_mode)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache: Optional[TopicDataCache] = None
+        if cache_ttl_in_sec is not None:
+            self.cache = TopicDataCache(ttl_in_sec=cache_ttl_in_sec, max_size=cache_size)
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if single_flight else None
+        self.delta = delta
+        self.snapshot_interval = snapshot_interval
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.rate_limit_policy = self._validate_rate_limit_policy(rate_limit_policy)
+        self.priority = self._validate_priority(priority)
+        self.codec = codec
+        self.compression = self._validate_compression(compression)
+        self.compression_threshold = compression_threshold
+
+        if delta and codec not in (None, 'json'):
+            raise ValueError(f"Topic {self.name} in delta mode can only use the json codec, got {codec}")
 
     def __repr__(self):
         return f"<Topic '{self.name}'>"
 
+    @property
+    def subjects(self) -> List[str]:
+        """
+        The subjects the data of the topic are published under
+        """
+        return [self.name]
+
+    def split_data(self, data: Any) -> List[Tuple[Any, str]]:
+        """
+        :param data:
+        :return: the (data, subject) pairs to be sent
+        """
+        return [(data, self.name)]
+
     @staticmethod
     def _validate_data_handler(handler: Callable) -> Callable:
         if not isinstance(handler, Callable):
@@ -74,30 +188,164 @@ class Topic:
 
         return handler
 
+    @staticmethod
+    def _validate_delivery_mode(delivery_mode: Optional[str]) -> Optional[str]:
+        if delivery_mode is not None and delivery_mode not in DELIVERY_MODES:
+            raise ValueError(f"Invalid delivery mode: {delivery_mode}")
+
+        return delivery_mode
+
+    @staticmethod
+    def _validate_rate_limit_policy(rate_limit_policy: Optional[str]) -> Optional[str]:
+        if rate_limit_policy is not None and rate_limit_policy not in RATE_LIMIT_POLICIES:
+            raise ValueError(f"Invalid rate limit policy: {rate_limit_policy}")
+
+        return rate_limit_policy
+
+    @staticmethod
+    def _validate_priority(priority: Optional[int]) -> Optional[int]:
+        if priority is not None and (not isinstance(priority, int) or not 0 <= priority <= 255):
+            raise ValueError(f"priority should be an integer between 0 and 255, got {priority}")
+
+        return priority
+
+    @staticmethod
+    def _validate_compression(compression: Optional[str]) -> Optional[str]:
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid compression: {compression}")
+
+        return compression
+
+    def _uses_cache(self, context: Optional[Any]) -> bool:
+        return self.cache is not None and is_hashable(context)
+
+    def _uses_single_flight(self, context: Optional[Any]) -> bool:
+        return self.single_flight is not None and is_hashable(context)
+
     def get_data(self, context: Optional[Any] = None) -> Any:
         """
+        In case of a coroutine data handler it is run to completion in a new event loop.
+
         :param context:
         :return:
         """
-        return self.data_handler(context=context)
+        if self._uses_cache(context):
+            data = self.cache.get(context)
+            if data is not MISS:
+                return data
+
+        if self._uses_single_flight(context):
+            return copy_topic_data(self.single_flight.do(context, self._fetch_data, context))
+
+        return self._fetch_data(context)
+
+    def _fetch_data(self, context: Optional[Any]) -> Any:
+        if self.is_async:
+            loop = asyncio.new_event_loop()
+            try:
+                data = loop.run_until_complete(self.data_handler(context=context))
+            finally:
+                loop.close()
+        else:
+            data = self.data_handler(context=context)
+
+        if self._uses_cache(context):
+            self.cache.put(context, data)
+
+        return data
+
+    async def get_data_async(self, context: Optional[Any] = None) -> Any:
+        """
+        Awaits the data handler in case of a coroutine data handler, otherwise it is called directly.
+
+        :param context:
+        :return:
+        """
+        if self._uses_cache(context):
+            data = self.cache.get(context)
+            if data is not MISS:
+                return data
+
+        if self._uses_single_flight(context):
+            return copy_topic_data(await self.single_flight.do_async(context, self._fetch_data_async, context))
+
+        return await self._fetch_data_async(context)
+
+    async def _fetch_data_async(self, context: Optional[Any]) -> Any:
+        if self.is_async:
+            data = await self.data_handler(context=context)
+        else:
+            data = self.data_handler(context=context)
+
+        if self._uses_cache(context):
+            self.cache.put(context, data)
+
+        return data
 
 
 class ScheduledTopic(MessagingHandler, Topic):
 
-    def __init__(self, topic_name: str, data_handler: Callable, interval_in_sec: int, **kwargs) -> None:
+    def __init__(self,
+                 topic_name: str,
+                 data_handler: Callable,
+                 interval_in_sec: int,
+                 fixed_rate: bool = False,
+                 missed_ticks_policy: str = SKIP,
+                 skip_unchanged: bool = False,
+                 heartbeat_in_sec: Optional[float] = None,
+                 **kwargs) -> None:
         """
         A topic to be run upon interval periods.
         It inherits from `proton.MessagingHandler` in order to take advantage of its event scheduling functionality
 
+        By default the topic is re-scheduled after its data have been sent, so every tick drifts by the time it takes to
+        generate them. In fixed rate mode the ticks are scheduled against absolute deadlines instead, i.e. every
+        `interval_in_sec` from the first one. Ticks whose deadline has already passed by the time the previous one is
+        done are handled according to `missed_ticks_policy`:
+            - CATCH_UP: they are run one after the other with no delay until the topic is back on schedule
+            - SKIP: they are dropped and the topic waits for the next deadline
+            - COALESCE: they are merged in a single tick which is run right away and the deadlines start over from it
+
+        The lateness of the ticks against their deadline is recorded in any mode.
+
+        Feeds that mostly return the same data tick after tick can skip sending them when their body has not changed
+        since the last sent one. A heartbeat interval makes sure the data are still re-sent every once in a while.
+
         :param interval_in_sec:
+        :param fixed_rate: whether to schedule against absolute deadlines
+        :param missed_ticks_policy: one of CATCH_UP, SKIP, COALESCE
+        :param skip_unchanged: whether to skip sending data whose body is the same as the last sent one
+        :param heartbeat_in_sec: the max time in seconds to skip unchanged data for, after which they are re-sent
+        :param kwargs: any other option of `Topic`
         """
         MessagingHandler.__init__(self)
-        Topic.__init__(self, topic_name, data_handler)
+        Topic.__init__(self, topic_name, data_handler, **kwargs)
 
-        self.interval_in_sec = interval_in_sec
+        if missed_ticks_policy not in MISSED_TICKS_POLICIES:
+            raise ValueError(f"Invalid missed ticks policy: {missed_ticks_policy}")
 
-        # a callback to be set from the broker handler upon first scheduling
+        self.interval_in_sec = interval_in_sec
+        self.fixed_rate = fixed_rate
+        self.missed_ticks_policy = missed_ticks_policy
+
+        # change detection
+        self.skip_unchanged = skip_unchanged
+        self.heartbeat_in_sec = heartbeat_in_sec
+        self._last_sent_digest: Optional[bytes] = None
+        self._last_sent_at: Optional[float] = None
+        # the last checked data along with their digest, so that they are not hashed again once sent
+        self._last_checked: Optional[Tuple[Any, bytes]] = None
+        self.unchanged_skips = 0
+
+        # scheduling metrics
+        self._next_deadline: Optional[float] = None
+        self.lateness = Histogram()
+        self.ticks = 0
+        self.missed_ticks = 0
+
+        # callbacks to be set from the broker handler upon first scheduling
         self._message_send_callback: Optional[Callable] = None
+        self._trigger_callback: Optional[Callable] = None
 
     def __repr__(self):
         return f"<ScheduledTopic '{self.name}'>"
@@ -109,11 +357,24 @@ class ScheduledTopic(MessagingHandler, Topic):
         """
         self._message_send_callback = message_send_callback
 
+    def set_trigger_callback(self, trigger_callback: Optional[Callable]):
+        """
+        Lets the broker handler take over the generation and the sending of the topic data, e.g. in order to run the
+        data handler in a worker pool.
+
+        :param trigger_callback: has signature: callback(topic: ScheduledTopic)
+        """
+        self._trigger_callback = trigger_callback
+
     def _trigger_message_send(self) -> None:
         """
         Generates the topic data and sends them via the broker
         :return:
         """
+        if self._trigger_callback:
+            self._trigger_callback(topic=self)
+            return
+
         if not self._message_send_callback:
             _logger.warning(f"Not able to send messages because no sender "
                             f"has been assigned yet for topic '{self.name}'")
@@ -125,8 +386,80 @@ class ScheduledTopic(MessagingHandler, Topic):
             _logger.error(f"Error while getting data of scheduled topic {self.name}: {str(e)}")
             return
 
+        if self.is_unchanged(data):
+            _logger.debug(f"Skipped unchanged data of scheduled topic {self.name}")
+            return
+
         _logger.info(f"Sending message for scheduled topic {self.name}")
-        self._message_send_callback(message=data, subject=self.name)
+        for message, subject in self.split_data(data):
+            self._message_send_callback(message=message, subject=subject)
+
+        self.mark_sent(data)
+
+    def is_unchanged(self, data: Any, encode: Optional[Callable[[Any], Any]] = None) -> bool:
+        """
+        Checks whether the data can be skipped because their body is the same as the last sent one. The data are not
+        considered as sent until `mark_sent` is called, e.g. once the broker handler has sent or buffered them. Data
+        whose body cannot be encoded are never considered as unchanged.
+
+        :param data:
+        :param encode: the codec encoding of the body, if any
+        :return:
+        """
+        if not self.skip_unchanged:
+            return False
+
+        digest = self._data_digest(data, encode)
+        self._last_checked = (data, digest)
+
+        heartbeat_due = self.heartbeat_in_sec is not None and self._last_sent_at is not None \
+            and time.monotonic() - self._last_sent_at >= self.heartbeat_in_sec
+
+        if digest is not None and digest == self._last_sent_digest and not heartbeat_due:
+            self.unchanged_skips += 1
+            return True
+
+        return False
+
+    def mark_sent(self, data: Any, encode: Optional[Callable[[Any], Any]] = None) -> None:
+        """
+        Keeps the body of the data as the last sent one, against which the next data are checked
+
+        :param data:
+        :param encode: the codec encoding of the body, if any
+        """
+        if not self.skip_unchanged:
+            return
+
+        if self._last_checked is not None and self._last_checked[0] is data:
+            self._last_sent_digest = self._last_checked[1]
+        else:
+            self._last_sent_digest = self._data_digest(data, encode)
+        self._last_sent_at = time.monotonic()
+
+    def _data_digest(self, data: Any, encode: Optional[Callable[[Any], Any]] = None) -> Optional[bytes]:
+        return body_digest(data, encode)
+
+    def start(self, delay: Optional[float] = None) -> float:
+        """
+        Sets the deadline of the first tick of the topic
+
+        :param delay: the delay in seconds of the first tick. Defaults to the interval of the topic.
+        :return: the delay in seconds until the first tick
+        """
+        delay = self.interval_in_sec if delay is None else delay
+
+        self._next_deadline = time.monotonic() + delay
+        return delay
+
+    def schedule(self, container: Container, delay: Optional[float] = None) -> None:
+        """
+        Schedules the first tick of the topic
+
+        :param container:
+        :param delay: the delay in seconds of the first tick. Defaults to the interval of the topic.
+        """
+        container.schedule(self.start(delay), self)
 
     def on_timer_task(self, event: proton.Event):
         """
@@ -135,8 +468,233 @@ class ScheduledTopic(MessagingHandler, Topic):
 
         :param event:
         """
+        self.record_tick()
+
         # send the topic data
         self._trigger_message_send()
 
         # and re-schedule the topic
-        event.container.schedule(self.interval_in_sec, self)
+        event.container.schedule(self.next_delay(), self)
+
+    def record_tick(self) -> None:
+        """
+        Records a tick of the topic along with its lateness against its deadline
+        """
+        tick_time = time.monotonic()
+        if self._next_deadline is None:
+            self._next_deadline = tick_time
+        self.lateness.observe(max(0., tick_time - self._next_deadline))
+        self.ticks += 1
+
+    def next_delay(self) -> float:
+        """
+        Moves on to the deadline of the next tick
+
+        :return: the delay in seconds until the next tick
+        """
+        now = time.monotonic()
+
+        if not self.fixed_rate:
+            self._next_deadline = now + self.interval_in_sec
+            return self.interval_in_sec
+
+        self._next_deadline += self.interval_in_sec
+
+        if self._next_deadline <= now:
+            missed = int((now - self._next_deadline) // self.interval_in_sec) + 1
+
+            if self.missed_ticks_policy == SKIP:
+                self.missed_ticks += missed
+                self._next_deadline += missed * self.interval_in_sec
+            elif self.missed_ticks_policy == COALESCE:
+                # one of them will still run
+                self.missed_ticks += missed - 1
+                self._next_deadline = now
+
+        return max(0., self._next_deadline - now)
+
+    def schedule_stats(self) -> Dict[str, Any]:
+        return {
+            'fixed_rate': self.fixed_rate,
+            'missed_ticks_policy': self.missed_ticks_policy,
+            'ticks': self.ticks,
+            'missed_ticks': self.missed_ticks,
+            'unchanged_skips': self.unchanged_skips,
+            'lateness': self.lateness.stats()
+        }
+
+
+class FanOutTopic(Topic):
+
+    def __init__(self, topic_name: str, data_handler: Callable, subjects: Iterable[str], **kwargs) -> None:
+        """
+        A topic whose data handler fetches the data of many subjects at once, e.g. via a single bulk upstream query,
+        instead of one call per subject. The topic name identifies the fan-out itself whereas its data are published
+        under its subjects.
+
+        :param topic_name:
+        :param data_handler: as in `Topic` but it returns a mapping of subject -> data. Subjects that are not declared
+                             in `subjects` are skipped.
+        :param subjects: the subjects the topic publishes data under
+        :param kwargs: any other option of `Topic`
+        """
+        Topic.__init__(self, topic_name, data_handler, **kwargs)
+
+        self._set_subjects(subjects)
+
+    def __repr__(self):
+        return f"<FanOutTopic '{self.name}'>"
+
+    def _set_subjects(self, subjects: Iterable[str]) -> None:
+        self._subjects: List[str] = list(subjects)
+        self._subjects_set = set(self._subjects)
+
+        if not self._subjects:
+            raise ValueError(f"No subjects were provided for fan-out topic {self.name}")
+
+    @property
+    def subjects(self) -> List[str]:
+        return list(self._subjects)
+
+    def get_data(self, context: Optional[Any] = None) -> Mapping[str, Any]:
+        return self._validate_data(super().get_data(context=context))
+
+    async def get_data_async(self, context: Optional[Any] = None) -> Mapping[str, Any]:
+        return self._validate_data(await super().get_data_async(context=context))
+
+    def _data_digest(self, data: Mapping[str, Any], encode: Optional[Callable[[Any], Any]] = None) -> Optional[bytes]:
+        """
+        Hashes the bodies of the subjects one by one since the codec encodes the data of every subject on its own
+        """
+        if encode is None:
+            return body_digest(data)
+
+        digest = hashlib.sha1()
+        for subject, subject_data in data.items():
+            subject_digest = body_digest(subject_data, encode)
+            if subject_digest is None:
+                return None
+
+            digest.update(subject.encode('utf-8') + subject_digest)
+
+        return digest.digest()
+
+    def _validate_data(self, data: Any) -> Mapping[str, Any]:
+        if not isinstance(data, Mapping):
+            raise TopicDataHandlerError(f"The data handler of fan-out topic {self.name} should return a mapping of "
+                                        f"subject to data, got {type(data).__name__}")
+
+        return data
+
+    def split_data(self, data: Mapping[str, Any]) -> List[Tuple[Any, str]]:
+        """
+        :param data: a mapping of subject -> data
+        :return: the (data, subject) pairs to be sent
+        """
+        messages = []
+        for subject, subject_data in data.items():
+            if subject not in self._subjects_set:
+                _logger.warning(f"Skipped undeclared subject {subject} of fan-out topic {self.name}")
+                continue
+
+            messages.append((subject_data, subject))
+
+        return messages
+
+
+class ScheduledFanOutTopic(FanOutTopic, ScheduledTopic):
+
+    def __init__(self,
+                 topic_name: str,
+                 data_handler: Callable,
+                 subjects: Iterable[str],
+                 interval_in_sec: int,
+                 **kwargs) -> None:
+        """
+        A fan-out topic to be run upon interval periods, i.e. a single data handler call per tick for all its subjects.
+
+        :param topic_name:
+        :param data_handler: returns a mapping of subject -> data
+        :param subjects: the subjects the topic publishes data under
+        :param interval_in_sec:
+        :param kwargs: any other option of `ScheduledTopic`
+        """
+        ScheduledTopic.__init__(self, topic_name, data_handler, interval_in_sec, **kwargs)
+
+        self._set_subjects(subjects)
+
+    def __repr__(self):
+        return f"<ScheduledFanOutTopic '{self.name}'>"
+
+
+class StreamingTopic(Topic):
+
+    def __init__(self, topic_name: str, data_handler: Callable, **kwargs) -> None:
+        """
+        A topic whose data handler returns an iterable, typically a generator, of many data items, e.g. one per flight
+        record, each of which is sent as a separate message. The broker handler pulls the items lazily as credit becomes
+        available on the link of the topic so that the whole result never has to be kept in memory.
+
+        The data of a streaming topic are consumed while they are sent, hence they cannot be cached or shared among
+        concurrent fetches.
+
+        :param topic_name:
+        :param data_handler: as in `Topic` but it returns an iterable of data items
+        :param kwargs: any other option of `Topic`
+        """
+        Topic.__init__(self, topic_name, data_handler, **kwargs)
+
+        self._validate_streaming()
+
+    def __repr__(self):
+        return f"<StreamingTopic '{self.name}'>"
+
+    def _validate_streaming(self) -> None:
+        if self.cache is not None or self.single_flight is not None:
+            raise ValueError(f"Streaming topic {self.name} cannot cache or share its data")
+
+    def get_data(self, context: Optional[Any] = None) -> Iterator[Any]:
+        return self._validate_data(super().get_data(context=context))
+
+    async def get_data_async(self, context: Optional[Any] = None) -> Iterator[Any]:
+        return self._validate_data(await super().get_data_async(context=context))
+
+    def _validate_data(self, data: Any) -> Iterator[Any]:
+        if not isinstance(data, Iterable) or isinstance(data, (str, bytes, Mapping, proton.Message)):
+            raise TopicDataHandlerError(f"The data handler of streaming topic {self.name} should return an iterable of "
+                                        f"data, got {type(data).__name__}")
+
+        return iter(data)
+
+    def split_data(self, data: Iterable[Any]) -> List[Tuple[Any, str]]:
+        """
+        Consumes the whole data at once, i.e. it is only meant for sending them without a broker handler that
+        streams them.
+
+        :param data: an iterable of data items
+        :return: the (data, subject) pairs to be sent
+        """
+        return [(item, self.name) for item in data]
+
+
+class ScheduledStreamingTopic(StreamingTopic, ScheduledTopic):
+
+    def __init__(self, topic_name: str, data_handler: Callable, interval_in_sec: int, **kwargs) -> None:
+        """
+        A streaming topic to be run upon interval periods. A tick is skipped by the broker handler if the items of the
+        previous one are still being sent.
+
+        :param topic_name:
+        :param data_handler: returns an iterable of data items
+        :param interval_in_sec:
+        :param kwargs: any other option of `ScheduledTopic` apart from `skip_unchanged`
+        """
+        ScheduledTopic.__init__(self, topic_name, data_handler, interval_in_sec, **kwargs)
+
+        if self.skip_unchanged:
+            raise ValueError(f"Streaming topic {self.name} cannot skip unchanged data")
+
+        self._validate_streaming()
+
+    def __repr__(self):
+        return f"<ScheduledStreamingTopic '{self.name}'>"
@@ -27,10 +27,68 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import hashlib
+import logging
+from typing import Any, Callable, Optional
+
+import proton
 
 __author__ = "EUROCONTROL (SWIM)"
 
+_logger = logging.getLogger(__name__)
+
 
 def truncate_message(message: str, max_length: int):
 
     return f"{message[:max_length]}..."
+
+
+def is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+
+    return True
+
+
+def copy_topic_data(data: Any) -> Any:
+    """
+    Copies the data in case of a `proton.Message` since a message is sent as is and every send needs its own instance.
+
+    :param data:
+    :return:
+    """
+    if isinstance(data, proton.Message):
+        message = proton.Message()
+        message.decode(data.encode())
+        return message
+
+    return data
+
+
+def body_digest(data: Any, encode: Optional[Callable[[Any], Any]] = None) -> Optional[bytes]:
+    """
+    Hashes the encoded body of the data, i.e. of the body of a `proton.Message` or of the data themselves otherwise.
+
+    :param data:
+    :param encode: the codec encoding of the body, if any, prior to its AMQP encoding
+    :return: None if the body cannot be encoded, in which case the data cannot be told apart from any other
+    """
+    body = data.body if isinstance(data, proton.Message) else data
+
+    try:
+        if encode is None:
+            payload = proton.Message(body=body).encode()
+        else:
+            payload = encode(body)
+
+            if isinstance(payload, str):
+                payload = payload.encode('utf-8')
+            elif not isinstance(payload, bytes):
+                payload = proton.Message(body=payload).encode()
+    except Exception as e:
+        _logger.debug(f"Error while encoding body for its digest: {str(e)}")
+        return None
+
+    return hashlib.sha1(payload).digest()
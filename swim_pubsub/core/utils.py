@@ -27,9 +27,12 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import asyncio
 import logging
+import threading
+from concurrent.futures import Future
 from functools import wraps
-from typing import Callable, Union, Optional
+from typing import Callable, Union, Optional, Coroutine
 import yaml
 from proton import SSLDomain, SSLUnavailable
 
@@ -128,3 +131,78 @@ def handle_broker_handler_error(f: Callable) -> Callable:
             _logger.error(str(e))
             raise e
     return wrapper
+
+
+def run_in_container_thread(f: Callable) -> Callable:
+    """
+    Decorates methods of a BrokerHandler which interact with proton so that they can be called from any thread. If the
+    caller runs in a thread other than the one of the container the call is handed off to it and a
+    `concurrent.futures.Future` of the result is returned instead.
+    :param f:
+    :return:
+    """
+    @wraps(f)
+    def wrapper(handler, *args, **kwargs):
+        if handler.in_container_thread():
+            return f(handler, *args, **kwargs)
+
+        return handler.submit(f, handler, *args, **kwargs)
+    return wrapper
+
+
+class TimerTask:
+
+    def __init__(self, callback: Callable, *args, **kwargs) -> None:
+        """
+        Adapts a callable to a handler that can be scheduled via `proton.reactor.Container.schedule`
+        :param callback:
+        """
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+
+    def on_timer_task(self, event):
+        self.callback(*self.args, **self.kwargs)
+
+
+class EventLoopThread:
+
+    def __init__(self, name: str = 'asyncio-loop') -> None:
+        """
+        Runs an asyncio event loop in a daemon thread next to the proton container, so that coroutines can be run
+        concurrently without blocking the container.
+        :param name: the name of the thread
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the loop and waits for its thread to finish
+        :param timeout: the max time in seconds to wait for the thread
+        """
+        if self.is_running:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+    def run_coroutine(self, coroutine: Coroutine) -> Future:
+        """
+        Schedules the coroutine in the loop. It can be safely called from any thread.
+        :param coroutine:
+        :return: a `concurrent.futures.Future` of the result of the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
@@ -27,6 +27,8 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+from typing import Optional
+
 from swim_pubsub.core.base import App
 from swim_pubsub.publisher.client import Publisher
 from swim_pubsub.publisher.handler import PublisherBrokerHandler
@@ -36,11 +38,21 @@ __author__ = "EUROCONTROL (SWIM)"
 
 class PubApp(App):
 
-    def register_publisher(self, username: str, password: str) -> Publisher:
+    def register_publisher(self, username: str, password: str, weight: Optional[float] = None) -> Publisher:
         """
-        Creates a Publisher client
+        Creates a Publisher client which is identified by its username among the clients of the broker handler
+
+        :param username:
+        :param password:
+        :param weight: the share of the credit of the broker handler that the publisher gets in case of fair sharing
         """
-        return self.register_client(username, password, client_class=Publisher)
+        publisher = self.register_client(username, password, client_class=Publisher)
+        publisher.client_id = username
+
+        if weight is not None:
+            publisher.set_weight(weight)
+
+        return publisher
 
     @classmethod
     def create_from_config(cls, config_file: str, broker_handler_class=PublisherBrokerHandler):
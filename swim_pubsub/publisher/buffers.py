@@ -0,0 +1,405 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import itertools
+from collections import deque, OrderedDict
+from typing import Any, Optional, Deque, Dict, Type, Callable, Hashable, Union
+
+from swim_pubsub.core.delta import is_delta_encoded
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+# overflow policies
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# scheduling of the priority lanes
+STRICT = 'strict'
+WEIGHTED = 'weighted'
+
+PRIORITY_SCHEDULINGS = (STRICT, WEIGHTED)
+
+# the buffers that can serve as lanes of other buffers
+BufferType = Union['OutboundBuffer', 'PriorityBuffer']
+
+
+def _select_weighted(current_weights: Dict[Hashable, float], weights: Dict[Hashable, float]) -> Hashable:
+    """
+    Selects the next key via smooth weighted round robin, i.e. every key is selected in proportion to its weight and
+    the selections of the same key are spread out.
+
+    :param current_weights: the state of the selection, updated in place. Keys that are not in `weights` start over.
+    :param weights: the weights of the keys to select among
+    :return:
+    """
+    for key in list(current_weights):
+        if key not in weights:
+            del current_weights[key]
+
+    for key, weight in weights.items():
+        current_weights[key] = current_weights.get(key, 0) + weight
+
+    selected = max(weights, key=lambda k: current_weights[k])
+    current_weights[selected] -= sum(weights.values())
+
+    return selected
+
+
+class OutboundBuffer:
+
+    def __init__(self, max_size: int = 1000, overflow_policy: str = DROP_OLDEST) -> None:
+        """
+        A bounded FIFO buffer which holds the messages that could not be sent because the sender had no credit. The
+        messages are meant to be drained as soon as the broker grants new credit.
+
+        :param max_size: the max number of messages to hold. 0 disables buffering, i.e. every message is dropped.
+        :param overflow_policy: what to do when the buffer is full:
+                                 - DROP_OLDEST: the oldest buffered message is dropped to make room for the new one
+                                 - DROP_NEWEST: the new message is dropped
+        """
+        if max_size < 0:
+            raise ValueError(f"max_size should be a non negative integer, got {max_size}")
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow_policy}")
+
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+
+        self._messages: Deque[Any] = deque()
+
+        # counters
+        self.buffered = 0
+        self.drained = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __repr__(self):
+        return f"<OutboundBuffer {len(self)}/{self.max_size} ({self.overflow_policy})>"
+
+    def is_full(self) -> bool:
+        return len(self._messages) >= self.max_size
+
+    def put(self, message: Any) -> Optional[Any]:
+        """
+        Appends the message in the buffer and applies the overflow policy if the buffer is full.
+
+        :param message:
+        :return: the message that was dropped because of overflow, if any
+        """
+        if self.is_full():
+            self.dropped += 1
+
+            if self.overflow_policy == DROP_NEWEST or self.max_size == 0:
+                return message
+
+            dropped = self._messages.popleft()
+        else:
+            dropped = None
+
+        self._messages.append(message)
+        self.buffered += 1
+
+        return dropped
+
+    def get(self) -> Any:
+        """
+        Pops the oldest message of the buffer
+
+        :return:
+        """
+        message = self._messages.popleft()
+        self.drained += 1
+
+        return message
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'buffered': self.buffered,
+            'drained': self.drained,
+            'dropped': self.dropped
+        }
+
+
+class ConflatingBuffer(OutboundBuffer):
+
+    def __init__(self, max_size: int = 1000, overflow_policy: str = DROP_OLDEST) -> None:
+        """
+        An `OutboundBuffer` which keeps only the latest message per subject, e.g. for topics whose subscribers only care
+        about the newest value. A message replaces the buffered one of the same subject in its place in the queue, so
+        that the backlog is bounded by the number of subjects and the fresh data are sent first once credit is granted.
+
+        Messages in delta mode are never conflated because every diff is needed to rebuild the data.
+
+        :param max_size: the max number of messages (i.e. subjects) to hold. 0 disables buffering.
+        :param overflow_policy: what to do when the buffer is full, as in `OutboundBuffer`
+        """
+        OutboundBuffer.__init__(self, max_size=max_size, overflow_policy=overflow_policy)
+
+        # the messages keyed by their subject, or by their arrival in case of delta messages
+        self._messages: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._arrivals = itertools.count()
+
+        self.conflated = 0
+
+    def __repr__(self):
+        return f"<ConflatingBuffer {len(self)}/{self.max_size} ({self.overflow_policy})>"
+
+    def put(self, message: Any) -> Optional[Any]:
+        """
+        Replaces the buffered message of the same subject if any, otherwise it appends the message in the buffer and
+        applies the overflow policy if the buffer is full.
+
+        :param message:
+        :return: the message that was replaced or dropped because of overflow, if any
+        """
+        key = next(self._arrivals) if is_delta_encoded(message) else message.subject
+
+        replaced = self._messages.get(key)
+        if replaced is not None:
+            self._messages[key] = message
+            self.buffered += 1
+            self.conflated += 1
+
+            return replaced
+
+        if self.is_full():
+            self.dropped += 1
+
+            if self.overflow_policy == DROP_NEWEST or self.max_size == 0:
+                return message
+
+            _, dropped = self._messages.popitem(last=False)
+        else:
+            dropped = None
+
+        self._messages[key] = message
+        self.buffered += 1
+
+        return dropped
+
+    def get(self) -> Any:
+        """
+        Pops the oldest message of the buffer
+
+        :return:
+        """
+        _, message = self._messages.popitem(last=False)
+        self.drained += 1
+
+        return message
+
+    def stats(self) -> Dict[str, int]:
+        return dict(super().stats(), conflated=self.conflated)
+
+
+class PriorityBuffer:
+
+    def __init__(self,
+                 max_size: int = 1000,
+                 overflow_policy: str = DROP_OLDEST,
+                 scheduling: str = STRICT,
+                 lane_class: Type[OutboundBuffer] = OutboundBuffer) -> None:
+        """
+        Keeps the messages in a separate lane (buffer) per AMQP priority so that urgent messages do not queue behind
+        bulk ones. The lanes are drained according to the scheduling:
+            - STRICT: the highest priority lane is always drained first
+            - WEIGHTED: the lanes take turns in proportion to their priority plus one, so that low priority messages
+                        are not starved by a steady flow of high priority ones
+
+        :param max_size: the max number of messages to hold per lane
+        :param overflow_policy: what to do when a lane is full, as in `OutboundBuffer`
+        :param scheduling: one of STRICT, WEIGHTED
+        :param lane_class: the buffer of the lanes, i.e. `OutboundBuffer` or `ConflatingBuffer`
+        """
+        if scheduling not in PRIORITY_SCHEDULINGS:
+            raise ValueError(f"Invalid priority scheduling: {scheduling}")
+
+        # validates the rest of the arguments
+        lane_class(max_size=max_size, overflow_policy=overflow_policy)
+
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.scheduling = scheduling
+        self.lane_class = lane_class
+
+        self._lanes: Dict[int, OutboundBuffer] = {}
+
+        # the current weights of the lanes in WEIGHTED scheduling (smooth weighted round robin)
+        self._current_weights: Dict[int, int] = {}
+
+    def __len__(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def __repr__(self):
+        return f"<PriorityBuffer {len(self)} in {len(self._lanes)} lane(s) ({self.scheduling})>"
+
+    @property
+    def buffered(self) -> int:
+        return sum(lane.buffered for lane in self._lanes.values())
+
+    @property
+    def drained(self) -> int:
+        return sum(lane.drained for lane in self._lanes.values())
+
+    @property
+    def dropped(self) -> int:
+        return sum(lane.dropped for lane in self._lanes.values())
+
+    def put(self, message: Any) -> Optional[Any]:
+        """
+        Puts the message in the lane of its priority
+
+        :param message:
+        :return: the message that was dropped by the lane, if any
+        """
+        lane = self._lanes.get(message.priority)
+        if lane is None:
+            lane = self._lanes[message.priority] = self.lane_class(max_size=self.max_size,
+                                                                   overflow_policy=self.overflow_policy)
+
+        return lane.put(message)
+
+    def get(self) -> Any:
+        """
+        Pops the oldest message of the lane whose turn it is
+
+        :return:
+        """
+        priorities = [priority for priority, lane in self._lanes.items() if len(lane) > 0]
+
+        if self.scheduling == STRICT:
+            return self._lanes[max(priorities)].get()
+
+        # lanes start over once they have been emptied, higher priorities win the ties
+        weights = {priority: priority + 1 for priority in sorted(priorities, reverse=True)}
+
+        return self._lanes[_select_weighted(self._current_weights, weights)].get()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'buffered': self.buffered,
+            'drained': self.drained,
+            'dropped': self.dropped,
+            'lanes': {priority: lane.stats() for priority, lane in sorted(self._lanes.items(), reverse=True)}
+        }
+
+
+class FairBuffer:
+
+    def __init__(self,
+                 lane_factory: Callable[[], BufferType],
+                 client_of: Callable[[Any], str],
+                 weight_of: Callable[[str], float]) -> None:
+        """
+        Keeps the messages in a separate lane (buffer) per client, e.g. per `Publisher` of the same app, and drains the
+        lanes by weighted fair queueing, i.e. every client with buffered messages gets a share of the credit in
+        proportion to its weight no matter how many messages the rest have buffered. Since every lane is bounded on its
+        own, a busy client cannot push out the messages of the others either.
+
+        :param lane_factory: creates the buffer of a lane, e.g. an `OutboundBuffer` or a `PriorityBuffer`
+        :param client_of: returns the client of a message
+        :param weight_of: returns the weight of a client
+        """
+        self.lane_factory = lane_factory
+        self.client_of = client_of
+        self.weight_of = weight_of
+
+        self._lanes: Dict[str, BufferType] = {}
+        self._current_weights: Dict[str, float] = {}
+
+    def __len__(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def __repr__(self):
+        return f"<FairBuffer {len(self)} of {len(self._lanes)} client(s)>"
+
+    @property
+    def buffered(self) -> int:
+        return sum(lane.buffered for lane in self._lanes.values())
+
+    @property
+    def drained(self) -> int:
+        return sum(lane.drained for lane in self._lanes.values())
+
+    @property
+    def dropped(self) -> int:
+        return sum(lane.dropped for lane in self._lanes.values())
+
+    def backlog(self, client: str) -> int:
+        """
+        :param client:
+        :return: the number of buffered messages of the client
+        """
+        lane = self._lanes.get(client)
+
+        return len(lane) if lane is not None else 0
+
+    def put(self, message: Any) -> Optional[Any]:
+        """
+        Puts the message in the lane of its client
+
+        :param message:
+        :return: the message that was dropped by the lane, if any
+        """
+        client = self.client_of(message)
+
+        lane = self._lanes.get(client)
+        if lane is None:
+            lane = self._lanes[client] = self.lane_factory()
+
+        return lane.put(message)
+
+    def get(self) -> Any:
+        """
+        Pops the next message of the client whose turn it is
+
+        :return:
+        """
+        weights = {client: self.weight_of(client) for client, lane in self._lanes.items() if len(lane) > 0}
+
+        return self._lanes[_select_weighted(self._current_weights, weights)].get()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self),
+            'buffered': self.buffered,
+            'drained': self.drained,
+            'dropped': self.dropped,
+            'clients': {client: lane.stats() for client, lane in self._lanes.items()}
+        }
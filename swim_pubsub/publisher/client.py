@@ -27,16 +27,19 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import itertools
 import logging
-from typing import Optional, Any, Dict, List, Set
+from concurrent.futures import Future
+from typing import Optional, Any, Dict, List, Set, Iterable, Tuple, Union
 
 from rest_client.errors import APIError
 from subscription_manager_client.models import Topic as SMTopic
 
 from swim_pubsub.core.clients import PubSubClient
+from swim_pubsub.core.codecs import CodecError
 from swim_pubsub.core.errors import PubSubClientError
 from swim_pubsub.core.topics import TopicType
-from swim_pubsub.publisher.handler import PublisherBrokerHandler
+from swim_pubsub.publisher.handler import PublisherBrokerHandler, TriggerResult
 from swim_pubsub.core.subscription_manager_service import SubscriptionManagerService
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -44,6 +47,8 @@ __author__ = "EUROCONTROL (SWIM)"
 
 _logger = logging.getLogger(__name__)
 
+_publisher_ids = itertools.count(1)
+
 
 class Publisher(PubSubClient):
 
@@ -61,27 +66,49 @@ class Publisher(PubSubClient):
 
         self.topics_dict: Dict[str, TopicType] = {}
 
+        # identifies the publisher among the clients of the broker handler
+        self.client_id: str = f"publisher-{next(_publisher_ids)}"
+
+    def set_weight(self, weight: float) -> None:
+        """
+        Sets the share of the credit of the broker handler that the publisher gets in case of fair sharing, relative to
+        the other publishers of the handler (default 1).
+
+        :param weight: a positive number
+        """
+        self.broker_handler.add_client(self.client_id, weight)
+
     def register_topic(self, topic: TopicType):
         """
         - Keeps a reference to the provided topic
-        - Creates the topic in SM
+        - Creates the topic in SM, i.e. one per subject in case of a fan-out topic
         - Passes it to the broker handler
         :param topic:
+        :raises: PubSubClientError if the codec of the topic is not registered in the broker handler
         """
         if topic.name in self.topics_dict:
             _logger.error(f"Topic with name {topic.name} already exists in broker.")
             return
 
-        try:
-            self.sm_service.create_topic(topic_name=topic.name)
-        except APIError as e:
-            if e.status_code == 409:
-                _logger.error(f"Topic with name {topic.name} already exists in SM")
-            else:
-                raise PubSubClientError(f"Error while creating topic in SM: {str(e)}")
+        # make sure the broker handler accepts the topic before creating it in SM
+        if topic.codec is not None:
+            try:
+                self.broker_handler.codec_registry.get(topic.codec)
+            except CodecError as e:
+                raise PubSubClientError(f"Error while registering topic {topic.name}: {str(e)}")
+
+        for subject in topic.subjects:
+            try:
+                self.sm_service.create_topic(topic_name=subject)
+            except APIError as e:
+                if e.status_code == 409:
+                    _logger.error(f"Topic with name {subject} already exists in SM")
+                else:
+                    raise PubSubClientError(f"Error while creating topic in SM: {str(e)}")
 
         self.topics_dict[topic.name] = topic
 
+        self.broker_handler.assign_topic(topic, self.client_id)
         self.broker_handler.add_topic(topic)
 
     def publish_topic(self, topic_id: str, context: Optional[Any] = None):
@@ -96,7 +123,26 @@ class Publisher(PubSubClient):
         if topic is None:
             raise PubSubClientError(f"Invalid topic id: {topic_id}")
 
-        self.broker_handler.trigger_topic(topic=topic, context=context)
+        return self.broker_handler.trigger_topic(topic=topic, context=context)
+
+    def publish_many(self, topics: Iterable[Tuple[str, Optional[Any]]]) -> Union[List[TriggerResult], Future]:
+        """
+        On demand data publish of many topics at once. The data are sent in one batch via the broker handler.
+
+        :param topics: an iterable of (topic_id, context) pairs
+        :return: the outcome of each topic in the same order as provided, see `PublisherBrokerHandler.trigger_topics`,
+                 or a future of them if the call is handed off to the thread of the container, e.g. when the app runs
+                 in the background
+        """
+        topics = list(topics)
+
+        invalid_topic_ids = [topic_id for topic_id, _ in topics if topic_id not in self.topics_dict]
+        if invalid_topic_ids:
+            raise PubSubClientError(f"Invalid topic ids: {', '.join(invalid_topic_ids)}")
+
+        return self.broker_handler.trigger_topics(
+            topics=[(self.topics_dict[topic_id], context) for topic_id, context in topics]
+        )
 
     def sync_sm_topics(self):
         """
@@ -106,7 +152,7 @@ class Publisher(PubSubClient):
         """
         sm_topics: List[SMTopic] = self.sm_service.get_topics()
         sm_topics_str: List[str] = [topic.name for topic in sm_topics]
-        local_topics_str: List[str] = [topic.name for topic in self.topics_dict.values()]
+        local_topics_str: List[str] = [subject for topic in self.topics_dict.values() for subject in topic.subjects]
 
         topics_str_to_create: Set[str] = set(local_topics_str) - set(sm_topics_str)
         topics_str_to_delete: Set[str] = set(sm_topics_str) - set(local_topics_str)
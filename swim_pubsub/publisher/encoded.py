@@ -0,0 +1,181 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pickle
+from typing import Optional, Dict, Any, Tuple
+
+import proton
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+DataSnapshot = Tuple[type, Any]
+
+
+def data_snapshot(data: Any) -> Optional[DataSnapshot]:
+    """
+    Captures the data in a form which, unlike the data themselves, tells apart values that are equal but encoded
+    differently, i.e. values of different types such as `1`, `1.0` and `True`, or mappings with the same items in a
+    different order. Strings and bytes are kept as they are whereas any other data are pickled, which is much cheaper
+    than encoding them with a codec and keeps them safe from later changes by the data handler as well.
+
+    :param data:
+    :return: None if the data cannot be pickled
+    """
+    if isinstance(data, (str, bytes)):
+        return type(data), data
+
+    try:
+        return type(data), pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+def is_same_data(data: Any, other: Any) -> bool:
+    """
+    Checks whether the data would be encoded the same way, see `data_snapshot`
+
+    :param data:
+    :param other:
+    :return:
+    """
+    snapshot = data_snapshot(data)
+
+    return snapshot is not None and snapshot == data_snapshot(other)
+
+
+class PreEncodedMessage:
+    __slots__ = ('subject', 'content_type', 'priority', 'encoded')
+
+    def __init__(self, subject: str, content_type: str, priority: int, encoded: bytes) -> None:
+        """
+        An AMQP message which has already been encoded. It carries the attributes the outbound buffers and the throttles
+        look at and it is sent via a `proton.Sender` in the same way as a `proton.Message`, but without encoding it.
+
+        :param subject:
+        :param content_type:
+        :param priority:
+        :param encoded: the AMQP encoded message
+        """
+        self.subject = subject
+        self.content_type = content_type
+        self.priority = priority
+        self.encoded = encoded
+
+    def __repr__(self):
+        return f"PreEncodedMessage(subject={self.subject!r}, size={len(self.encoded)})"
+
+    def encode(self) -> bytes:
+        return self.encoded
+
+    def send(self, sender: proton.Sender, tag: Optional[str] = None) -> proton.Delivery:
+        """
+        Same as `proton.Message.send` but it streams the already encoded message
+
+        :param sender:
+        :param tag:
+        :return:
+        """
+        delivery = sender.delivery(tag or sender.delivery_tag())
+        sender.stream(self.encoded)
+        sender.advance()
+        if sender.snd_settle_mode == proton.Link.SND_SETTLED:
+            delivery.settle()
+
+        return delivery
+
+
+class EncodedMessageCache:
+
+    def __init__(self) -> None:
+        """
+        Keeps the last encoded message per subject along with a snapshot of the data it was built from, so that
+        identical data can be sent again without encoding them with the codec of their topic and without building and
+        encoding a new `proton.Message`.
+        """
+        self._entries: Dict[str, Tuple[DataSnapshot, str, PreEncodedMessage]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        # the snapshot of the data of the last miss, to be kept by the `put` that follows it
+        self._last_missed: Optional[Tuple[Any, Optional[DataSnapshot]]] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, subject: str, data: Any, content_type: str) -> Optional[PreEncodedMessage]:
+        """
+        :param subject:
+        :param data:
+        :param content_type:
+        :return: a new pre-encoded message if the data are the same as the cached ones of the subject or None otherwise
+        """
+        entry = self._entries.get(subject)
+        snapshot = data_snapshot(data)
+
+        if entry is None or entry[1] != content_type or snapshot is None or snapshot != entry[0]:
+            self.misses += 1
+            self._last_missed = (data, snapshot)
+            return None
+
+        self.hits += 1
+        cached = entry[2]
+
+        return PreEncodedMessage(cached.subject, cached.content_type, cached.priority, cached.encoded)
+
+    def put(self, subject: str, data: Any, content_type: str, message: proton.Message) -> PreEncodedMessage:
+        """
+        Encodes the message built out of the data and keeps it as the cached one of the subject
+
+        :param subject:
+        :param data: the data the message was built from
+        :param content_type:
+        :param message:
+        :return: the pre-encoded message
+        """
+        pre_encoded = PreEncodedMessage(message.subject, message.content_type, message.priority, message.encode())
+
+        if self._last_missed is not None and self._last_missed[0] is data:
+            snapshot = self._last_missed[1]
+        else:
+            snapshot = data_snapshot(data)
+        self._last_missed = None
+
+        if snapshot is not None:
+            self._entries[subject] = (snapshot, content_type, pre_encoded)
+
+        return pre_encoded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subjects': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': sum(len(pre_encoded.encoded) for _, _, pre_encoded in self._entries.values())
+        }
@@ -28,36 +28,302 @@ http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import logging
-from typing import Union, Any, Optional, List
+import random
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Union, Any, Optional, List, Iterable, Tuple, Dict, Iterator, Deque, Callable
 
 import proton
+from proton.reactor import AtMostOnce
 
 from swim_pubsub.core.broker_handlers import BrokerHandler, Connector
+from swim_pubsub.core.codecs import CodecRegistry, Codec, CodecError, codecs
+from swim_pubsub.core.compression import Compressor, CompressionError, create_compressor, compress_message
+from swim_pubsub.core.delta import DeltaEncoder, DeltaError
 from swim_pubsub.core.errors import BrokerHandlerError
+from swim_pubsub.core.metrics import Histogram
+from swim_pubsub.core.scheduling import TimingWheel, stagger_phase
+from swim_pubsub.core.utils import run_in_container_thread, TimerTask, EventLoopThread
 from swim_pubsub.core.topics import TopicType
-from swim_pubsub.core.topics.topics import ScheduledTopic, TopicDataHandlerError
+from swim_pubsub.core.topics.topics import ScheduledTopic, TopicDataHandlerError, AT_LEAST_ONCE, AT_MOST_ONCE, \
+    DELIVERY_MODES, FanOutTopic, StreamingTopic, DELAY, RATE_LIMIT_POLICIES
 from swim_pubsub.core.topics.utils import truncate_message
+from swim_pubsub.publisher.buffers import OutboundBuffer, ConflatingBuffer, PriorityBuffer, FairBuffer, DROP_OLDEST, \
+    PRIORITY_SCHEDULINGS, BufferType
+from swim_pubsub.publisher.encoded import EncodedMessageCache, PreEncodedMessage
+from swim_pubsub.publisher.links import SenderLink
+from swim_pubsub.publisher.streams import TopicStream, END
+from swim_pubsub.publisher.throttling import Throttle
 
 __author__ = "EUROCONTROL (SWIM)"
 
 
 _logger = logging.getLogger(__name__)
 
+# outcomes of a message send
+SENT = 'sent'
+BUFFERED = 'buffered'
+DROPPED = 'dropped'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+TIMED_OUT = 'timed_out'
+UNCHANGED = 'unchanged'
+THROTTLED = 'throttled'
+
+# outcomes of a delivery as reported by the broker
+ACCEPTED = 'accepted'
+REJECTED = 'rejected'
+RELEASED = 'released'
+MODIFIED = 'modified'
+
+# the outcomes after which the data of a topic that skips unchanged data are considered as sent
+SENT_OUTCOMES = (SENT, BUFFERED, THROTTLED, ACCEPTED)
+
+# the outcome of a send or a future resolving to the outcome of the delivery in case of delivery tracking
+SendResult = Union[str, Future]
+
+# the outcome of a topic trigger, i.e. a mapping of subject -> outcome in case of a fan-out topic
+TriggerResult = Union[SendResult, Dict[str, SendResult]]
+
+# sender links strategy: one link per topic
+PER_TOPIC = 'per_topic'
+
+# the client of the topics that have not been assigned to any
+DEFAULT_CLIENT = 'default'
+
 
 class PublisherBrokerHandler(BrokerHandler):
 
-    def __init__(self, connector: Connector) -> None:
+    def __init__(self,
+                 connector: Connector,
+                 buffer_size: int = 1000,
+                 buffer_overflow_policy: str = DROP_OLDEST,
+                 sender_links: Union[int, str] = 1,
+                 track_deliveries: bool = False,
+                 delivery_mode: str = AT_LEAST_ONCE,
+                 data_handler_workers: int = 0,
+                 scheduler_tick_in_sec: Optional[float] = None,
+                 stagger_scheduled_topics: bool = True,
+                 stagger_jitter_in_sec: float = 0.,
+                 demand_driven: bool = False,
+                 rate_limit: Optional[float] = None,
+                 rate_burst: Optional[int] = None,
+                 rate_limit_policy: str = DELAY,
+                 conflate_buffered: bool = False,
+                 priority_scheduling: Optional[str] = None,
+                 fair_sharing: bool = False,
+                 codec_registry: Optional[CodecRegistry] = None,
+                 cache_encoded_messages: bool = False) -> None:
         """
-        An implementation of a broker client that is supposed to act as a publisher. It keeps a list of `TopicGroup`
-        instances and creates a single `proton.Sender` which assigns to each of them.
+        An implementation of a broker client that is supposed to act as a publisher. It keeps a list of topics and
+        sends their messages via one or more `SenderLink`, each one wrapping its own `proton.Sender` with its own credit
+        window and outbound buffer: the default link, the shards among which the topics are spread by hashing their
+        name (see `sender_links`), a link per topic in PER_TOPIC mode and a link per delivery mode of the topics that
+        override the default one.
+
+        Messages that cannot be sent due to lack of credit are kept in the `OutboundBuffer` of their link and they are
+        sent as soon as the broker grants new credit to its sender. In conflating mode only the latest buffered message
+        per subject is kept instead (see `ConflatingBuffer`). With priority scheduling the buffered messages are kept in
+        a lane per priority, which are drained in strict or weighted priority order as credit arrives (see
+        `PriorityBuffer`), so that the messages of urgent topics do not queue behind bulk ones.
+
+        Many clients (e.g. `Publisher` instances of the same app) can share the handler. With fair sharing the buffered
+        messages are kept in a lane per client, which are drained by weighted fair queueing as credit arrives (see
+        `FairBuffer`), so that a busy client cannot starve the rest.
+
+        The data of the topics with a codec are encoded once per message by the handler, which also sets the content
+        type of the message accordingly. The number, the size and the time of the encodings are kept per codec. Their
+        payloads can also be compressed, in which case the content encoding of the message is set. With the encoded
+        message cache the last encoded message of every subject is kept, so that when its data are the same as the
+        previous ones (e.g. a scheduled topic whose data have not changed) the cached bytes are sent again without
+        building and encoding a new message (see `EncodedMessageCache`).
+
+        The messages can also be spread over more than one senders (links) so that a busy topic does not consume the
+        credit of the rest. Every link has its own credit window and outbound buffer.
+
+        The sending methods can be called from any thread; calls from threads other than the one of the container are
+        handed off to it (see `BrokerHandler.submit`) and a `concurrent.futures.Future` of their result is returned.
+
+        If delivery tracking is enabled every send returns a `concurrent.futures.Future` which is resolved with the
+        outcome of the delivery (ACCEPTED, REJECTED, RELEASED, MODIFIED) as soon as the broker settles it, or with
+        DROPPED if the message is dropped from the outbound buffer. The accept latency of the deliveries is also
+        recorded.
+
+        Messages are delivered at-least-once by default. Topics with a different delivery mode than the handler's go
+        through their own link, e.g. a pre-settled one for AT_MOST_ONCE delivery, which spares the settlement round trip
+        and suits high rate topics where a lost message does not matter.
+
+        The data handlers of the topics are called in the thread of the container by default, which blocks any sending
+        or receiving while they run. If `data_handler_workers` is set they run in a pool of worker threads instead and
+        their data are passed back to the container thread for sending. In this case the `max_concurrency` and `timeout`
+        options of the topics apply.
+
+        Coroutine data handlers (`async def`) are always awaited in an asyncio event loop that runs in its own thread
+        next to the container, so that many I/O bound topics can fetch their data concurrently. The `max_concurrency`
+        and `timeout` options of the topics apply to them as well.
+
+        The data of topics in delta mode are sent as a full snapshot followed by diffs against the previous data (see
+        `DeltaEncoder`).
+
+        The data items of streaming topics are pulled one at a time as long as the link of the topic has credit and
+        there are no buffered messages, and the rest of them are pulled as soon as the broker grants new credit. The
+        streams of the same link take turns.
+
+        In demand driven mode the data of a topic are generated only if its link has credit to send them. Any trigger,
+        scheduled or on demand, without credit is skipped before its data handler is called instead of having its data
+        buffered or dropped, which spares the upstream calls whose data would be thrown away anyway.
+
+        The messages can be rate limited per topic and for the whole handler via token buckets (see `Throttle`). The
+        messages above the limit are delayed, conflated or dropped according to the policy, and the items of streaming
+        topics are pulled at the allowed rate.
 
         :param connector: takes care of the connection .i.e TSL, SASL etc
+        :param buffer_size: the max number of messages to be kept per link while there is no credit. 0 disables
+                            buffering.
+        :param buffer_overflow_policy: one of DROP_OLDEST, DROP_NEWEST
+        :param sender_links: the number of links among which the topics are hashed or PER_TOPIC for one link per topic
+        :param track_deliveries: whether to keep track of the outcome of the deliveries
+        :param delivery_mode: the default delivery mode of the topics, AT_LEAST_ONCE or AT_MOST_ONCE
+        :param data_handler_workers: the number of worker threads to run the data handlers. 0 runs them in the thread of
+                                     the container.
+        :param scheduler_tick_in_sec: if provided the scheduled topics are kept in a `TimingWheel` with ticks of this
+                                      duration instead of having a timer each. A single timer of the container advances
+                                      the wheel and the topics that are due in the same tick are sent in one batch,
+                                      which scales much better with thousands of scheduled topics. Their deadlines are
+                                      then rounded up to the tick.
+        :param stagger_scheduled_topics: whether to spread the first ticks of the scheduled topics with the same interval
+                                         over the interval, so that they do not fire all at the same time
+        :param stagger_jitter_in_sec: the max random delay to be added to the first tick of the scheduled topics
+        :param demand_driven: whether to skip the triggers of the topics whose link has no credit or buffered messages
+                              before their data handler is called
+        :param rate_limit: the max number of messages per second of the handler on average
+        :param rate_burst: the max number of messages that can be sent at once. Defaults to the rate limit.
+        :param rate_limit_policy: what happens to the messages above a rate limit, one of DELAY, CONFLATE, DROP. It
+                                  applies to the topics that do not define their own policy as well.
+        :param conflate_buffered: whether to keep only the latest buffered message per subject while there is no credit
+        :param priority_scheduling: STRICT or WEIGHTED in order to drain the buffered messages by their priority. If not
+                                    provided they are drained in FIFO order.
+        :param fair_sharing: whether to share the credit among the clients of the handler according to their weights
+        :param codec_registry: the registry to look up the codecs of the topics in. Defaults to the global one.
+        :param cache_encoded_messages: whether to reuse the last encoded message of a subject for identical data. It
+                                       does not apply to the topics in delta mode and the streaming topics.
         """
         BrokerHandler.__init__(self, connector)
 
+        if sender_links != PER_TOPIC and (not isinstance(sender_links, int) or sender_links < 1):
+            raise ValueError(f"sender_links should be a positive integer or '{PER_TOPIC}', got {sender_links}")
+
+        if delivery_mode not in DELIVERY_MODES:
+            raise ValueError(f"Invalid delivery mode: {delivery_mode}")
+
+        if rate_limit_policy not in RATE_LIMIT_POLICIES:
+            raise ValueError(f"Invalid rate limit policy: {rate_limit_policy}")
+
+        if priority_scheduling is not None and priority_scheduling not in PRIORITY_SCHEDULINGS:
+            raise ValueError(f"Invalid priority scheduling: {priority_scheduling}")
+
         self.endpoint: str = '/exchange/amq.topic'
-        self._sender: Optional[proton.Sender] = None
         self.topics: List[TopicType] = []
+        self.buffer_size = buffer_size
+        self.buffer_overflow_policy = buffer_overflow_policy
+        self.conflate_buffered = conflate_buffered
+        self.priority_scheduling = priority_scheduling
+        self.fair_sharing = fair_sharing
+        self.sender_links = sender_links
+        self.track_deliveries = track_deliveries
+        self.delivery_mode = delivery_mode
+        self.demand_driven = demand_driven
+
+        # the number of triggers per topic name that were skipped for lack of credit in demand driven mode
+        self.no_credit_skips: Dict[str, int] = {}
+
+        # data handlers offloading
+        self.data_handler_workers = data_handler_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if data_handler_workers:
+            self._executor = self._create_executor()
+        self._running_data_handlers: Dict[str, int] = {}
+        self._event_loop: Optional[EventLoopThread] = None
+
+        # whether the connection is closed, in which case no more data handlers are offloaded
+        self._closed = False
+
+        # scheduling
+        self.scheduler_tick_in_sec = scheduler_tick_in_sec
+        self._timing_wheel: Optional[TimingWheel] = None
+        self.stagger_scheduled_topics = stagger_scheduled_topics
+        self.stagger_jitter_in_sec = stagger_jitter_in_sec
+        self._staggered_topics_per_interval: Dict[float, int] = {}
+
+        # delivery tracking
+        self._pending_futures: Dict[proton.Message, Future] = {}
+        self._in_flight: Dict[proton.Delivery, Tuple[float, Optional[Future]]] = {}
+        self.delivery_outcomes: Dict[str, int] = {ACCEPTED: 0, REJECTED: 0, RELEASED: 0, MODIFIED: 0}
+        self.accept_latency = Histogram()
+
+        # delta encoding per topic name
+        self._delta_encoders: Dict[str, DeltaEncoder] = {}
+
+        # streaming topics
+        self._streams: Dict[SenderLink, Deque[TopicStream]] = {}
+        self._streams_by_topic: Dict[str, TopicStream] = {}
+
+        # rate limiting of the whole handler and per subject
+        self.rate_limit_policy = rate_limit_policy
+        self._throttle: Optional[Throttle] = None
+        if rate_limit is not None:
+            self._throttle = Throttle('publisher', rate_limit, rate_burst, rate_limit_policy, max_pending=buffer_size)
+        self._topic_throttles: Dict[str, Throttle] = {}
+        self._throttle_release_scheduled = False
+
+        # AMQP priorities per subject
+        self._topic_priorities: Dict[str, int] = {}
+
+        # codecs per subject
+        self.codec_registry: CodecRegistry = codec_registry or codecs
+        self._topic_codecs: Dict[str, Codec] = {}
+
+        # compressors per subject
+        self._topic_compressors: Dict[str, Compressor] = {}
+
+        # the last encoded message per subject
+        self._encoded_cache: Optional[EncodedMessageCache] = EncodedMessageCache() if cache_encoded_messages else None
+
+        # clients per subject along with their weights and the number of messages they sent since they were added
+        self._topic_clients: Dict[str, str] = {}
+        self._client_weights: Dict[str, float] = {}
+        self._client_sent: Dict[str, int] = {}
+        self._client_added_at: Dict[str, float] = {}
+
+        self._links: Dict[str, SenderLink] = {}
+        self._topic_delivery_modes: Dict[str, str] = {}
+        self._links_by_sender: Dict[proton.Sender, SenderLink] = {}
+        self._default_link: SenderLink = self._add_link('default')
+
+        # the default link serves as the first shard
+        self._shards: List[SenderLink] = [self._default_link]
+        if sender_links != PER_TOPIC:
+            self._shards += [self._add_link(f'shard-{i}') for i in range(1, sender_links)]
+
+    @property
+    def _sender(self) -> Optional[proton.Sender]:
+        """
+        The sender of the default link
+        """
+        return self._default_link.sender
+
+    @_sender.setter
+    def _sender(self, sender: proton.Sender):
+        self._open_link(self._default_link, sender)
+
+    @property
+    def outbound_buffer(self) -> OutboundBuffer:
+        """
+        The buffer of the default link
+        """
+        return self._default_link.buffer
 
     def on_start(self, event: proton.Event) -> None:
         """
@@ -69,18 +335,95 @@ class PublisherBrokerHandler(BrokerHandler):
         # call the parent event handler first to take care of the connection with the broker
         super().on_start(event)
 
+        if self._closed:
+            # the worker pool was shut down along with the previous connection
+            if self._executor is not None:
+                self._executor = self._create_executor()
+            self._closed = False
+
         try:
-            self._sender = self._create_sender(self.endpoint)
-            _logger.debug(f"Created sender {self._sender}")
+            for link in list(self._links.values()):
+                self._open_link(link, self._create_link_sender(link))
+                _logger.debug(f"Created sender {link.sender} for link {link.name}")
         except BrokerHandlerError as e:
             _logger.error(f'Error while creating sender: {str(e)}')
             return
 
+        if self.scheduler_tick_in_sec is not None:
+            self._timing_wheel = TimingWheel(self.scheduler_tick_in_sec)
+            self.container.schedule(self.scheduler_tick_in_sec, TimerTask(self._on_scheduler_tick))
+
         for topic in self.topics:
             if isinstance(topic, ScheduledTopic):
                 self._init_scheduled_topic(topic)
 
-    def send_message(self, message: Any, subject: str, content_type='application/json') -> None:
+        # messages that were throttled before the container started
+        if any(len(throttle) for throttle in self._all_throttles()):
+            self._schedule_throttle_release()
+
+    def _create_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.data_handler_workers, thread_name_prefix='data-handler')
+
+    def _add_link(self, name: str, delivery_mode: Optional[str] = None) -> SenderLink:
+        if self.fair_sharing:
+            buffer = FairBuffer(self._create_buffer, client_of=self._client_of, weight_of=self._weight_of)
+        else:
+            buffer = self._create_buffer()
+
+        link = SenderLink(name, buffer=buffer, delivery_mode=delivery_mode or self.delivery_mode)
+
+        self._links[name] = link
+
+        return link
+
+    def _create_buffer(self) -> BufferType:
+        buffer_class = ConflatingBuffer if self.conflate_buffered else OutboundBuffer
+
+        if self.priority_scheduling is not None:
+            return PriorityBuffer(max_size=self.buffer_size,
+                                  overflow_policy=self.buffer_overflow_policy,
+                                  scheduling=self.priority_scheduling,
+                                  lane_class=buffer_class)
+
+        return buffer_class(max_size=self.buffer_size, overflow_policy=self.buffer_overflow_policy)
+
+    def _create_link_sender(self, link: SenderLink) -> proton.Sender:
+        if link.delivery_mode == AT_MOST_ONCE:
+            return self._create_sender(self.endpoint, options=AtMostOnce())
+
+        return self._create_sender(self.endpoint)
+
+    def _open_link(self, link: SenderLink, sender: proton.Sender) -> None:
+        link.open(sender)
+        self._links_by_sender[sender] = link
+
+    def _get_link(self, subject: str) -> SenderLink:
+        """
+        Finds the link that the messages of the given subject should be sent through.
+
+        :param subject:
+        :return:
+        """
+        if self.sender_links == PER_TOPIC:
+            return self._links.get(f'topic:{subject}', self._default_link)
+
+        delivery_mode = self._topic_delivery_modes.get(subject, self.delivery_mode)
+        if delivery_mode != self.delivery_mode:
+            return self._links.get(delivery_mode, self._default_link)
+
+        if len(self._shards) == 1:
+            return self._default_link
+
+        return self._shards[zlib.crc32(subject.encode('utf-8')) % len(self._shards)]
+
+    def link_stats(self) -> List[Dict[str, Any]]:
+        """
+        The credit, throughput and buffer stats of every link
+        """
+        return [link.stats() for link in self._links.values()]
+
+    @run_in_container_thread
+    def send_message(self, message: Any, subject: str, content_type='application/json') -> SendResult:
         """
         Sends the provided message via the broker. The subject will serve as a routing key in the broker. Typically it
         should be the respective topic_id.
@@ -88,45 +431,564 @@ class PublisherBrokerHandler(BrokerHandler):
         :param message:
         :param subject:
         :param content_type:
+        :return: the outcome of the send, one of SENT, BUFFERED, DROPPED, THROTTLED, FAILED (if the data cannot be
+                 encoded) or a future of the delivery outcome in case of delivery tracking
+        """
+        try:
+            message = self._build_message(message, subject, content_type)
+        except (CodecError, CompressionError, DeltaError) as e:
+            _logger.error(f"Error while encoding message of topic {subject}: {str(e)}")
+            return self._completed_future(FAILED) if self.track_deliveries else FAILED
+
+        future = self._track(message)
+
+        outcome = self._throttle_message(message) or self._send_or_buffer(self._get_link(subject), message)
+
+        return future or outcome
+
+    def _send_or_buffer(self, link: SenderLink, message: proton.Message) -> str:
+        """
+        Sends the message if the link has credit or keeps it in the outbound buffer otherwise
+
+        :param link:
+        :param message:
+        :return: SENT, BUFFERED or DROPPED
+        """
+        if not link.credit:
+            _logger.info(truncate_message(message=f"No credit to send message {message}", max_length=100))
+            return self._buffer_message(link, message)
+
+        if len(link.buffer) > 0:
+            # preserve the order of the messages which are already waiting in the buffer
+            outcome = self._buffer_message(link, message)
+            self._drain_link(link)
+
+            # the message was the last one in the buffer so it has been sent if the buffer was fully drained
+            return SENT if outcome == BUFFERED and len(link.buffer) == 0 else outcome
+
+        self._send(link, message)
+
+        return SENT
+
+    @run_in_container_thread
+    def send_batch(self, messages: Iterable[Tuple[Any, str]], content_type='application/json') -> List[SendResult]:
+        """
+        Sends the provided messages via the broker. The credit of the sender is checked once for the whole batch and
+        the messages which do not fit in it are buffered. The messages are logged once per batch instead of once per
+        message.
+
+        :param messages: an iterable of (message, subject) pairs
+        :param content_type:
+        :return: the outcome of each message in the same order as provided, one of SENT, BUFFERED, DROPPED, THROTTLED,
+                 FAILED or a future of the delivery outcome in case of delivery tracking
+        """
+        prepared_messages = []
+        for message, subject in messages:
+            try:
+                prepared_message = self._build_message(message, subject, content_type)
+            except (CodecError, CompressionError, DeltaError) as e:
+                _logger.error(f"Error while encoding message of topic {subject}: {str(e)}")
+                prepared_message = None
+
+            prepared_messages.append((self._get_link(subject), prepared_message))
+        messages = prepared_messages
+
+        futures = [self._track(message) if message is not None else self._completed_future(FAILED)
+                   for _, message in messages]
+
+        credits: Dict[SenderLink, int] = {}
+
+        outcomes = []
+        for link, message in messages:
+            if message is None:
+                outcomes.append(FAILED)
+                continue
+
+            throttled_outcome = self._throttle_message(message)
+            if throttled_outcome is not None:
+                outcomes.append(throttled_outcome)
+                continue
+
+            if link not in credits:
+                # older messages go first
+                self._drain_link(link)
+                credits[link] = link.credit if len(link.buffer) == 0 else 0
+
+            if credits[link] > 0:
+                self._transfer(link, message)
+                credits[link] -= 1
+                outcomes.append(SENT)
+            else:
+                outcomes.append(self._buffer_message(link, message))
+
+        summary = f"Batch of {len(messages)} message(s): {outcomes.count(SENT)} sent, " \
+                  f"{outcomes.count(BUFFERED)} buffered, {outcomes.count(DROPPED)} dropped"
+        if THROTTLED in outcomes:
+            summary += f", {outcomes.count(THROTTLED)} throttled"
+        if FAILED in outcomes:
+            summary += f", {outcomes.count(FAILED)} failed"
+        _logger.info(summary)
+
+        return futures if self.track_deliveries else outcomes
+
+    def _build_message(self,
+                       message: Any,
+                       subject: str,
+                       content_type: str,
+                       reuse_encoded: bool = True) -> Union[proton.Message, PreEncodedMessage]:
+        """
+        Encodes, delta encodes and compresses the message in this order, depending on the settings of its topic. The
+        cached encoded message of the subject is used instead if its data are the same.
+
+        :raises: CodecError, CompressionError, DeltaError
         """
+        if not reuse_encoded or not self._caches_encoded(message, subject):
+            return self._compress(self._encode_delta(self._prepare_message(message, subject, content_type)))
+
+        # the data are encoded with the codec of their topic only if they changed
+        pre_encoded = self._encoded_cache.get(subject, message, content_type)
+
+        if pre_encoded is None:
+            built_message = self._compress(self._prepare_message(message, subject, content_type))
+            pre_encoded = self._encoded_cache.put(subject, message, content_type, built_message)
+
+        return pre_encoded
+
+    def _caches_encoded(self, message: Any, subject: str) -> bool:
+        # delta encoded messages differ every time even for the same data
+        return self._encoded_cache is not None \
+            and subject not in self._delta_encoders \
+            and not isinstance(message, proton.Message)
+
+    def _prepare_message(self, message: Any, subject: str, content_type: str) -> proton.Message:
+        """
+        :raises: CodecError
+        """
+        return self._wrap_payload(*self._encode_payload(message, subject, content_type), subject)
+
+    def _encode_payload(self, message: Any, subject: str, content_type: str) -> Tuple[Any, str]:
+        """
+        Encodes the message with the codec of its topic, if any
+
+        :return: the encoded message along with its content type
+        :raises: CodecError
+        """
+        codec = self._topic_codecs.get(subject)
+        if codec is not None:
+            # the delta encoder keeps the data of topics in delta mode in the form of their JSON string
+            if isinstance(message, proton.Message):
+                message.body = codec.encode(message.body)
+            else:
+                message = codec.encode(message)
+            content_type = codec.content_type
+
+        return message, content_type
+
+    def _wrap_payload(self, message: Any, content_type: str, subject: str) -> proton.Message:
         if not isinstance(message, proton.Message):
             message = proton.Message(body=message)
 
         message.subject = subject
         message.content_type = content_type
 
-        if self._sender and self._sender.credit:
-            self._sender.send(message)
-            _logger.info(truncate_message(message=f"Message sent: {message}", max_length=100))
+        priority = self._topic_priorities.get(subject)
+        if priority is not None:
+            message.priority = priority
+
+        return message
+
+    def _encode_delta(self, message: proton.Message) -> proton.Message:
+        encoder = self._delta_encoders.get(message.subject)
+
+        return encoder.encode(message) if encoder is not None else message
+
+    def _compress(self, message: proton.Message) -> proton.Message:
+        compressor = self._topic_compressors.get(message.subject)
+
+        return compress_message(message, compressor) if compressor is not None else message
+
+    def delta_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        The sequence number and the number of snapshots and diffs of the topics in delta mode
+        """
+        return {name: encoder.stats() for name, encoder in self._delta_encoders.items()}
+
+    def on_sendable(self, event: proton.Event) -> None:
+        """
+        Is triggered every time the broker grants credit to a sender. Any buffered messages of the respective link are
+        sent at this point followed by the pending items of its streams.
+
+        :param event:
+        """
+        link = self._links_by_sender.get(event.sender)
+
+        if link is not None:
+            self._drain_link(link)
+            self._pump_streams(link)
+
+    def _send(self, link: SenderLink, message: proton.Message) -> None:
+        self._transfer(link, message)
+        _logger.info(truncate_message(message=f"Message sent: {message}", max_length=100))
+
+    def _transfer(self, link: SenderLink, message: proton.Message) -> None:
+        """
+        Sends the message through the link and keeps track of its delivery if needed
+        :param link:
+        :param message:
+        """
+        delivery = link.send(message)
+
+        if self.fair_sharing:
+            client = self._client_of(message)
+            self._client_sent[client] = self._client_sent.get(client, 0) + 1
+            self._client_added_at.setdefault(client, time.monotonic())
+
+        if not self.track_deliveries:
+            return
+
+        future = self._pending_futures.pop(message, None)
+
+        if link.delivery_mode == AT_MOST_ONCE:
+            # pre-settled deliveries get no outcome from the broker
+            if future is not None:
+                future.set_result(SENT)
         else:
-            _logger.info(truncate_message(message=f"No credit to send message {message}", max_length=100))
+            self._in_flight[delivery] = (time.monotonic(), future)
+
+    def _track(self, message: proton.Message) -> Optional[Future]:
+        """
+        Creates a future for the delivery outcome of the message in case of delivery tracking
+        :param message:
+        :return:
+        """
+        if not self.track_deliveries:
+            return None
+
+        future = Future()
+        self._pending_futures[message] = future
+
+        return future
+
+    @staticmethod
+    def _completed_future(result: str) -> Future:
+        future = Future()
+        future.set_result(result)
+
+        return future
+
+    def on_accepted(self, event: proton.Event) -> None:
+        self._settle_delivery(event.delivery, ACCEPTED)
+
+    def on_rejected(self, event: proton.Event) -> None:
+        self._settle_delivery(event.delivery, REJECTED)
+
+    def on_released(self, event: proton.Event) -> None:
+        # it is triggered for both the RELEASED and the MODIFIED states
+        outcome = MODIFIED if event.delivery.remote_state == proton.Delivery.MODIFIED else RELEASED
+
+        self._settle_delivery(event.delivery, outcome)
+
+    def _settle_delivery(self, delivery: proton.Delivery, outcome: str) -> None:
+        """
+        Records the outcome of a tracked delivery and resolves its future if any.
+        :param delivery:
+        :param outcome:
+        """
+        try:
+            sent_at, future = self._in_flight.pop(delivery)
+        except KeyError:
+            return
+
+        self.delivery_outcomes[outcome] += 1
+
+        if outcome == ACCEPTED:
+            self.accept_latency.observe(time.monotonic() - sent_at)
+
+        if future is not None:
+            future.set_result(outcome)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of tracked deliveries that have not been settled by the broker yet
+        """
+        return len(self._in_flight)
+
+    def delivery_stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'outcomes': dict(self.delivery_outcomes),
+            'accept_latency': self.accept_latency.stats()
+        }
+
+    def _buffer_message(self, link: SenderLink, message: proton.Message) -> str:
+        """
+        Keeps the message in the outbound buffer of the link until credit is available
+        :param link:
+        :param message:
+        :return: BUFFERED or DROPPED in case the message itself was dropped because the buffer was full. The futures of
+                 the messages that are dropped or conflated in the process are resolved with DROPPED.
+        """
+        dropped = link.buffer.put(message)
+
+        if dropped is not None:
+            # a conflating buffer replaces the buffered message of the same subject
+            conflated = self.conflate_buffered and dropped is not message and dropped.subject == message.subject
+
+            if conflated:
+                _logger.debug(truncate_message(message=f"Conflated buffered message {dropped}", max_length=100))
+            else:
+                _logger.warning(truncate_message(message=f"Outbound buffer is full, dropped message {dropped}",
+                                                 max_length=100))
+
+            future = self._pending_futures.pop(dropped, None)
+            if future is not None:
+                future.set_result(DROPPED)
 
+        return DROPPED if dropped is message else BUFFERED
+
+    def _drain_link(self, link: SenderLink) -> None:
+        """
+        Sends as many buffered messages of the link as its credit allows
+        """
+        drained = 0
+        while len(link.buffer) > 0 and link.credit:
+            self._send(link, link.buffer.get())
+            drained += 1
+
+        if drained:
+            _logger.debug(f"Drained {drained} message(s) from the outbound buffer of link {link.name}, "
+                          f"{len(link.buffer)} still pending")
+
+    @run_in_container_thread
     def add_topic(self, topic: TopicType):
         """
         Adds the provided topic in the list. If is is scheduled topic it will be initialized and scheduled
         :param topic:
+        :raises: CodecError if the codec of the topic is not registered
         """
+        codec = self.codec_registry.get(topic.codec) if topic.codec is not None else None
+
+        throttle = None
+        if topic.rate_limit is not None:
+            throttle = Throttle(topic.name, topic.rate_limit, topic.rate_burst,
+                                topic.rate_limit_policy or self.rate_limit_policy, max_pending=self.buffer_size)
+
+        for subject in topic.subjects:
+            if throttle is not None:
+                self._topic_throttles[subject] = throttle
+
+            if topic.priority is not None:
+                self._topic_priorities[subject] = topic.priority
+
+            if codec is not None:
+                self._topic_codecs[subject] = codec
+
+            if topic.compression is not None and subject not in self._topic_compressors:
+                self._topic_compressors[subject] = create_compressor(topic.compression, topic.compression_threshold)
+
+            if topic.delivery_mode not in (None, self.delivery_mode):
+                self._topic_delivery_modes[subject] = topic.delivery_mode
+
+            if self.sender_links == PER_TOPIC:
+                if f'topic:{subject}' not in self._links:
+                    self._add_extra_link(f'topic:{subject}', topic.delivery_mode)
+            elif subject in self._topic_delivery_modes and topic.delivery_mode not in self._links:
+                self._add_extra_link(topic.delivery_mode, topic.delivery_mode)
+
+            if topic.delta and subject not in self._delta_encoders:
+                self._delta_encoders[subject] = DeltaEncoder(topic.snapshot_interval)
+
         if isinstance(topic, ScheduledTopic) and self.started:
             self._init_scheduled_topic(topic)
 
         self.topics.append(topic)
 
-    def trigger_topic(self, topic: TopicType, context: Optional[Any] = None):
+    def _add_extra_link(self, name: str, delivery_mode: Optional[str]) -> None:
+        """
+        Creates a link for a topic or a delivery mode. If the link cannot be opened the respective messages will go
+        through the default link.
+
+        :param name:
+        :param delivery_mode:
         """
-        Generates the topic data via its data handler and sends them via the broker
+        link = self._add_link(name, delivery_mode)
+
+        if self.started:
+            try:
+                self._open_link(link, self._create_link_sender(link))
+            except BrokerHandlerError as e:
+                _logger.error(f"Error while creating sender for link {name}: {str(e)}")
+                del self._links[link.name]
+
+    @run_in_container_thread
+    def trigger_topic(self, topic: TopicType, context: Optional[Any] = None) -> TriggerResult:
+        """
+        Generates the topic data via its data handler and sends them via the broker. The data of a scheduled topic that
+        skips unchanged data are not sent if their body is the same as the last sent one.
 
         :param topic:
         :param context:
+        :return: the outcome of the send, one of SENT, BUFFERED, DROPPED, FAILED, UNCHANGED or a future of the delivery
+                 outcome in case of delivery tracking. If the data handlers run in a worker pool it is always a future
+                 which can also resolve to SKIPPED or TIMED_OUT, and so is in case of a coroutine data handler. The
+                 data of a fan-out topic are sent in one batch and the outcome is a mapping of subject -> outcome.
+                 The items of a streaming topic are sent as credit permits and the outcome is a future which is
+                 resolved once all of them are sent. In demand driven mode it is SKIPPED if there is no credit.
         """
+        if self._offloads_data_handler(topic):
+            return self._trigger_topic_offloaded(topic, context)
+
+        if self._lacks_credit(topic):
+            return self._completed_future(SKIPPED) if self.track_deliveries else SKIPPED
 
         try:
             data = topic.get_data(context=context)
         except TopicDataHandlerError as e:
             _logger.error(f"Error while getting data of topic {topic.name}: {str(e)}")
-            return
+            return self._completed_future(FAILED) if self.track_deliveries else FAILED
+
+        if self._is_unchanged(topic, data):
+            return self._completed_future(UNCHANGED) if self.track_deliveries else UNCHANGED
+
+        result = self._send_topic_data(topic, data)
+        self._mark_sent(topic, data, result)
+
+        return result
+
+    def _send_topic_data(self, topic: TopicType, data: Any) -> TriggerResult:
+        if isinstance(topic, StreamingTopic):
+            return self._start_stream(topic, data)
+
+        if isinstance(topic, FanOutTopic):
+            messages = topic.split_data(data)
+            _logger.info(f"Sending {len(messages)} message(s) for fan-out topic {topic.name}")
+
+            sent_outcomes = self.send_batch(messages) if messages else []
+            return {subject: outcome for (_, subject), outcome in zip(messages, sent_outcomes)}
 
         _logger.info(f"Sending message for topic {topic.name}")
-        self.send_message(message=data, subject=topic.name)
+        return self.send_message(message=data, subject=topic.name)
+
+    @run_in_container_thread
+    def trigger_topics(self, topics: Iterable[Tuple[TopicType, Optional[Any]]]) -> List[TriggerResult]:
+        """
+        Generates the data of the provided topics via their data handlers and sends them via the broker in one batch
+
+        :param topics: an iterable of (topic, context) pairs
+        :return: the outcome of each topic in the same order as provided, one of SENT, BUFFERED, DROPPED, FAILED,
+                 UNCHANGED or a future of the delivery outcome in case of delivery tracking or in case the data handler
+                 runs off the container thread. The outcome of a fan-out topic is a mapping of subject -> outcome and
+                 the one of a streaming topic is a future which is resolved once all its items are sent.
+        """
+        outcomes = []
+        messages = []
+        sent_data = []
+        stream_links = set()
+        for topic, context in topics:
+            if self._offloads_data_handler(topic):
+                outcomes.append(self._trigger_topic_offloaded(topic, context))
+                continue
+
+            if self._lacks_credit(topic):
+                outcomes.append(self._completed_future(SKIPPED) if self.track_deliveries else SKIPPED)
+                continue
+
+            try:
+                data = topic.get_data(context=context)
+            except TopicDataHandlerError as e:
+                _logger.error(f"Error while getting data of topic {topic.name}: {str(e)}")
+                outcomes.append(self._completed_future(FAILED) if self.track_deliveries else FAILED)
+                continue
+
+            if self._is_unchanged(topic, data):
+                outcomes.append(self._completed_future(UNCHANGED) if self.track_deliveries else UNCHANGED)
+                continue
+
+            if isinstance(topic, StreamingTopic):
+                # the streams are pumped after the batch is sent
+                outcomes.append(self._start_stream(topic, data, pump=False))
+                stream_links.add(self._get_link(topic.name))
+                continue
+
+            # keep track of the messages of the topic in the batch
+            sent_data.append((len(outcomes), topic, data))
+            topic_messages = topic.split_data(data) if isinstance(topic, FanOutTopic) else [(data, topic.name)]
+            outcomes.append((topic, slice(len(messages), len(messages) + len(topic_messages))))
+            messages += topic_messages
+
+        sent_outcomes = self.send_batch(messages) if messages else []
+
+        for link in stream_links:
+            self._pump_streams(link)
+
+        results = [self._batched_topic_outcome(*outcome, messages, sent_outcomes)
+                   if isinstance(outcome, tuple) else outcome
+                   for outcome in outcomes]
+
+        for index, topic, data in sent_data:
+            self._mark_sent(topic, data, results[index])
+
+        return results
+
+    @staticmethod
+    def _batched_topic_outcome(topic: TopicType,
+                               topic_slice: slice,
+                               messages: List[Tuple[Any, str]],
+                               sent_outcomes: List[SendResult]) -> TriggerResult:
+        if isinstance(topic, FanOutTopic):
+            return {subject: outcome
+                    for (_, subject), outcome in zip(messages[topic_slice], sent_outcomes[topic_slice])}
+
+        return sent_outcomes[topic_slice][0]
+
+    def on_connection_closed(self, event: proton.Event) -> None:
+        """
+        Stops the pending streams, the event loop of the coroutine data handlers and the worker pool of the data
+        handlers as well. The tracked messages that are still in flight, buffered or throttled will get no delivery
+        outcome, so their futures are resolved with DROPPED, and the data handlers that are triggered from then on are
+        skipped.
+
+        :param event:
+        """
+        super().on_connection_closed(event)
+
+        for stream in list(self._streams_by_topic.values()):
+            _logger.warning(f"Dropped the pending data of streaming topic {stream.subject}")
+            stream.close(DROPPED)
+        self._streams.clear()
+        self._streams_by_topic.clear()
+
+        self._drop_tracked_messages()
+
+        if self._event_loop is not None:
+            self._event_loop.stop()
+            self._event_loop = None
+
+        if self._executor is not None:
+            # the running data handlers are not waited for, their data will not be sent anyway
+            self._executor.shutdown(wait=False)
+
+        # the timers of the scheduled topics may still fire
+        self._closed = True
+
+    def _drop_tracked_messages(self) -> None:
+        """
+        Resolves with DROPPED the futures of the tracked messages that were sent but not settled yet, as well as of the
+        ones that are held in the outbound buffers of the links or in the throttles.
+        """
+        futures = [future for _, future in self._in_flight.values() if future is not None]
+        futures += self._pending_futures.values()
+
+        if futures:
+            _logger.warning(f"Dropped {len(futures)} tracked message(s) with no delivery outcome")
+
+        for future in futures:
+            if not future.done():
+                future.set_result(DROPPED)
+
+        self._in_flight.clear()
+        self._pending_futures.clear()
 
     def _init_scheduled_topic(self, scheduled_topic: ScheduledTopic):
         """
@@ -136,5 +998,506 @@ class PublisherBrokerHandler(BrokerHandler):
         # assign the message_send_callback on the scheduled topic
         scheduled_topic.set_message_send_callback(self.send_message)
 
+        # fan-out and streaming topics are triggered by the handler as well in order to send their data in one batch or
+        # as credit permits respectively, and so are all topics in demand driven mode in order to check the credit first
+        # and the topics that skip unchanged data in order to consider their data as sent only once they are sent
+        if self._executor is not None or scheduled_topic.is_async or self.demand_driven or \
+                scheduled_topic.skip_unchanged or isinstance(scheduled_topic, (FanOutTopic, StreamingTopic)):
+            scheduled_topic.set_trigger_callback(self.trigger_topic)
+
         # and schedule it
-        self.container.schedule(scheduled_topic.interval_in_sec, scheduled_topic)
+        delay = self._first_tick_delay(scheduled_topic)
+        if self._timing_wheel is not None:
+            self._timing_wheel.schedule(scheduled_topic, scheduled_topic.start(delay))
+        else:
+            scheduled_topic.schedule(self.container, delay)
+
+    def _first_tick_delay(self, scheduled_topic: ScheduledTopic) -> float:
+        """
+        Staggers the first tick of the topic against the rest topics with the same interval
+
+        :param scheduled_topic:
+        :return: the delay in seconds of the first tick, within the first interval plus the jitter
+        """
+        interval = scheduled_topic.interval_in_sec
+
+        if not self.stagger_scheduled_topics:
+            return interval
+
+        index = self._staggered_topics_per_interval.get(interval, 0)
+        self._staggered_topics_per_interval[interval] = index + 1
+
+        delay = stagger_phase(index, interval) or interval
+
+        if self.stagger_jitter_in_sec:
+            delay += random.uniform(0, self.stagger_jitter_in_sec)
+
+        return delay
+
+    def _on_scheduler_tick(self) -> None:
+        """
+        Advances the timing wheel and sends the data of the scheduled topics that are due in one batch
+        """
+        due_topics = self._timing_wheel.advance()
+
+        if due_topics:
+            for topic in due_topics:
+                topic.record_tick()
+
+            self.trigger_topics([(topic, None) for topic in due_topics])
+
+            for topic in due_topics:
+                self._timing_wheel.schedule(topic, topic.next_delay())
+
+        # keep up with the ticks of the wheel rather than drifting from them
+        self.container.schedule(self._timing_wheel.next_tick_delay(), TimerTask(self._on_scheduler_tick))
+
+    def _start_stream(self, topic: StreamingTopic, items: Iterator[Any], pump: bool = True) -> Future:
+        """
+        Starts sending the data items of a streaming topic. A topic streams one trigger at a time so any trigger while
+        its previous items are still being sent is skipped.
+
+        :param topic:
+        :param items:
+        :param pump: whether to send the items that fit in the credit of the link straight away
+        :return: a future which is resolved with SENT once all the items have been sent, FAILED if pulling an item
+                 fails or DROPPED if the connection is closed in the meantime
+        """
+        if topic.name in self._streams_by_topic:
+            _logger.warning(f"Skipped topic {topic.name}: its previous data are still being streamed")
+            return self._completed_future(SKIPPED)
+
+        stream = TopicStream(topic.name, items)
+        self._streams_by_topic[topic.name] = stream
+
+        link = self._get_link(topic.name)
+        self._streams.setdefault(link, deque()).append(stream)
+
+        _logger.info(f"Streaming data of topic {topic.name}")
+        if pump:
+            self._pump_streams(link)
+
+        return stream.outcome
+
+    def _pump_streams(self, link: SenderLink) -> None:
+        """
+        Pulls and sends the items of the streams of the link, one per stream in turn, as long as the link has credit
+        and no buffered messages. A stream whose rate limit is exceeded gives its turn to the next one.
+
+        :param link:
+        """
+        streams = self._streams.get(link)
+        rate_limited = 0
+
+        while streams and len(link.buffer) == 0 and rate_limited < len(streams):
+            stream = streams[0]
+
+            try:
+                item = stream.next_item()
+            except Exception as e:
+                _logger.error(f"Error while streaming data of topic {stream.subject}: {str(e)}")
+                self._end_stream(streams, FAILED)
+                continue
+
+            if item is END:
+                _logger.info(f"Streamed {stream.sent} message(s) for topic {stream.subject}")
+                self._end_stream(streams, SENT)
+                continue
+
+            if not link.credit:
+                stream.put_back(item)
+                break
+
+            if not self._acquire_rate_tokens(stream.subject):
+                stream.put_back(item)
+                streams.rotate(-1)
+                rate_limited += 1
+                self._schedule_throttle_release()
+                continue
+
+            rate_limited = 0
+
+            try:
+                message = self._build_message(item, stream.subject, 'application/json', reuse_encoded=False)
+            except (CodecError, CompressionError, DeltaError) as e:
+                _logger.error(f"Error while encoding data of streaming topic {stream.subject}: {str(e)}")
+                self._end_stream(streams, FAILED)
+                continue
+
+            self._transfer(link, message)
+            stream.sent += 1
+            streams.rotate(-1)
+
+    def _end_stream(self, streams: Deque[TopicStream], outcome: str) -> None:
+        stream = streams.popleft()
+        del self._streams_by_topic[stream.subject]
+        stream.close(outcome)
+
+    def _throttles_of(self, subject: str) -> List[Throttle]:
+        return [throttle for throttle in (self._topic_throttles.get(subject), self._throttle) if throttle is not None]
+
+    def _all_throttles(self) -> List[Throttle]:
+        # a throttle is shared among the subjects of a fan-out topic
+        throttles = list({id(throttle): throttle for throttle in self._topic_throttles.values()}.values())
+
+        return throttles + [self._throttle] if self._throttle is not None else throttles
+
+    def _acquire_rate_tokens(self, subject: str) -> bool:
+        """
+        Takes a token from every throttle of the subject provided that all of them have one
+
+        :param subject:
+        :return: True if the tokens were acquired
+        """
+        throttles = self._throttles_of(subject)
+
+        if not all(throttle.has_token() for throttle in throttles):
+            return False
+
+        for throttle in throttles:
+            throttle.acquire()
+
+        return True
+
+    def _throttle_message(self, message: proton.Message) -> Optional[str]:
+        """
+        Checks the message against the rate limits of its subject. If a limit is exceeded, or messages are already held
+        by one of them, the message is handled according to the policy of the respective throttle.
+
+        :param message:
+        :return: None if the message can be sent, otherwise THROTTLED if it is held or DROPPED
+        """
+        throttles = self._throttles_of(message.subject)
+        if not throttles:
+            return None
+
+        blocking = next((throttle for throttle in throttles if len(throttle) > 0 or not throttle.has_token()), None)
+        if blocking is None:
+            for throttle in throttles:
+                throttle.acquire()
+            return None
+
+        dropped = blocking.hold(message)
+        if dropped is not None:
+            _logger.warning(truncate_message(message=f"Rate limit {blocking.name} exceeded, dropped message {dropped}",
+                                             max_length=100))
+
+            future = self._pending_futures.pop(dropped, None)
+            if future is not None:
+                future.set_result(DROPPED)
+
+        self._schedule_throttle_release()
+
+        return DROPPED if dropped is message else THROTTLED
+
+    def _schedule_throttle_release(self) -> None:
+        if self._throttle_release_scheduled or not self.started:
+            return
+
+        delay = self._throttle_release_delay()
+        if delay is None:
+            return
+
+        self.container.schedule(delay, TimerTask(self._release_throttled))
+        self._throttle_release_scheduled = True
+
+    def _throttle_release_delay(self) -> Optional[float]:
+        """
+        A held message or a rate limited stream can go on once every throttle of its subject has a token. Idle
+        throttles with tokens are not taken into account, otherwise the release would be re-armed with no delay while
+        the held messages still wait for tokens.
+
+        :return: the time in seconds until the first held message or rate limited stream can go on, if any
+        """
+        held_subjects = {throttle.peek().subject for throttle in self._all_throttles() if len(throttle) > 0}
+        stream_subjects = {stream.subject for streams in self._streams.values() for stream in streams}
+
+        waits = []
+        for subject in held_subjects | stream_subjects:
+            wait = max((throttle.wait_time() for throttle in self._throttles_of(subject)), default=0.)
+
+            # streams with tokens wait for credit instead
+            if subject in held_subjects or wait > 0:
+                waits.append(wait)
+
+        return min(waits, default=None)
+
+    def _release_throttled(self) -> None:
+        """
+        Sends the held messages in the order they were held, as long as their throttles have tokens, and resumes the
+        rate limited streams.
+        """
+        self._throttle_release_scheduled = False
+
+        throttles = self._all_throttles()
+        for throttle in throttles:
+            while len(throttle) > 0 and self._acquire_rate_tokens(throttle.peek().subject):
+                message = throttle.pop()
+                self._send_or_buffer(self._get_link(message.subject), message)
+
+        for link in list(self._streams):
+            self._pump_streams(link)
+
+        if any(len(throttle) for throttle in throttles):
+            self._schedule_throttle_release()
+
+    @run_in_container_thread
+    def add_client(self, client_id: str, weight: float = 1.) -> None:
+        """
+        Adds a client of the handler or updates its weight. The clients share the credit in proportion to their weights
+        in case of fair sharing.
+
+        :param client_id:
+        :param weight: a positive number
+        """
+        if weight <= 0:
+            raise ValueError(f"weight should be a positive number, got {weight}")
+
+        self._client_weights[client_id] = weight
+        self._client_added_at.setdefault(client_id, time.monotonic())
+
+    @run_in_container_thread
+    def assign_topic(self, topic: TopicType, client_id: str) -> None:
+        """
+        Assigns the subjects of the topic to the client, so that its messages share the credit of the client
+
+        :param topic:
+        :param client_id:
+        """
+        if client_id not in self._client_weights:
+            self.add_client(client_id)
+
+        for subject in topic.subjects:
+            self._topic_clients[subject] = client_id
+
+    def _client_of(self, message: proton.Message) -> str:
+        return self._topic_clients.get(message.subject, DEFAULT_CLIENT)
+
+    def _weight_of(self, client_id: str) -> float:
+        return self._client_weights.get(client_id, 1.)
+
+    def client_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The weight, the sent messages, the throughput and the backlog (buffered messages) of every client in case of
+        fair sharing
+        """
+        now = time.monotonic()
+
+        stats = {}
+        for client_id in set(self._client_weights) | set(self._client_sent):
+            elapsed = now - self._client_added_at.get(client_id, now)
+            sent = self._client_sent.get(client_id, 0)
+
+            stats[client_id] = {
+                'weight': self._weight_of(client_id),
+                'sent': sent,
+                'throughput': sent / elapsed if elapsed > 0 else 0.,
+                'backlog': sum(link.buffer.backlog(client_id) for link in self._links.values()
+                               if isinstance(link.buffer, FairBuffer))
+            }
+
+        return stats
+
+    def codec_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The number, the size and the time of the encodings and decodings per codec
+        """
+        return self.codec_registry.stats()
+
+    def compression_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The number of the compressed and skipped payloads, their compression ratio and the CPU time of the compressions
+        per subject
+        """
+        return {subject: compressor.stats() for subject, compressor in self._topic_compressors.items()}
+
+    def encoded_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        The hits and misses of the encoded message cache along with the number of subjects and the bytes it keeps
+        """
+        return self._encoded_cache.stats() if self._encoded_cache is not None else None
+
+    def throttle_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The state and counters of the rate limits of the handler and the topics
+        """
+        return {throttle.name: throttle.stats() for throttle in self._all_throttles()}
+
+    def stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The number of items sent so far by the pending streams of the streaming topics
+        """
+        return {name: stream.stats() for name, stream in self._streams_by_topic.items()}
+
+    def schedule_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The number of ticks, missed ticks and the lateness of the scheduled topics
+        """
+        return {topic.name: topic.schedule_stats() for topic in self.topics if isinstance(topic, ScheduledTopic)}
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The hits, misses, evictions and expirations of the data caches of the topics
+        """
+        return {topic.name: topic.cache.stats() for topic in self.topics if topic.cache is not None}
+
+    def _offloads_data_handler(self, topic: TopicType) -> bool:
+        # the results are passed back via the container so it has to be running
+        return (topic.is_async or self._executor is not None) and self.started
+
+    def _get_event_loop(self) -> EventLoopThread:
+        if self._event_loop is None:
+            self._event_loop = EventLoopThread(name='data-handler-loop')
+            self._event_loop.start()
+
+        return self._event_loop
+
+    def _trigger_topic_offloaded(self, topic: TopicType, context: Optional[Any] = None) -> Future:
+        """
+        Runs the data handler of the topic off the container thread, i.e. in the event loop in case of a coroutine or
+        in the worker pool otherwise. Its data are sent once they are passed back to the container thread.
+
+        :param topic:
+        :param context:
+        :return: a future of the outcome of the send
+        """
+        outcome = Future()
+
+        if self._closed:
+            _logger.warning(f"Skipped topic {topic.name}: the connection is closed")
+            outcome.set_result(SKIPPED)
+            return outcome
+
+        if self._lacks_credit(topic):
+            outcome.set_result(SKIPPED)
+            return outcome
+
+        running = self._running_data_handlers.get(topic.name, 0)
+        if topic.max_concurrency is not None and running >= topic.max_concurrency:
+            _logger.warning(f"Skipped topic {topic.name}: {running} data handler call(s) already running")
+            outcome.set_result(SKIPPED)
+            return outcome
+
+        self._running_data_handlers[topic.name] = running + 1
+
+        if topic.is_async:
+            data_future = self._get_event_loop().run_coroutine(topic.get_data_async(context=context))
+        else:
+            data_future = self._executor.submit(topic.get_data, context=context)
+        data_future.add_done_callback(lambda done: self.submit(self._on_topic_data, topic, done, outcome))
+
+        if topic.timeout is not None:
+            self.container.schedule(topic.timeout, TimerTask(self._on_topic_data_timeout, topic, outcome, data_future))
+
+        return outcome
+
+    def _on_topic_data(self, topic: TopicType, data_future: Future, outcome: Future) -> None:
+        """
+        Sends the data of the topic that came back from the worker pool or the event loop.
+
+        :param topic:
+        :param data_future:
+        :param outcome:
+        """
+        self._running_data_handlers[topic.name] -= 1
+
+        if outcome.done():
+            _logger.warning(f"Discarded late data of topic {topic.name}")
+            return
+
+        try:
+            data = data_future.result()
+        except TopicDataHandlerError as e:
+            _logger.error(f"Error while getting data of topic {topic.name}: {str(e)}")
+            outcome.set_result(FAILED)
+            return
+        except Exception as e:
+            outcome.set_exception(e)
+            return
+
+        if self._is_unchanged(topic, data):
+            outcome.set_result(UNCHANGED)
+            return
+
+        result = self._send_topic_data(topic, data)
+        self._mark_sent(topic, data, result)
+
+        if isinstance(result, Future):
+            result.add_done_callback(lambda done: outcome.set_result(done.result()))
+        else:
+            outcome.set_result(result)
+
+    def _lacks_credit(self, topic: TopicType) -> bool:
+        """
+        In demand driven mode checks whether the data of the topic could be sent straight away, i.e. whether any link of
+        its subjects has credit and no buffered messages.
+
+        :param topic:
+        :return: True if the trigger of the topic should be skipped
+        """
+        if not self.demand_driven:
+            return False
+
+        links = {self._get_link(subject) for subject in topic.subjects}
+        if any(link.credit and len(link.buffer) == 0 for link in links):
+            return False
+
+        _logger.debug(f"Skipped topic {topic.name}: no credit to send its data")
+        self.no_credit_skips[topic.name] = self.no_credit_skips.get(topic.name, 0) + 1
+
+        return True
+
+    def _is_unchanged(self, topic: TopicType, data: Any) -> bool:
+        if isinstance(topic, ScheduledTopic) and topic.is_unchanged(data, encode=self._body_encoder(topic)):
+            _logger.debug(f"Skipped unchanged data of topic {topic.name}")
+            return True
+
+        return False
+
+    def _mark_sent(self, topic: TopicType, data: Any, result: TriggerResult) -> None:
+        """
+        Lets a topic that skips unchanged data consider them as sent, provided that none of their messages failed or got
+        dropped, so that data which never reached the broker are sent again. In case of delivery tracking this happens
+        once all of them are delivered.
+
+        :param topic:
+        :param data:
+        :param result: the outcome of sending the data
+        """
+        if not isinstance(topic, ScheduledTopic) or not topic.skip_unchanged:
+            return
+
+        outcomes = list(result.values()) if isinstance(result, dict) else [result]
+        futures = [outcome for outcome in outcomes if isinstance(outcome, Future)]
+
+        if futures:
+            def on_done(_):
+                if all(future.done() for future in futures):
+                    self._mark_sent(topic, data, {i: future.result() for i, future in enumerate(futures)})
+
+            for future in futures:
+                future.add_done_callback(on_done)
+            return
+
+        if all(outcome in SENT_OUTCOMES for outcome in outcomes):
+            topic.mark_sent(data, encode=self._body_encoder(topic))
+
+    def _body_encoder(self, topic: TopicType) -> Optional[Callable[[Any], Any]]:
+        """
+        The codec encoding of the data of the topic, so that unchanged data are told apart by the payload that is
+        actually sent
+
+        :param topic:
+        :return:
+        """
+        codec = self._topic_codecs.get(topic.subjects[0])
+
+        return codec.encode if codec is not None else None
+
+    def _on_topic_data_timeout(self, topic: TopicType, outcome: Future, data_future: Future) -> None:
+        if not outcome.done():
+            _logger.error(f"Timeout while getting data of topic {topic.name}")
+            outcome.set_result(TIMED_OUT)
+
+            # cancels a pending coroutine, or a data handler call that has not started yet
+            data_future.cancel()
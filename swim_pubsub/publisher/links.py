@@ -0,0 +1,96 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import time
+from typing import Optional, Dict, Any
+
+import proton
+
+from swim_pubsub.core.topics.topics import AT_LEAST_ONCE
+from swim_pubsub.publisher.buffers import OutboundBuffer
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+class SenderLink:
+
+    def __init__(self, name: str, buffer: OutboundBuffer, delivery_mode: str = AT_LEAST_ONCE) -> None:
+        """
+        Wraps a `proton.Sender` along with its own outbound buffer and keeps track of its throughput. Every link has its
+        own credit window so messages routed through different links do not compete for the same credit.
+
+        :param name: identifies the link within the handler, e.g. 'default', 'shard-1' or a topic name
+        :param buffer: holds the messages of this link while it has no credit
+        :param delivery_mode: AT_LEAST_ONCE or AT_MOST_ONCE in which case the sender is pre-settled
+        """
+        self.name = name
+        self.buffer = buffer
+        self.delivery_mode = delivery_mode
+        self.sender: Optional[proton.Sender] = None
+        self.sent = 0
+        self._opened_at: Optional[float] = None
+
+    def __repr__(self):
+        return f"<SenderLink '{self.name}'>"
+
+    def open(self, sender: proton.Sender) -> None:
+        self.sender = sender
+        self._opened_at = time.monotonic()
+
+    @property
+    def credit(self) -> int:
+        return self.sender.credit if self.sender else 0
+
+    @property
+    def throughput(self) -> float:
+        """
+        The average number of messages per second sent since the link was opened
+        """
+        if self._opened_at is None:
+            return 0.
+
+        elapsed = time.monotonic() - self._opened_at
+
+        return self.sent / elapsed if elapsed > 0 else 0.
+
+    def send(self, message: proton.Message) -> proton.Delivery:
+        delivery = self.sender.send(message)
+        self.sent += 1
+
+        return delivery
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'delivery_mode': self.delivery_mode,
+            'credit': self.credit,
+            'sent': self.sent,
+            'throughput': self.throughput,
+            'buffer': self.buffer.stats()
+        }
@@ -0,0 +1,94 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from concurrent.futures import Future
+from typing import Any, Iterator, Dict
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+# marks an exhausted stream
+END = object()
+
+
+class TopicStream:
+
+    def __init__(self, subject: str, items: Iterator[Any]) -> None:
+        """
+        Keeps track of the data items of a streaming topic that are pending to be sent. The items are pulled one at a
+        time as long as there is credit so only the current one is kept in memory. An item that was pulled but could
+        not be sent is put back and it is the next one to be returned.
+
+        :param subject: the subject the items are sent under
+        :param items: the iterator of the data items
+        """
+        self.subject = subject
+        self.items = items
+        self.outcome = Future()
+        self.sent = 0
+        self._pending: Any = END
+
+    def __repr__(self):
+        return f"<TopicStream '{self.subject}' ({self.sent} sent)>"
+
+    def next_item(self) -> Any:
+        """
+        :return: the next data item or END if the stream is exhausted
+        :raises: any error of the underlying iterator
+        """
+        if self._pending is not END:
+            item, self._pending = self._pending, END
+            return item
+
+        return next(self.items, END)
+
+    def put_back(self, item: Any) -> None:
+        self._pending = item
+
+    def close(self, outcome: str) -> None:
+        """
+        Stops the stream and resolves its outcome
+
+        :param outcome:
+        """
+        close = getattr(self.items, 'close', None)
+        if close is not None:
+            # gives a generator the chance to release its resources, e.g. an upstream connection
+            close()
+
+        self._pending = END
+
+        if not self.outcome.done():
+            self.outcome.set_result(outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subject': self.subject,
+            'sent': self.sent
+        }
@@ -0,0 +1,208 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import itertools
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import proton
+
+from swim_pubsub.core.delta import is_delta_encoded
+from swim_pubsub.core.topics.topics import DELAY, CONFLATE, DROP, RATE_LIMIT_POLICIES
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        """
+        Allows `rate` tokens per second on average and up to `burst` tokens at once. The bucket starts full and it is
+        refilled lazily upon checking it.
+
+        :param rate: the number of tokens added per second
+        :param burst: the capacity of the bucket. Defaults to the rate (at least 1).
+        """
+        if rate <= 0:
+            raise ValueError(f"rate should be a positive number, got {rate}")
+
+        if burst is not None and burst < 1:
+            raise ValueError(f"burst should be at least 1, got {burst}")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1., rate)
+
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    def __repr__(self):
+        return f"<TokenBucket {self.rate}/s (burst {self.burst})>"
+
+    def _refill(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+
+        self._tokens = min(self.burst, self._tokens + max(0., now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+
+        return self._tokens
+
+    def has_token(self, now: Optional[float] = None) -> bool:
+        self._refill(now)
+
+        return self._tokens >= 1
+
+    def consume(self) -> None:
+        self._tokens -= 1
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """
+        :param now:
+        :return: the time in seconds until the next token is available
+        """
+        self._refill(now)
+
+        return max(0., (1 - self._tokens) / self.rate)
+
+
+class Throttle:
+
+    def __init__(self,
+                 name: str,
+                 rate: float,
+                 burst: Optional[int] = None,
+                 policy: str = DELAY,
+                 max_pending: int = 1000) -> None:
+        """
+        Rate limits a flow of messages via a `TokenBucket`. The messages above the limit are handled according to the
+        policy:
+            - DELAY: they are held in FIFO order until tokens are available
+            - CONFLATE: only the latest held message per subject is kept, apart from messages in delta mode which are
+                        held as in DELAY mode because every diff is needed to rebuild the data
+            - DROP: they are dropped
+
+        :param name: identifies the throttle, e.g. the topic it applies to
+        :param rate: the max number of messages per second on average
+        :param burst: the max number of messages at once
+        :param policy: one of DELAY, CONFLATE, DROP
+        :param max_pending: the max number of held messages in DELAY mode (and of messages in delta mode in CONFLATE
+                            mode). The oldest one is dropped beyond it.
+        """
+        if policy not in RATE_LIMIT_POLICIES:
+            raise ValueError(f"Invalid rate limit policy: {policy}")
+
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.policy = policy
+        self.max_pending = max_pending
+
+        # held messages keyed by their subject in CONFLATE mode or by their arrival order otherwise
+        self._pending: 'OrderedDict[Any, proton.Message]' = OrderedDict()
+        self._arrivals = itertools.count()
+
+        # counters
+        self.passed = 0
+        self.held = 0
+        self.conflated = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __repr__(self):
+        return f"<Throttle '{self.name}' {self.bucket.rate}/s ({self.policy})>"
+
+    def has_token(self) -> bool:
+        return self.bucket.has_token()
+
+    def acquire(self) -> None:
+        self.bucket.consume()
+        self.passed += 1
+
+    def wait_time(self) -> float:
+        return self.bucket.wait_time()
+
+    def hold(self, message: proton.Message) -> Optional[proton.Message]:
+        """
+        Handles a message that exceeds the rate limit according to the policy
+
+        :param message:
+        :return: the message that was dropped in the process, if any
+        """
+        delayed = self.policy == DELAY or (self.policy == CONFLATE and is_delta_encoded(message))
+
+        if self.policy == DROP or (delayed and self.max_pending == 0):
+            self.dropped += 1
+            return message
+
+        self.held += 1
+
+        if not delayed:
+            replaced = self._pending.get(message.subject)
+            self._pending[message.subject] = message
+
+            if replaced is not None:
+                self.conflated += 1
+
+            return replaced
+
+        dropped = None
+        if len(self._pending) >= self.max_pending:
+            _, dropped = self._pending.popitem(last=False)
+            self.dropped += 1
+
+        self._pending[next(self._arrivals)] = message
+
+        return dropped
+
+    def peek(self) -> Optional[proton.Message]:
+        return next(iter(self._pending.values()), None)
+
+    def pop(self) -> proton.Message:
+        _, message = self._pending.popitem(last=False)
+
+        return message
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'rate': self.bucket.rate,
+            'burst': self.bucket.burst,
+            'policy': self.policy,
+            'tokens': self.bucket.tokens,
+            'pending': len(self),
+            'passed': self.passed,
+            'held': self.held,
+            'conflated': self.conflated,
+            'dropped': self.dropped
+        }
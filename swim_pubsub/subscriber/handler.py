@@ -28,11 +28,15 @@ http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import logging
-from typing import Dict, Tuple, Callable
+from typing import Dict, Tuple, Callable, Optional, Any
 
 import proton
 
 from swim_pubsub.core.broker_handlers import BrokerHandler, Connector
+from swim_pubsub.core.codecs import CodecRegistry, CodecError, codecs
+from swim_pubsub.core.compression import Compressor, CompressionError, create_decompressor, decompress_message, \
+    get_content_encoding, is_compressed
+from swim_pubsub.core.delta import DeltaDecoder, DeltaError, is_delta_encoded
 from swim_pubsub.core.errors import AppError, BrokerHandlerError
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -43,18 +47,57 @@ _logger = logging.getLogger(__name__)
 
 class SubscriberBrokerHandler(BrokerHandler):
 
-    def __init__(self, connector: Connector) -> None:
+    def __init__(self,
+                 connector: Connector,
+                 decode_payloads: bool = False,
+                 codec_registry: Optional[CodecRegistry] = None) -> None:
         """
         An implementation of a broker client that is supposed to act as subscriber. It subscribes to queues of the
         broker by creating instances of `proton.Receiver` for each one of them.
 
+        The full data of delta encoded topics are rebuilt out of their snapshots and diffs before they are passed to the
+        callbacks. In case of a lost message the diffs are dropped until the next snapshot. Compressed messages (i.e.
+        with a content encoding) are decompressed before anything else.
+
+        If payload decoding is enabled the body of the messages is decoded by the codec of their content type (see
+        `CodecRegistry`) before they are passed to the callbacks, e.g. a JSON body becomes a dict. Messages of unknown
+        content types are passed as they are.
+
         :param connector: takes care of the connection .i.e TSL, SASL etc
+        :param decode_payloads: whether to decode the body of the messages by their content type
+        :param codec_registry: the registry to look up the codecs in. Defaults to the global one.
         """
         BrokerHandler.__init__(self, connector)
 
         # keep track of all the queues by receiver
         self.receivers: Dict[proton.Receiver, Tuple[str, Callable]] = {}
 
+        # keep track of the delta encoded data by receiver
+        self._delta_decoders: Dict[proton.Receiver, DeltaDecoder] = {}
+
+        self.decode_payloads = decode_payloads
+        self.codec_registry: CodecRegistry = codec_registry or codecs
+
+        # decompressors by content encoding
+        self._decompressors: Dict[str, Compressor] = {}
+
+    def _get_decompressor(self, content_encoding: str) -> Compressor:
+        """
+        :param content_encoding:
+        :return:
+        :raises: CompressionError if the content encoding is unknown
+        """
+        if content_encoding not in self._decompressors:
+            self._decompressors[content_encoding] = create_decompressor(content_encoding)
+
+        return self._decompressors[content_encoding]
+
+    def decompression_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The number of the decompressed payloads and the CPU time of the decompressions per content encoding
+        """
+        return {encoding: decompressor.stats() for encoding, decompressor in self._decompressors.items()}
+
     def _get_receiver_by_queue(self, queue: str) -> proton.Receiver:
         """
         Find the receiver that corresponds to the given queue.
@@ -99,6 +142,7 @@ class SubscriberBrokerHandler(BrokerHandler):
 
         # remove it from the list
         del self.receivers[receiver]
+        self._delta_decoders.pop(receiver, None)
 
     def on_message(self, event: proton.Event) -> None:
         """
@@ -108,7 +152,35 @@ class SubscriberBrokerHandler(BrokerHandler):
         """
         queue, callback = self.receivers[event.receiver]
 
+        message = event.message
+        if is_compressed(message):
+            try:
+                message = decompress_message(message, self._get_decompressor(get_content_encoding(message)))
+            except CompressionError as e:
+                _logger.error(f"Error while decompressing message from queue {queue}: {str(e)}")
+                return
+
+        if is_delta_encoded(message):
+            try:
+                message = self._delta_decoders.setdefault(event.receiver, DeltaDecoder()).decode(message)
+            except DeltaError as e:
+                _logger.error(f"Error while decoding message from queue {queue}: {str(e)}")
+                return
+
+            if message is None:
+                return
+
+        if self.decode_payloads:
+            codec = self.codec_registry.for_content_type(message.content_type)
+
+            if codec is not None:
+                try:
+                    message.body = codec.decode(message.body)
+                except CodecError as e:
+                    _logger.error(f"Error while decoding message from queue {queue}: {str(e)}")
+                    return
+
         try:
-            callback(event.message)
+            callback(message)
         except AppError as e:
             _logger.error(f"Error while processing message {event.message} from queue {queue}: {str(e)}")
@@ -28,10 +28,14 @@ http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import logging
+import threading
+import time
+from concurrent.futures import Future
 from unittest import mock
 from unittest.mock import Mock
 
 import pytest
+from proton.reactor import Container
 
 from swim_pubsub.core.broker_handlers import BrokerHandler, Connector, TLSConnector, SASLConnector
 from swim_pubsub.core.errors import BrokerHandlerError
@@ -161,6 +165,23 @@ def test_broker_handler__create_from_config__creates_handler_with_sasl_connector
         assert isinstance(broker_handler.connector, SASLConnector)
 
 
+@mock.patch('swim_pubsub.core.utils.create_ssl_domain', return_value=mock.Mock())
+def test_broker_handler__create_from_config__extra_settings_are_passed_to_the_handler(mock_create_ssl_domain):
+    class CustomBrokerHandler(BrokerHandler):
+        def __init__(self, connector, custom_setting=None):
+            super().__init__(connector)
+            self.custom_setting = custom_setting
+
+    broker_config = {
+        'host': 'hostname',
+        'custom_setting': 'value'
+    }
+
+    broker_handler = CustomBrokerHandler.create_from_config(broker_config)
+
+    assert 'value' == broker_handler.custom_setting
+
+
 def test_broker_handler__create_receiver_fails__raises_BrokerHandlerError():
     broker_handler = BrokerHandler(mock.Mock())
     broker_handler.container = mock.Mock()
@@ -201,3 +222,101 @@ def test_broker_handler__on_start(caplog):
 
     log_message = caplog.records[0]
     assert f'Connected to broker @ {handler.connector.url}' == log_message.message
+
+
+def test_broker_handler__in_container_thread():
+    handler = BrokerHandler(mock.Mock())
+
+    # not running yet
+    assert handler.in_container_thread() is True
+
+    handler.on_start(Mock())
+    assert handler.in_container_thread() is True
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(handler.in_container_thread()))
+    thread.start()
+    thread.join()
+    assert [False] == result
+
+
+def test_broker_handler__submit__container_is_woken_up_once_and_calls_are_processed_in_order():
+    handler = BrokerHandler(mock.Mock())
+    handler._injector = Mock()
+
+    calls = []
+    futures = [handler.submit(calls.append, i) for i in range(3)]
+
+    handler._injector.trigger.assert_called_once()
+    assert not any(future.done() for future in futures)
+
+    handler.on_swim_pubsub_submissions(Mock())
+
+    assert [0, 1, 2] == calls
+    assert all(future.done() for future in futures)
+
+    # a new submission wakes up the container again
+    handler.submit(calls.append, 3)
+    assert 2 == handler._injector.trigger.call_count
+
+
+def test_broker_handler__submit__exception_is_set_in_the_future():
+    handler = BrokerHandler(mock.Mock())
+    handler._injector = Mock()
+
+    future = handler.submit(Mock(side_effect=BrokerHandlerError('error')))
+    handler.on_swim_pubsub_submissions(Mock())
+
+    with pytest.raises(BrokerHandlerError):
+        future.result(timeout=0)
+
+
+def test_broker_handler__submit__returned_future_is_chained():
+    handler = BrokerHandler(mock.Mock())
+    handler._injector = Mock()
+
+    inner_future = Future()
+    future = handler.submit(lambda: inner_future)
+    handler.on_swim_pubsub_submissions(Mock())
+
+    assert not future.done()
+
+    inner_future.set_result('result')
+
+    assert 'result' == future.result(timeout=0)
+
+
+def test_broker_handler__on_connection_closed__injector_is_closed():
+    handler = BrokerHandler(mock.Mock())
+    handler._injector = Mock()
+
+    handler.on_connection_closed(Mock())
+
+    handler._injector.close.assert_called_once()
+
+
+def test_broker_handler__submit_from_other_threads__calls_run_in_the_container_thread():
+    handler = BrokerHandler(mock.Mock())
+    container_thread = threading.Thread(target=Container(handler).run, daemon=True)
+    container_thread.start()
+
+    while not handler.started:
+        time.sleep(0.01)
+
+    def produce(results):
+        futures = [handler.submit(threading.get_ident) for _ in range(100)]
+        results.extend(future.result(timeout=5) for future in futures)
+
+    results = []
+    producers = [threading.Thread(target=produce, args=(results,)) for _ in range(4)]
+    for producer in producers:
+        producer.start()
+    for producer in producers:
+        producer.join()
+
+    handler._injector.close()
+    container_thread.join(timeout=5)
+
+    assert 400 == len(results)
+    assert {handler._container_thread_id} == set(results)
+    assert not container_thread.is_alive()
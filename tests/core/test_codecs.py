@@ -0,0 +1,142 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import sys
+from unittest import mock
+
+import pytest
+
+from swim_pubsub.core.codecs import CodecRegistry, JSONCodec, BytesCodec, MsgPackCodec, CBORCodec, CodecError, \
+    create_default_registry, Codec
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_json_codec__encode_and_decode__round_trip_with_compact_separators():
+    codec = JSONCodec()
+
+    payload = codec.encode({'icao24': 'abc', 'altitude': [1, 2]})
+
+    assert '{"icao24":"abc","altitude":[1,2]}' == payload
+    assert {'icao24': 'abc', 'altitude': [1, 2]} == codec.decode(payload)
+    assert {'icao24': 'abc', 'altitude': [1, 2]} == codec.decode(payload.encode('utf-8'))
+
+
+def test_json_codec__encode__data_are_not_serializable__raises_codecerror():
+    with pytest.raises(CodecError) as e:
+        JSONCodec().encode({'data': object()})
+    assert str(e.value).startswith("Error while encoding data with json: ")
+
+
+@pytest.mark.parametrize('data', [b'data', bytearray(b'data'), memoryview(b'data')])
+def test_bytes_codec__encode__bytes_like_data__are_passed_as_bytes(data):
+    assert b'data' == BytesCodec().encode(data)
+
+
+def test_bytes_codec__encode__not_bytes_like_data__raises_codecerror():
+    with pytest.raises(CodecError) as e:
+        BytesCodec().encode("data")
+    assert "The bytes codec expects bytes-like data, got str" == str(e.value)
+
+
+@pytest.mark.parametrize('codec_class, module_name', [(MsgPackCodec, 'msgpack'), (CBORCodec, 'cbor2')])
+def test_optional_dependency_codec__module_is_not_installed__raises_codecerror(codec_class, module_name):
+    with mock.patch.dict(sys.modules, {module_name: None}):
+        with pytest.raises(CodecError) as e:
+            codec_class().encode({'data': 1})
+    assert f"The {codec_class.name} codec requires the {module_name} package to be installed" == str(e.value)
+
+
+@pytest.mark.parametrize('codec_class, module_name', [(MsgPackCodec, 'msgpack'), (CBORCodec, 'cbor2')])
+def test_optional_dependency_codec__encode_and_decode__round_trip(codec_class, module_name):
+    pytest.importorskip(module_name)
+    codec = codec_class()
+
+    payload = codec.encode({'icao24': 'abc', 'altitude': [1, 2]})
+
+    assert isinstance(payload, bytes)
+    assert {'icao24': 'abc', 'altitude': [1, 2]} == codec.decode(payload)
+
+
+def test_codec__custom_codec_without_decode__raises_typeerror_upon_creation():
+    class EncodeOnlyCodec(Codec):
+        name = 'encode-only'
+
+        def _encode(self, data):
+            return str(data)
+
+    with pytest.raises(TypeError):
+        EncodeOnlyCodec()
+
+
+def test_codec__stats__encodings_and_decodings_are_counted_and_timed():
+    codec = JSONCodec()
+
+    codec.decode(codec.encode([1, 2]))
+    codec.encode([1, 2])
+
+    stats = codec.stats()
+    assert 2 == stats['encoded']
+    assert 1 == stats['decoded']
+    assert 10 == stats['encoded_bytes']
+    assert 2 == stats['encode_time']['count']
+    assert 1 == stats['decode_time']['count']
+
+
+def test_codec_registry__get__unknown_codec__raises_codecerror():
+    with pytest.raises(CodecError) as e:
+        CodecRegistry().get('json')
+    assert "Unknown codec: json" == str(e.value)
+
+
+@pytest.mark.parametrize('content_type, expected_codec', [
+    ('application/json', 'json'),
+    ('Application/JSON; charset=utf-8', 'json'),
+    ('application/msgpack', 'msgpack'),
+    ('application/octet-stream', 'bytes'),
+    ('text/plain', None),
+    (None, None),
+])
+def test_codec_registry__for_content_type(content_type, expected_codec):
+    codec = create_default_registry().for_content_type(content_type)
+
+    assert expected_codec == (codec.name if codec is not None else None)
+
+
+def test_codec_registry__register__custom_codec_replaces_the_one_with_the_same_name():
+    class CustomJSONCodec(JSONCodec):
+        pass
+
+    registry = create_default_registry()
+    codec = CustomJSONCodec()
+    registry.register(codec)
+
+    assert codec is registry.get('json')
+    assert codec is registry.for_content_type('application/json')
+    assert ['json', 'bytes', 'msgpack', 'cbor'] == list(registry.stats())
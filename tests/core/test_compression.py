@@ -0,0 +1,144 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import json
+
+import proton
+import pytest
+
+from swim_pubsub.core.compression import ZLIB, LZMA, BZ2, COMPRESSED_TEXT_PROPERTY, CompressionError, Compressor, \
+    create_compressor, create_decompressor, compress_message, decompress_message, is_compressed, get_content_encoding
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+FLIGHTS = json.dumps([{'icao24': f'abc{i}', 'origin': 'EBBR', 'destination': 'LEMD'} for i in range(100)])
+
+
+@pytest.mark.parametrize('name, content_encoding', [(ZLIB, 'deflate'), (LZMA, 'xz'), (BZ2, 'bzip2')])
+def test_compressor__compress_and_decompress__round_trip(name, content_encoding):
+    compressor = create_compressor(name)
+
+    payload = compressor.compress(FLIGHTS.encode('utf-8'))
+
+    assert len(payload) < len(FLIGHTS)
+    assert FLIGHTS.encode('utf-8') == create_decompressor(content_encoding).decompress(payload)
+
+
+def test_compressor__custom_compressor_without_decompress__raises_typeerror_upon_creation():
+    class CompressOnlyCompressor(Compressor):
+        name = 'compress-only'
+
+        def _compress(self, data):
+            return data
+
+    with pytest.raises(TypeError):
+        CompressOnlyCompressor()
+
+
+def test_compressor__compress__data_below_threshold__are_skipped():
+    compressor = create_compressor(ZLIB, threshold=100)
+
+    assert compressor.compress(b'a' * 99) is None
+    assert compressor.compress(b'a' * 100) is not None
+    assert 1 == compressor.skipped
+    assert 1 == compressor.compressed
+
+
+def test_compressor__compress__data_do_not_shrink__are_skipped():
+    compressor = create_compressor(ZLIB, threshold=0)
+
+    assert compressor.compress(bytes(range(16))) is None
+    assert 1 == compressor.skipped
+    assert 0 == compressor.compressed
+
+
+def test_compressor__stats__ratio_and_cpu_time_are_reported():
+    compressor = create_compressor(ZLIB)
+    assert compressor.stats()['ratio'] is None
+
+    payload = compressor.compress(FLIGHTS.encode('utf-8'))
+    compressor.decompress(payload)
+
+    stats = compressor.stats()
+    assert 'deflate' == stats['content_encoding']
+    assert len(FLIGHTS) == stats['bytes_in']
+    assert len(payload) == stats['bytes_out']
+    assert len(FLIGHTS) / len(payload) == stats['ratio']
+    assert 1 == stats['compress_time']['count']
+    assert 1 == stats['decompressed']
+
+
+def test_compressor__decompress__invalid_payload__raises_compressionerror():
+    with pytest.raises(CompressionError) as e:
+        create_decompressor('deflate').decompress(b'invalid')
+    assert str(e.value).startswith("Error while decompressing payload with zlib: ")
+
+
+def test_create_compressor__unknown_compression__raises_compressionerror():
+    with pytest.raises(CompressionError) as e:
+        create_compressor('gzip')
+    assert "Unknown compression: gzip" == str(e.value)
+
+
+def test_create_decompressor__unknown_content_encoding__raises_compressionerror():
+    with pytest.raises(CompressionError) as e:
+        create_decompressor('br')
+    assert "Unknown content encoding: br" == str(e.value)
+
+
+@pytest.mark.parametrize('body', [FLIGHTS, FLIGHTS.encode('utf-8')])
+def test_compress_message__decompress_message__body_is_restored_in_the_same_form(body):
+    message = proton.Message(body=body, properties={'key': 'value'})
+
+    message = compress_message(message, create_compressor(ZLIB))
+
+    assert is_compressed(message)
+    assert 'deflate' == message.content_encoding
+    assert isinstance(message.body, bytes)
+    assert isinstance(body, str) == (COMPRESSED_TEXT_PROPERTY in message.properties)
+
+    message = decompress_message(message, create_decompressor(message.content_encoding))
+
+    assert not is_compressed(message)
+    assert body == message.body
+    assert {'key': 'value'} == message.properties
+
+
+def test_compress_message__body_is_not_a_string_or_bytes__message_is_left_as_it_is_and_a_warning_is_logged(caplog):
+    compressor = create_compressor(ZLIB, threshold=0)
+
+    messages = [compress_message(proton.Message(body={'flights': FLIGHTS}, subject='flights'), compressor)
+                for _ in range(2)]
+
+    assert [{'flights': FLIGHTS}] * 2 == [message.body for message in messages]
+    assert get_content_encoding(messages[0]) is None
+    assert (0, 2) == (compressor.skipped, compressor.stats()['unsupported'])
+    assert ["Cannot compress body of type dict of message flights, a string or bytes is expected, e.g. by setting a "
+            "codec for the topic"] == [record.message for record in caplog.records]
@@ -0,0 +1,186 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import json
+
+import pytest
+from proton import Message
+
+from swim_pubsub.core.delta import diff, apply_patch, DeltaError, DeltaEncoder, DeltaDecoder, SNAPSHOT, DELTA, \
+    DELTA_KIND_PROPERTY, DELTA_SEQUENCE_PROPERTY, is_delta_encoded
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+ARRIVALS = [{'icao24': f'abc{i}', 'callsign': f'FLIGHT{i}', 'arrival': 1000 + i} for i in range(20)]
+
+
+@pytest.mark.parametrize('old, new, expected_patch', [
+    ({'a': 1}, {'a': 1}, []),
+    ({'a': 1}, {'a': 2}, [{'op': 'replace', 'path': '/a', 'value': 2}]),
+    ({'a': 1}, {'b': 1}, [{'op': 'remove', 'path': '/a'}, {'op': 'add', 'path': '/b', 'value': 1}]),
+    ({'a/b': 1}, {'a/b': 2}, [{'op': 'replace', 'path': '/a~1b', 'value': 2}]),
+    ([1, 2], [1, 2, 3], [{'op': 'add', 'path': '/2', 'value': 3}]),
+    ([1, 2, 3], [1], [{'op': 'remove', 'path': '/2'}, {'op': 'remove', 'path': '/1'}]),
+    ({'a': 1}, [1], [{'op': 'replace', 'path': '', 'value': [1]}]),
+    ({'a': 1}, {'a': True}, [{'op': 'replace', 'path': '/a', 'value': True}]),
+])
+def test_diff(old, new, expected_patch):
+    assert expected_patch == diff(old, new)
+    assert new == apply_patch(old, expected_patch)
+
+
+def test_apply_patch__document_is_not_modified():
+    document = {'arrivals': [1, 2]}
+
+    apply_patch(document, [{'op': 'add', 'path': '/arrivals/-', 'value': 3}])
+
+    assert {'arrivals': [1, 2]} == document
+
+
+@pytest.mark.parametrize('patch', [
+    [{'op': 'replace', 'path': '/missing', 'value': 1}],
+    [{'op': 'remove', 'path': '/arrivals/5'}],
+    [{'op': 'move', 'path': '/arrivals'}],
+    [{'op': 'add', 'path': ''}],
+])
+def test_apply_patch__patch_does_not_fit__raises_DeltaError(patch):
+    with pytest.raises(DeltaError):
+        apply_patch({'arrivals': [1, 2]}, patch)
+
+
+def test_delta_encoder__invalid_snapshot_interval__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        DeltaEncoder(snapshot_interval=0)
+    assert "snapshot_interval should be a positive integer, got 0" == str(e.value)
+
+
+def test_delta_encoder__encode__snapshot_every_snapshot_interval_and_deltas_in_between():
+    encoder = DeltaEncoder(snapshot_interval=3)
+
+    kinds = []
+    for i in range(7):
+        arrivals = ARRIVALS + [{'icao24': 'new', 'arrival': i}]
+        message = encoder.encode(json.dumps(arrivals))
+        kinds.append(message.properties[DELTA_KIND_PROPERTY])
+        assert i + 1 == message.properties[DELTA_SEQUENCE_PROPERTY]
+
+    assert [SNAPSHOT, DELTA, DELTA, SNAPSHOT, DELTA, DELTA, SNAPSHOT] == kinds
+    assert {'sequence': 7, 'snapshots': 3, 'deltas': 4} == encoder.stats()
+
+
+def test_delta_encoder__encode__diff_is_not_smaller__snapshot_is_sent():
+    encoder = DeltaEncoder()
+
+    encoder.encode({'a': 1})
+    message = encoder.encode({'b': 2})
+
+    assert SNAPSHOT == message.properties[DELTA_KIND_PROPERTY]
+    assert {'b': 2} == message.body
+
+
+def test_delta_encoder__encode__message__body_is_replaced_and_properties_are_kept():
+    encoder = DeltaEncoder()
+    encoder.encode(Message(body=json.dumps(ARRIVALS)))
+
+    message = Message(body=json.dumps(ARRIVALS[:-1]), properties={'source': 'opensky'})
+    encoded = encoder.encode(message)
+
+    assert DELTA == encoded.properties[DELTA_KIND_PROPERTY]
+    assert 'opensky' == encoded.properties['source']
+    assert [{'op': 'remove', 'path': '/19'}] == json.loads(encoded.body)
+
+
+def _encoded_messages(documents, snapshot_interval=10):
+    encoder = DeltaEncoder(snapshot_interval=snapshot_interval)
+
+    return [encoder.encode(Message(body=json.dumps(document), properties={'source': 'opensky'}))
+            for document in documents]
+
+
+def test_delta_decoder__decode__documents_are_rebuilt():
+    documents = [ARRIVALS[:i] for i in range(10, 20)]
+    decoder = DeltaDecoder()
+
+    decoded = [decoder.decode(message) for message in _encoded_messages(documents)]
+
+    assert documents == [json.loads(message.body) for message in decoded]
+    assert all({'source': 'opensky'} == message.properties for message in decoded)
+    assert not any(is_delta_encoded(message) for message in decoded)
+
+
+def test_delta_decoder__decode__non_string_body__is_rebuilt_as_is():
+    encoder = DeltaEncoder()
+    decoder = DeltaDecoder()
+
+    decoder.decode(encoder.encode({'arrivals': ARRIVALS}))
+    decoded = decoder.decode(encoder.encode({'arrivals': ARRIVALS[:-1]}))
+
+    assert {'arrivals': ARRIVALS[:-1]} == decoded.body
+
+
+def test_delta_decoder__decode__gap__deltas_are_dropped_until_next_snapshot():
+    documents = [ARRIVALS[:i] for i in range(10, 17)]
+    messages = _encoded_messages(documents, snapshot_interval=4)
+    decoder = DeltaDecoder()
+
+    # the second message is lost
+    decoded = [decoder.decode(message) for message in messages[:1] + messages[2:]]
+
+    # messages 3 and 4 are dropped and the decoder resyncs from the snapshot of message 5
+    assert [documents[0], None, None] + documents[4:] == [json.loads(message.body) if message else None
+                                                          for message in decoded]
+    assert 1 == decoder.gaps
+
+
+def test_delta_decoder__decode__no_snapshot_yet__delta_is_dropped():
+    messages = _encoded_messages([ARRIVALS, ARRIVALS[:-1]])
+
+    assert DeltaDecoder().decode(messages[1]) is None
+
+
+def test_delta_decoder__decode__invalid_kind__raises_DeltaError():
+    with pytest.raises(DeltaError):
+        DeltaDecoder().decode(Message(body='{}', properties={DELTA_KIND_PROPERTY: 'invalid'}))
+
+
+@pytest.mark.parametrize('data', ['<xml/>', {'flights': {1, 2}}])
+def test_delta_encoder__encode__data_are_not_a_json_document__raises_deltaerror_and_keeps_its_state(data):
+    flights = [{'icao24': f'abc{i}'} for i in range(10)]
+    encoder = DeltaEncoder()
+    encoder.encode(flights)
+
+    with pytest.raises(DeltaError) as e:
+        encoder.encode(data)
+    assert str(e.value).startswith("Error while delta encoding data: ")
+
+    message = encoder.encode(flights[:-1])
+
+    assert {'sequence': 2, 'snapshots': 1, 'deltas': 1} == encoder.stats()
+    assert DELTA == message.properties[DELTA_KIND_PROPERTY]
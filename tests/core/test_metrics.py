@@ -0,0 +1,68 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pytest
+
+from swim_pubsub.core.metrics import Histogram
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_histogram__no_values():
+    histogram = Histogram(buckets=[1, 2])
+
+    assert 0 == histogram.count
+    assert histogram.mean is None
+    assert histogram.percentile(50) is None
+
+
+def test_histogram__observe__values_are_counted_in_buckets():
+    histogram = Histogram(buckets=[1, 2, 5])
+
+    for value in [0.5, 1, 1.5, 3, 10]:
+        histogram.observe(value)
+
+    assert [2, 1, 1, 1] == histogram.counts
+    assert 5 == histogram.count
+    assert 0.5 == histogram.min
+    assert 10 == histogram.max
+    assert 3.2 == histogram.mean
+    assert {1: 2, 2: 1, 5: 1, float('inf'): 1} == histogram.stats()['buckets']
+
+
+@pytest.mark.parametrize('percent, expected', [
+    (10, 1), (40, 1), (50, 2), (80, 5), (99, 10), (100, 10)
+])
+def test_histogram__percentile(percent, expected):
+    histogram = Histogram(buckets=[1, 2, 5])
+
+    for value in [0.5, 1, 1.5, 3, 10]:
+        histogram.observe(value)
+
+    assert expected == histogram.percentile(percent)
@@ -0,0 +1,111 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+import random
+
+import pytest
+
+from swim_pubsub.core.scheduling import TimingWheel, stagger_phase
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_timing_wheel__invalid_tick__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        TimingWheel(tick_in_sec=0)
+    assert "tick_in_sec should be positive, got 0" == str(e.value)
+
+
+def test_timing_wheel__schedule__expiry_is_rounded_up_to_the_next_tick():
+    wheel = TimingWheel(tick_in_sec=0.5, origin=0.)
+
+    assert 3 == wheel.schedule('item', delay=1.2, now=0.)
+    assert 1 == wheel.schedule('item', delay=0, now=0.)
+    assert 2 == len(wheel)
+
+
+def test_timing_wheel__advance__returns_due_items_in_order_of_expiry():
+    wheel = TimingWheel(tick_in_sec=1., origin=0.)
+
+    wheel.schedule('late', delay=5, now=0.)
+    wheel.schedule('early1', delay=2, now=0.)
+    wheel.schedule('early2', delay=2, now=0.)
+
+    assert [] == wheel.advance(now=1.5)
+    assert ['early1', 'early2'] == wheel.advance(now=2.)
+    assert ['late'] == wheel.advance(now=10.)
+    assert 0 == len(wheel)
+    assert 10 == wheel.current_tick
+
+
+@pytest.mark.parametrize('slots', [(4, 4, 4), (8, 2), (3,), (256, 64, 64, 64)])
+def test_timing_wheel__advance__items_are_due_exactly_at_their_expiry_across_levels(slots):
+    random.seed(0)
+    wheel = TimingWheel(tick_in_sec=1., slots=slots, origin=0.)
+
+    # beyond the span of the smaller wheels as well
+    expected = {item: wheel.schedule(item, delay=random.randint(0, 300), now=0.) for item in range(1000)}
+
+    due = {}
+    for now in range(1, 400):
+        for item in wheel.advance(now=now):
+            due[item] = now
+
+        # schedule more items while advancing
+        if now < 250 and now % 7 == 0:
+            item = ('later', now)
+            expected[item] = wheel.schedule(item, delay=random.random() * 100, now=now)
+
+    assert expected == due
+    assert 0 == len(wheel)
+
+
+def test_timing_wheel__next_tick_delay__returns_time_until_next_tick():
+    wheel = TimingWheel(tick_in_sec=1., origin=0.)
+
+    assert 0.75 == wheel.next_tick_delay(now=0.25)
+
+    wheel.advance(now=3.5)
+    assert 0.5 == wheel.next_tick_delay(now=3.5)
+
+    # behind schedule
+    assert 0 == wheel.next_tick_delay(now=5.)
+
+
+@pytest.mark.parametrize('count', [2, 6, 100])
+def test_stagger_phase__phases_are_spread_over_the_interval(count):
+    phases = sorted(stagger_phase(index, 5.) for index in range(count))
+
+    assert 0 == phases[0]
+    assert all(0 <= phase < 5 for phase in phases)
+
+    # no two phases are closer than a fraction of the even spacing
+    gaps = [b - a for a, b in zip(phases, phases[1:])]
+    assert min(gaps) > 5. / count / 3
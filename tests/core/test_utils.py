@@ -27,6 +27,7 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import asyncio
 import logging
 from unittest import mock
 
@@ -80,3 +81,53 @@ def test_create_ssl_domain(cert_db, cert_file, cert_key, cert_password, set_cred
             mock_ssldomain.set_credentials.assert_called_once_with(cert_file, cert_key, cert_password)
         else:
             mock_ssldomain.set_credentials.assert_not_called()
+
+
+def test_run_in_container_thread__caller_in_container_thread__method_is_called_directly():
+    handler = mock.Mock()
+    handler.in_container_thread = mock.Mock(return_value=True)
+
+    @utils.run_in_container_thread
+    def method(handler, arg, kwarg=None):
+        return arg, kwarg
+
+    assert (1, 2) == method(handler, 1, kwarg=2)
+    handler.submit.assert_not_called()
+
+
+def test_run_in_container_thread__caller_in_other_thread__call_is_submitted():
+    handler = mock.Mock()
+    handler.in_container_thread = mock.Mock(return_value=False)
+
+    def method(handler, arg, kwarg=None):
+        return arg, kwarg
+
+    decorated = utils.run_in_container_thread(method)
+
+    assert handler.submit.return_value == decorated(handler, 1, kwarg=2)
+    handler.submit.assert_called_once_with(method, handler, 1, kwarg=2)
+
+
+def test_timer_task__on_timer_task__callback_is_called_with_args():
+    callback = mock.Mock()
+
+    task = utils.TimerTask(callback, 1, kwarg=2)
+    task.on_timer_task(mock.Mock())
+
+    callback.assert_called_once_with(1, kwarg=2)
+
+
+def test_event_loop_thread__run_coroutine__returns_future_of_result():
+    event_loop = utils.EventLoopThread()
+    event_loop.start()
+
+    async def coroutine():
+        await asyncio.sleep(0)
+        return 'result'
+
+    try:
+        assert 'result' == event_loop.run_coroutine(coroutine()).result(timeout=5)
+    finally:
+        event_loop.stop(timeout=5)
+
+    assert event_loop.is_running is False
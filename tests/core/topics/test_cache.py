@@ -0,0 +1,123 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from proton import Message
+
+from swim_pubsub.core.topics.cache import TopicDataCache, MISS
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.mark.parametrize('kwargs, expected_message', [
+    ({'ttl_in_sec': 0}, "ttl_in_sec should be positive, got 0"),
+    ({'ttl_in_sec': 1, 'max_size': 0}, "max_size should be a positive integer, got 0"),
+])
+def test_topic_data_cache__invalid_settings__raises_valueerror(kwargs, expected_message):
+    with pytest.raises(ValueError) as e:
+        TopicDataCache(**kwargs)
+    assert expected_message == str(e.value)
+
+
+def test_topic_data_cache__get__miss_and_hit_are_counted():
+    cache = TopicDataCache(ttl_in_sec=10)
+
+    assert MISS is cache.get('context')
+
+    cache.put('context', 'data')
+    assert 'data' == cache.get('context')
+
+    # None is valid data
+    cache.put(None, None)
+    assert cache.get(None) is None
+
+    assert 2 == cache.hits
+    assert 1 == cache.misses
+
+
+def test_topic_data_cache__get__expired_data__miss():
+    cache = TopicDataCache(ttl_in_sec=10)
+
+    with mock.patch('swim_pubsub.core.topics.cache.time.monotonic', return_value=100.):
+        cache.put('context', 'data')
+
+    with mock.patch('swim_pubsub.core.topics.cache.time.monotonic', return_value=109.9):
+        assert 'data' == cache.get('context')
+
+    with mock.patch('swim_pubsub.core.topics.cache.time.monotonic', return_value=110.):
+        assert MISS is cache.get('context')
+
+    assert 1 == cache.expirations
+    assert 0 == len(cache)
+
+
+def test_topic_data_cache__put__max_size_is_reached__least_recently_used_is_evicted():
+    cache = TopicDataCache(ttl_in_sec=10, max_size=2)
+
+    cache.put('context1', 'data1')
+    cache.put('context2', 'data2')
+    cache.get('context1')
+    cache.put('context3', 'data3')
+
+    assert MISS is cache.get('context2')
+    assert 'data1' == cache.get('context1')
+    assert 'data3' == cache.get('context3')
+    assert 1 == cache.evictions
+
+
+def test_topic_data_cache__message__a_copy_is_returned_upon_every_hit():
+    cache = TopicDataCache(ttl_in_sec=10)
+    message = Message(body='data', subject='topic')
+
+    cache.put('context', message)
+    cached1, cached2 = cache.get('context'), cache.get('context')
+
+    assert cached1 is not cached2
+    assert cached1 is not message
+    assert 'data' == cached1.body == cached2.body
+    assert 'topic' == cached1.subject
+
+
+def test_topic_data_cache__stats():
+    cache = TopicDataCache(ttl_in_sec=10, max_size=5)
+    cache.put('context', 'data')
+    cache.get('context')
+    cache.get('other')
+
+    assert {
+        'ttl_in_sec': 10,
+        'size': 1,
+        'max_size': 5,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 0,
+        'expirations': 0
+    } == cache.stats()
@@ -0,0 +1,174 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from swim_pubsub.core.topics.singleflight import SingleFlight
+from swim_pubsub.core.topics.topics import Topic
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _wait_for(condition, timeout=5.):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _blocking_call(release, result="result"):
+    def call(*args, **kwargs):
+        release.wait(timeout=5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return Mock(side_effect=call)
+
+
+def test_single_flight__do__concurrent_calls_with_same_key__share_one_call():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    call = _blocking_call(release)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight.do, 'key', call) for _ in range(4)]
+        _wait_for(lambda: single_flight.shared == 3)
+        release.set()
+
+        assert ["result"] * 4 == [future.result(timeout=5) for future in futures]
+
+    call.assert_called_once()
+    assert {'calls': 1, 'shared': 3} == single_flight.stats()
+
+
+def test_single_flight__do__call_raises__every_caller_gets_the_exception():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    call = _blocking_call(release, result=ValueError('error'))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(single_flight.do, 'key', call) for _ in range(2)]
+        _wait_for(lambda: single_flight.shared == 1)
+        release.set()
+
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+
+    call.assert_called_once()
+
+
+def test_single_flight__do__sequential_calls__are_not_shared():
+    single_flight = SingleFlight()
+    call = Mock(return_value="result")
+
+    single_flight.do('key', call, 1, kwarg=2)
+    single_flight.do('key', call, 1, kwarg=2)
+    single_flight.do('other', call)
+
+    assert 3 == call.call_count
+    assert 0 == single_flight.shared
+
+
+def test_single_flight__do_async__concurrent_calls_with_same_key__share_one_call():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def call(arg):
+        calls.append(arg)
+        await asyncio.sleep(0.01)
+        return arg
+
+    async def main():
+        return await asyncio.gather(single_flight.do_async('key', call, 1),
+                                    single_flight.do_async('key', call, 1),
+                                    single_flight.do_async('other', call, 2))
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert [1, 1, 2] == loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    assert [1, 2] == calls
+    assert {'calls': 2, 'shared': 1} == single_flight.stats()
+
+
+def test_single_flight__wrap__calls_are_coalesced_by_arguments():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    upstream = single_flight.wrap(_blocking_call(release))
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(upstream, 'EBBR'), executor.submit(upstream, 'EBBR')]
+        _wait_for(lambda: single_flight.shared == 1)
+        futures.append(executor.submit(upstream, 'EHAM'))
+        _wait_for(lambda: single_flight.calls == 2)
+        release.set()
+
+        assert ["result"] * 3 == [future.result(timeout=5) for future in futures]
+
+
+def test_single_flight__wrap__coroutine_function__wrapper_is_a_coroutine_function():
+    single_flight = SingleFlight()
+
+    async def upstream(icao24):
+        return icao24
+
+    wrapped = single_flight.wrap(upstream, key=lambda icao24: icao24)
+
+    assert asyncio.iscoroutinefunction(wrapped)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert 'EBBR' == loop.run_until_complete(wrapped('EBBR'))
+    finally:
+        loop.close()
+
+
+def test_topic__single_flight__concurrent_get_data__data_handler_is_called_once():
+    release = threading.Event()
+    data_handler = _blocking_call(release, result="data")
+    topic = Topic(topic_name='topic', data_handler=data_handler, single_flight=True)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(topic.get_data, context='context') for _ in range(2)]
+        _wait_for(lambda: topic.single_flight.shared == 1)
+        release.set()
+
+        assert ["data", "data"] == [future.result(timeout=5) for future in futures]
+
+    data_handler.assert_called_once_with(context='context')
@@ -27,13 +27,16 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import asyncio
 import logging
 from functools import partial
+from unittest import mock
 from unittest.mock import Mock
 
 import pytest
 
-from swim_pubsub.core.topics.topics import Topic, ScheduledTopic, TopicDataHandlerError
+from swim_pubsub.core.topics.topics import Topic, ScheduledTopic, TopicDataHandlerError, AT_MOST_ONCE, CATCH_UP, \
+    SKIP, COALESCE, FanOutTopic, ScheduledFanOutTopic, StreamingTopic, ScheduledStreamingTopic
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -47,6 +50,19 @@ def test_topic__data_handler_is_not_callable__raise_valueerror(data_handler):
     assert f"{data_handler} is not callable" == str(e.value)
 
 
+def test_topic__invalid_delivery_mode__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        Topic(topic_name='topic', data_handler=lambda context=None: "data", delivery_mode='invalid')
+    assert "Invalid delivery mode: invalid" == str(e.value)
+
+
+def test_scheduled_topic__delivery_mode():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data", interval_in_sec=5,
+                                     delivery_mode=AT_MOST_ONCE)
+
+    assert AT_MOST_ONCE == scheduled_topic.delivery_mode
+
+
 def test_scheduled_topic__trigger_message_send__no_message_send_handler__returns_and_logs_message(caplog):
     caplog.set_level(logging.DEBUG)
 
@@ -111,3 +127,404 @@ def test_scheduled_topic__on_timer_task__message_send_is_triggered_and_task_is_r
 
     scheduled_topic._trigger_message_send.assert_called_once()
     event.container.schedule.assert_called_once_with(5, scheduled_topic)
+
+
+def test_scheduled_topic__trigger_message_send__trigger_callback_is_set__takes_over():
+    data_handler = Mock()
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=data_handler, interval_in_sec=5)
+    mock_message_send_handler = Mock()
+    mock_trigger_handler = Mock()
+    scheduled_topic.set_message_send_callback(mock_message_send_handler)
+    scheduled_topic.set_trigger_callback(mock_trigger_handler)
+
+    scheduled_topic._trigger_message_send()
+
+    mock_trigger_handler.assert_called_once_with(topic=scheduled_topic)
+    data_handler.assert_not_called()
+    mock_message_send_handler.assert_not_called()
+
+
+async def _async_data_handler(context=None):
+    await asyncio.sleep(0)
+    return context or "data"
+
+
+def test_topic__coroutine_data_handler__is_async():
+    assert Topic(topic_name='topic', data_handler=_async_data_handler).is_async is True
+    assert Topic(topic_name='topic', data_handler=lambda context=None: "data").is_async is False
+
+
+def test_topic__get_data__coroutine_data_handler__runs_it_to_completion():
+    topic = Topic(topic_name='topic', data_handler=_async_data_handler)
+
+    assert "data" == topic.get_data()
+    assert "context" == topic.get_data(context="context")
+
+
+@pytest.mark.parametrize('data_handler', [
+    _async_data_handler,
+    lambda context=None: context or "data"
+])
+def test_topic__get_data_async__returns_data_of_any_data_handler(data_handler):
+    topic = Topic(topic_name='topic', data_handler=data_handler)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert "context" == loop.run_until_complete(topic.get_data_async(context="context"))
+    finally:
+        loop.close()
+
+
+def _run_tick(scheduled_topic, tick_time, done_time):
+    """
+    Runs a tick of the topic at tick_time which is done at done_time and returns the delay of the next tick
+    """
+    event = Mock()
+    scheduled_topic._trigger_message_send = Mock()
+
+    with mock.patch('swim_pubsub.core.topics.topics.time.monotonic', side_effect=[tick_time, done_time]):
+        scheduled_topic.on_timer_task(event)
+
+    (delay, topic), _ = event.container.schedule.call_args
+    assert scheduled_topic == topic
+
+    return delay
+
+
+def _scheduled_topic(**kwargs):
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, **kwargs)
+
+    with mock.patch('swim_pubsub.core.topics.topics.time.monotonic', return_value=100.):
+        scheduled_topic.schedule(Mock())
+
+    return scheduled_topic
+
+
+def test_scheduled_topic__invalid_missed_ticks_policy__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, missed_ticks_policy='invalid')
+    assert "Invalid missed ticks policy: invalid" == str(e.value)
+
+
+def test_scheduled_topic__schedule__first_tick_is_scheduled_after_the_interval():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5)
+    container = Mock()
+
+    scheduled_topic.schedule(container)
+
+    container.schedule.assert_called_once_with(5, scheduled_topic)
+
+
+def test_scheduled_topic__fixed_delay__next_tick_drifts_by_the_run_time():
+    scheduled_topic = _scheduled_topic()
+
+    assert 5 == _run_tick(scheduled_topic, tick_time=105.5, done_time=107.)
+    assert 5 == _run_tick(scheduled_topic, tick_time=112., done_time=113.)
+
+    stats = scheduled_topic.schedule_stats()
+    assert 2 == stats['ticks']
+    assert 0 == stats['missed_ticks']
+    assert 0.5 == stats['lateness']['max']
+
+
+def test_scheduled_topic__fixed_rate__next_tick_is_scheduled_against_the_deadline():
+    scheduled_topic = _scheduled_topic(fixed_rate=True)
+
+    assert 4 == _run_tick(scheduled_topic, tick_time=105., done_time=106.)
+    assert 3.5 == _run_tick(scheduled_topic, tick_time=110.5, done_time=111.5)
+    assert 0.5 == scheduled_topic.lateness.max
+
+
+@pytest.mark.parametrize('missed_ticks_policy, expected_delays, expected_missed_ticks', [
+    # the ticks of 110 and 115 run right away and the next one is at 120
+    (CATCH_UP, [0, 0, 1], 0),
+    # the ticks of 110 and 115 are dropped and the next one is at 120
+    (SKIP, [3, 4, 4], 2),
+    # the ticks of 110 and 115 are merged in one tick at 117 and the next one is at 122
+    (COALESCE, [0, 4, 4], 1),
+])
+def test_scheduled_topic__fixed_rate__missed_ticks__are_handled_according_to_the_policy(missed_ticks_policy,
+                                                                                      expected_delays,
+                                                                                      expected_missed_ticks):
+    scheduled_topic = _scheduled_topic(fixed_rate=True, missed_ticks_policy=missed_ticks_policy)
+
+    # the first tick takes 12 seconds and the next ones 1 second
+    delays = [_run_tick(scheduled_topic, tick_time=105., done_time=117.)]
+    done_time = 117.
+    for _ in range(2):
+        tick_time = done_time + delays[-1]
+        done_time = tick_time + 1
+        delays.append(_run_tick(scheduled_topic, tick_time=tick_time, done_time=done_time))
+
+    assert expected_delays == delays
+    assert expected_missed_ticks == scheduled_topic.missed_ticks
+
+
+def test_topic__cache_is_not_enabled__data_handler_is_called_every_time():
+    data_handler = Mock(return_value="data")
+    topic = Topic(topic_name='topic', data_handler=data_handler)
+
+    topic.get_data()
+    topic.get_data()
+
+    assert topic.cache is None
+    assert 2 == data_handler.call_count
+
+
+def test_topic__cache_is_enabled__data_handler_is_called_once_per_context():
+    data_handler = Mock(side_effect=lambda context=None: f"data of {context}")
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=data_handler, interval_in_sec=5,
+                                     cache_ttl_in_sec=10, cache_size=10)
+
+    assert "data of None" == scheduled_topic.get_data()
+    assert "data of None" == scheduled_topic.get_data()
+    assert "data of a" == scheduled_topic.get_data(context='a')
+    assert "data of a" == scheduled_topic.get_data(context='a')
+
+    assert 2 == data_handler.call_count
+    assert 2 == scheduled_topic.cache.hits
+    assert 10 == scheduled_topic.cache.max_size
+
+
+def test_topic__cache_is_enabled__unhashable_context__data_handler_is_called_every_time():
+    data_handler = Mock(return_value="data")
+    topic = Topic(topic_name='topic', data_handler=data_handler, cache_ttl_in_sec=10)
+
+    topic.get_data(context={'key': 'value'})
+    topic.get_data(context={'key': 'value'})
+
+    assert 2 == data_handler.call_count
+    assert 0 == len(topic.cache)
+
+
+def test_topic__cache_is_enabled__data_handler_error__is_not_cached():
+    data_handler = Mock(side_effect=[TopicDataHandlerError('error'), "data"])
+    topic = Topic(topic_name='topic', data_handler=data_handler, cache_ttl_in_sec=10)
+
+    with pytest.raises(TopicDataHandlerError):
+        topic.get_data()
+
+    assert "data" == topic.get_data()
+    assert "data" == topic.get_data()
+    assert 2 == data_handler.call_count
+
+
+def test_topic__get_data_async__cache_is_enabled__coroutine_is_awaited_once():
+    calls = []
+
+    async def data_handler(context=None):
+        calls.append(context)
+        return "data"
+
+    topic = Topic(topic_name='topic', data_handler=data_handler, cache_ttl_in_sec=10)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert "data" == loop.run_until_complete(topic.get_data_async())
+        assert "data" == loop.run_until_complete(topic.get_data_async())
+    finally:
+        loop.close()
+
+    assert [None] == calls
+
+
+def test_scheduled_topic__is_unchanged__skip_unchanged_is_disabled__false():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5)
+
+    assert scheduled_topic.is_unchanged("data") is False
+    assert scheduled_topic.is_unchanged("data") is False
+
+
+def _send_if_changed(scheduled_topic, data):
+    unchanged = scheduled_topic.is_unchanged(data)
+    if not unchanged:
+        scheduled_topic.mark_sent(data)
+
+    return unchanged
+
+
+def test_scheduled_topic__is_unchanged__same_body_as_last_sent__true():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, skip_unchanged=True)
+
+    assert _send_if_changed(scheduled_topic, {'flights': 1}) is False
+    assert _send_if_changed(scheduled_topic, {'flights': 1}) is True
+    assert _send_if_changed(scheduled_topic, {'flights': 2}) is False
+    assert _send_if_changed(scheduled_topic, {'flights': 2}) is True
+    assert 2 == scheduled_topic.schedule_stats()['unchanged_skips']
+
+
+def test_scheduled_topic__is_unchanged__data_are_not_marked_as_sent__false():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, skip_unchanged=True)
+
+    assert scheduled_topic.is_unchanged({'flights': 1}) is False
+    assert scheduled_topic.is_unchanged({'flights': 1}) is False
+
+    scheduled_topic.mark_sent({'flights': 1})
+
+    assert scheduled_topic.is_unchanged({'flights': 1}) is True
+
+
+def test_scheduled_topic__is_unchanged__body_cannot_be_encoded__false():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, skip_unchanged=True)
+
+    assert _send_if_changed(scheduled_topic, {1, 2}) is False
+    assert _send_if_changed(scheduled_topic, {1, 2}) is False
+
+
+def test_scheduled_fan_out_topic__is_unchanged__encode__subjects_are_encoded_one_by_one():
+    topic = ScheduledFanOutTopic(topic_name='flights', data_handler=Mock(), subjects=['flights.a', 'flights.b'],
+                                 interval_in_sec=5, skip_unchanged=True)
+    encode = Mock(side_effect=lambda data: str(sorted(data)))
+
+    topic.mark_sent({'flights.a': {1, 2}, 'flights.b': {3}}, encode=encode)
+
+    assert topic.is_unchanged({'flights.a': {2, 1}, 'flights.b': {3}}, encode=encode) is True
+    assert topic.is_unchanged({'flights.a': {1, 2}, 'flights.b': {4}}, encode=encode) is False
+    assert 6 == encode.call_count
+
+
+def test_scheduled_topic__is_unchanged__heartbeat_is_due__false():
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5, skip_unchanged=True,
+                                     heartbeat_in_sec=30)
+
+    # the clock is read upon every check after the first send and upon every send
+    with mock.patch('swim_pubsub.core.topics.topics.time.monotonic',
+                    side_effect=[100., 110., 129.9, 130., 130., 140.]):
+        assert [False, True, True, False, True] == [_send_if_changed(scheduled_topic, "data") for _ in range(5)]
+
+
+def test_scheduled_topic__trigger_message_send__unchanged_data__are_not_sent(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data", interval_in_sec=5,
+                                     skip_unchanged=True)
+    mock_message_send_handler = Mock()
+    scheduled_topic.set_message_send_callback(mock_message_send_handler)
+
+    scheduled_topic._trigger_message_send()
+    scheduled_topic._trigger_message_send()
+
+    mock_message_send_handler.assert_called_once_with(message="data", subject='topic')
+    assert "Skipped unchanged data of scheduled topic topic" == caplog.records[-1].message
+
+
+def test_topic__subjects__is_the_topic_name():
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+
+    assert ['topic'] == topic.subjects
+    assert [("data", 'topic')] == topic.split_data("data")
+
+
+def test_fan_out_topic__no_subjects__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        FanOutTopic(topic_name='airports', data_handler=lambda context=None: {}, subjects=[])
+    assert "No subjects were provided for fan-out topic airports" == str(e.value)
+
+
+def test_fan_out_topic__split_data__undeclared_subjects_are_skipped(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    topic = FanOutTopic(topic_name='airports', data_handler=Mock(), subjects=['EBBR', 'LFPG'])
+
+    messages = topic.split_data({'LFPG': "lfpg", 'EHAM': "eham", 'EBBR': "ebbr"})
+
+    assert [("lfpg", 'LFPG'), ("ebbr", 'EBBR')] == messages
+    assert "Skipped undeclared subject EHAM of fan-out topic airports" == caplog.records[-1].message
+
+
+@pytest.mark.parametrize('data', ["data", ["EBBR"], None])
+def test_fan_out_topic__get_data__data_handler_does_not_return_a_mapping__raises_topicdatahandlererror(data):
+    topic = FanOutTopic(topic_name='airports', data_handler=lambda context=None: data, subjects=['EBBR'])
+
+    with pytest.raises(TopicDataHandlerError) as e:
+        topic.get_data()
+    assert f"The data handler of fan-out topic airports should return a mapping of subject to data, " \
+           f"got {type(data).__name__}" == str(e.value)
+
+
+def test_fan_out_topic__get_data_async__data_are_fetched_once_for_all_subjects():
+    data_handler = Mock(return_value={'EBBR': "ebbr", 'LFPG': "lfpg"})
+
+    async def async_data_handler(context=None):
+        return data_handler(context=context)
+
+    topic = FanOutTopic(topic_name='airports', data_handler=async_data_handler, subjects=['EBBR', 'LFPG'])
+
+    data = asyncio.new_event_loop().run_until_complete(topic.get_data_async())
+
+    assert {'EBBR': "ebbr", 'LFPG': "lfpg"} == data
+    data_handler.assert_called_once_with(context=None)
+
+
+def test_scheduled_fan_out_topic__trigger_message_send__one_message_is_sent_per_subject():
+    scheduled_topic = ScheduledFanOutTopic(topic_name='airports',
+                                           data_handler=lambda context=None: {'EBBR': "ebbr", 'LFPG': "lfpg"},
+                                           subjects=['EBBR', 'LFPG'],
+                                           interval_in_sec=5)
+    mock_message_send_handler = Mock()
+    scheduled_topic.set_message_send_callback(mock_message_send_handler)
+
+    scheduled_topic._trigger_message_send()
+
+    assert [mock.call(message="ebbr", subject='EBBR'), mock.call(message="lfpg", subject='LFPG')] == \
+        mock_message_send_handler.call_args_list
+
+
+@pytest.mark.parametrize('kwargs', [{'cache_ttl_in_sec': 10}, {'single_flight': True}])
+def test_streaming_topic__cache_or_single_flight__raise_valueerror(kwargs):
+    with pytest.raises(ValueError) as e:
+        StreamingTopic(topic_name='flights', data_handler=lambda context=None: [], **kwargs)
+    assert "Streaming topic flights cannot cache or share its data" == str(e.value)
+
+
+def test_scheduled_streaming_topic__skip_unchanged__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        ScheduledStreamingTopic(topic_name='flights', data_handler=lambda context=None: [], interval_in_sec=5,
+                                skip_unchanged=True)
+    assert "Streaming topic flights cannot skip unchanged data" == str(e.value)
+
+
+@pytest.mark.parametrize('data', ["data", b"data", {'flight': 1}, 1, None])
+def test_streaming_topic__get_data__data_handler_does_not_return_an_iterable__raises_topicdatahandlererror(data):
+    topic = StreamingTopic(topic_name='flights', data_handler=lambda context=None: data)
+
+    with pytest.raises(TopicDataHandlerError) as e:
+        topic.get_data()
+    assert f"The data handler of streaming topic flights should return an iterable of data, " \
+           f"got {type(data).__name__}" == str(e.value)
+
+
+def test_streaming_topic__get_data__returns_an_iterator_of_the_items():
+    topic = StreamingTopic(topic_name='flights', data_handler=lambda context=None: [1, 2])
+
+    data = topic.get_data()
+
+    assert [1, 2] == list(data)
+    assert [] == list(data)
+
+
+@pytest.mark.parametrize('priority', [-1, 256, 1.5, '9'])
+def test_topic__invalid_priority__raise_valueerror(priority):
+    with pytest.raises(ValueError) as e:
+        Topic(topic_name='topic', data_handler=lambda context=None: "data", priority=priority)
+    assert f"priority should be an integer between 0 and 255, got {priority}" == str(e.value)
+
+
+@pytest.mark.parametrize('rate_limit_policy', ['invalid', 'drop_oldest'])
+def test_topic__invalid_rate_limit_policy__raise_valueerror(rate_limit_policy):
+    with pytest.raises(ValueError) as e:
+        Topic(topic_name='topic', data_handler=lambda context=None: "data", rate_limit_policy=rate_limit_policy)
+    assert f"Invalid rate limit policy: {rate_limit_policy}" == str(e.value)
+
+
+def test_topic__delta_with_binary_codec__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        Topic(topic_name='topic', data_handler=lambda context=None: "data", delta=True, codec='msgpack')
+    assert "Topic topic in delta mode can only use the json codec, got msgpack" == str(e.value)
+
+
+def test_topic__invalid_compression__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        Topic(topic_name='topic', data_handler=lambda context=None: "data", compression='gzip')
+    assert "Invalid compression: gzip" == str(e.value)
@@ -27,5 +27,61 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import datetime
+import json
+
+import pytest
+from proton import Message
+
+from swim_pubsub.core.topics.utils import is_hashable, copy_topic_data, body_digest
 
 __author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, True), ('str', True), ((1, 2), True), ({}, False), ([], False)
+])
+def test_is_hashable(value, expected):
+    assert expected == is_hashable(value)
+
+
+def test_copy_topic_data__message__is_copied():
+    message = Message(body='data', subject='topic')
+
+    copied = copy_topic_data(message)
+
+    assert copied is not message
+    assert 'data' == copied.body
+    assert 'topic' == copied.subject
+
+
+def test_copy_topic_data__other_data__are_returned_as_is():
+    data = {'key': 'value'}
+
+    assert data is copy_topic_data(data)
+
+
+
+def test_body_digest__same_body__same_digest():
+    assert body_digest({'key': 'value'}) == body_digest(Message(body={'key': 'value'}, subject='topic'))
+    assert body_digest("data") == body_digest("data")
+
+
+def test_body_digest__different_body__different_digest():
+    assert body_digest({'key': 'value'}) != body_digest({'key': 'other value'})
+    assert body_digest("1") != body_digest(1)
+
+
+def test_body_digest__encode__digest_of_the_encoded_payload():
+    def encode(data):
+        return json.dumps(data, default=str)
+
+    data = {'time': datetime.datetime(2020, 1, 1)}
+
+    assert body_digest(data, encode) == body_digest({'time': '2020-01-01 00:00:00'}, encode)
+    assert body_digest(data, encode) != body_digest({'time': datetime.datetime(2020, 1, 2)}, encode)
+
+
+@pytest.mark.parametrize('encode', [None, json.dumps])
+def test_body_digest__body_cannot_be_encoded__none(encode):
+    assert body_digest({'time': datetime.datetime(2020, 1, 1)}, encode) is None
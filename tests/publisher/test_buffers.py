@@ -0,0 +1,222 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pytest
+
+from proton import Message
+
+from swim_pubsub.core.delta import DeltaEncoder
+from swim_pubsub.publisher.buffers import OutboundBuffer, ConflatingBuffer, PriorityBuffer, FairBuffer, DROP_OLDEST, \
+    DROP_NEWEST, STRICT, WEIGHTED
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_outbound_buffer__negative_max_size__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        OutboundBuffer(max_size=-1)
+    assert "max_size should be a non negative integer, got -1" == str(e.value)
+
+
+def test_outbound_buffer__invalid_overflow_policy__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        OutboundBuffer(overflow_policy='invalid')
+    assert "Invalid overflow policy: invalid" == str(e.value)
+
+
+def test_outbound_buffer__put_and_get__fifo_order_and_counters():
+    buffer = OutboundBuffer(max_size=3)
+
+    for message in ['m1', 'm2', 'm3']:
+        assert buffer.put(message) is None
+
+    assert 3 == len(buffer)
+    assert 'm1' == buffer.get()
+    assert 'm2' == buffer.get()
+
+    assert {'size': 1, 'max_size': 3, 'buffered': 3, 'drained': 2, 'dropped': 0} == buffer.stats()
+
+
+@pytest.mark.parametrize('overflow_policy, expected_dropped, expected_messages', [
+    (DROP_OLDEST, 'm1', ['m2', 'm3']),
+    (DROP_NEWEST, 'm3', ['m1', 'm2']),
+])
+def test_outbound_buffer__full__applies_overflow_policy(overflow_policy, expected_dropped, expected_messages):
+    buffer = OutboundBuffer(max_size=2, overflow_policy=overflow_policy)
+
+    buffer.put('m1')
+    buffer.put('m2')
+    dropped = buffer.put('m3')
+
+    assert expected_dropped == dropped
+    assert 1 == buffer.dropped
+    assert expected_messages == [buffer.get() for _ in range(len(buffer))]
+
+
+def test_outbound_buffer__max_size_zero__every_message_is_dropped():
+    buffer = OutboundBuffer(max_size=0)
+
+    assert 'm1' == buffer.put('m1')
+    assert 0 == len(buffer)
+    assert 1 == buffer.dropped
+    assert 0 == buffer.buffered
+
+
+def _message(body, subject):
+    return Message(body=body, subject=subject)
+
+
+def test_conflating_buffer__put__latest_message_per_subject_replaces_the_buffered_one_in_place():
+    buffer = ConflatingBuffer(max_size=10)
+    old_a, b, new_a = _message(1, 'a'), _message(2, 'b'), _message(3, 'a')
+
+    assert buffer.put(old_a) is None
+    assert buffer.put(b) is None
+    assert old_a is buffer.put(new_a)
+
+    assert 2 == len(buffer)
+    assert [new_a, b] == [buffer.get() for _ in range(len(buffer))]
+    assert {'size': 0, 'max_size': 10, 'buffered': 3, 'drained': 2, 'dropped': 0, 'conflated': 1} == buffer.stats()
+
+
+@pytest.mark.parametrize('overflow_policy, expected_dropped, expected_subjects', [
+    (DROP_OLDEST, 'a', ['b', 'c']),
+    (DROP_NEWEST, 'c', ['a', 'b']),
+])
+def test_conflating_buffer__full_of_subjects__applies_overflow_policy(overflow_policy, expected_dropped,
+                                                                      expected_subjects):
+    buffer = ConflatingBuffer(max_size=2, overflow_policy=overflow_policy)
+
+    buffer.put(_message(1, 'a'))
+    buffer.put(_message(2, 'b'))
+    # conflation does not overflow
+    buffer.put(_message(3, 'b'))
+    dropped = buffer.put(_message(4, 'c'))
+
+    assert expected_dropped == dropped.subject
+    assert 1 == buffer.dropped
+    assert expected_subjects == [buffer.get().subject for _ in range(len(buffer))]
+
+
+def test_conflating_buffer__delta_messages__are_not_conflated():
+    buffer = ConflatingBuffer(max_size=10)
+    encoder = DeltaEncoder()
+
+    messages = [encoder.encode(_message({'flights': i}, 'a')) for i in range(3)]
+    for message in messages:
+        assert buffer.put(message) is None
+
+    assert messages == [buffer.get() for _ in range(len(buffer))]
+    assert 0 == buffer.conflated
+
+
+def _prioritized_message(body, priority, subject='topic'):
+    return Message(body=body, subject=subject, priority=priority)
+
+
+def test_priority_buffer__invalid_scheduling__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        PriorityBuffer(scheduling='invalid')
+    assert "Invalid priority scheduling: invalid" == str(e.value)
+
+
+def test_priority_buffer__strict__highest_priority_lane_is_drained_first():
+    buffer = PriorityBuffer(max_size=10, scheduling=STRICT)
+
+    for body, priority in [('bulk1', 1), ('normal', 4), ('bulk2', 1), ('urgent', 9)]:
+        buffer.put(_prioritized_message(body, priority))
+
+    assert ['urgent', 'normal', 'bulk1', 'bulk2'] == [buffer.get().body for _ in range(len(buffer))]
+
+
+def test_priority_buffer__weighted__lanes_take_turns_in_proportion_to_their_priority():
+    buffer = PriorityBuffer(max_size=100, scheduling=WEIGHTED)
+
+    for i in range(20):
+        buffer.put(_prioritized_message(f'high{i}', 2))
+        buffer.put(_prioritized_message(f'low{i}', 0))
+
+    drained = [buffer.get().body for _ in range(8)]
+
+    # weights 3:1
+    assert 6 == len([body for body in drained if body.startswith('high')])
+    assert 2 == len([body for body in drained if body.startswith('low')])
+    assert ['high0', 'high1', 'high2', 'high3', 'high4', 'high5'] == [b for b in drained if b.startswith('high')]
+
+
+def test_priority_buffer__lanes_are_bounded_separately_and_stats_are_aggregated():
+    buffer = PriorityBuffer(max_size=1, lane_class=ConflatingBuffer)
+
+    assert buffer.put(_prioritized_message('old', 9, subject='a')) is None
+    assert 'old' == buffer.put(_prioritized_message('new', 9, subject='a')).body
+    assert buffer.put(_prioritized_message('bulk', 1, subject='b')) is None
+    assert 'bulk' == buffer.put(_prioritized_message('bulk2', 1, subject='c')).body
+
+    stats = buffer.stats()
+    assert {'size': 2, 'max_size': 1, 'buffered': 4, 'drained': 0, 'dropped': 1} == \
+        {key: value for key, value in stats.items() if key != 'lanes'}
+    assert [9, 1] == list(stats['lanes'])
+    assert 1 == stats['lanes'][9]['conflated']
+
+
+def _fair_buffer(weights, max_size=100):
+    return FairBuffer(lane_factory=lambda: OutboundBuffer(max_size=max_size),
+                      client_of=lambda message: message.subject.split('.')[0],
+                      weight_of=lambda client: weights.get(client, 1))
+
+
+def test_fair_buffer__clients_get_turns_in_proportion_to_their_weights():
+    buffer = _fair_buffer({'greedy': 1, 'other': 2})
+
+    for i in range(10):
+        buffer.put(_message(i, 'greedy.topic'))
+    for i in range(4):
+        buffer.put(_message(i, 'other.topic'))
+
+    drained = [buffer.get().subject.split('.')[0] for _ in range(6)]
+
+    assert 4 == drained.count('other')
+    assert 2 == drained.count('greedy')
+    assert 8 == buffer.backlog('greedy')
+    assert 0 == buffer.backlog('other')
+
+
+def test_fair_buffer__lanes_are_bounded_per_client():
+    buffer = _fair_buffer({}, max_size=2)
+
+    for i in range(5):
+        buffer.put(_message(i, 'greedy.topic'))
+    assert buffer.put(_message(0, 'other.topic')) is None
+
+    stats = buffer.stats()
+    assert 3 == stats['size']
+    assert 3 == stats['dropped']
+    assert {'greedy', 'other'} == set(stats['clients'])
+    assert 1 == buffer.backlog('other')
+    assert 0 == buffer.backlog('unknown')
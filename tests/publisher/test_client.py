@@ -35,8 +35,9 @@ import pytest
 from rest_client.errors import APIError
 from subscription_manager_client.models import Topic as SMTopic
 
+from swim_pubsub.core.codecs import create_default_registry
 from swim_pubsub.core.errors import PubSubClientError
-from swim_pubsub.core.topics.topics import Topic
+from swim_pubsub.core.topics.topics import Topic, FanOutTopic
 from swim_pubsub.publisher import Publisher
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -106,6 +107,24 @@ def test_publisher__register_topic__sm_error__raises_ClientError():
     assert topic not in publisher.topics_dict.values()
 
 
+def test_publisher__register_topic__unknown_codec__raises_clienterror_before_creating_the_topic():
+    broker_handler = mock.Mock()
+    broker_handler.codec_registry = create_default_registry()
+    sm_service = mock.Mock()
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data", codec='jsno')
+
+    publisher = Publisher(broker_handler, sm_service)
+
+    with pytest.raises(PubSubClientError) as e:
+        publisher.register_topic(topic)
+    assert "Error while registering topic topic: Unknown codec: jsno" == str(e.value)
+
+    sm_service.create_topic.assert_not_called()
+    broker_handler.add_topic.assert_not_called()
+    assert topic not in publisher.topics_dict.values()
+
+
 def test_publisher__register_topic__topic_does_not_exist_and_is_registered_in_broker_handler_and_sm():
     broker_handler = mock.Mock()
     sm_service = mock.Mock()
@@ -159,6 +178,45 @@ def test_publish_topic__topic_exists_and_broker_handler_is_called():
     mock_trigger_topic.assert_called_once_with(topic=topic, context=context)
 
 
+def test_publish_many__invalid_topic_ids__raises_clienterror_and_nothing_is_published():
+    broker_handler = mock.Mock()
+    sm_service = mock.Mock()
+
+    def data_handler(context=None): return "data"
+
+    topic = Topic(topic_name='topic', data_handler=data_handler)
+
+    publisher = Publisher(broker_handler, sm_service)
+    publisher.register_topic(topic)
+
+    with pytest.raises(PubSubClientError) as e:
+        publisher.publish_many([('topic', None), ('invalid1', None), ('invalid2', None)])
+    assert f"Invalid topic ids: invalid1, invalid2" == str(e.value)
+
+    broker_handler.trigger_topics.assert_not_called()
+
+
+def test_publish_many__topics_exist_and_broker_handler_is_called():
+    broker_handler = mock.Mock()
+    sm_service = mock.Mock()
+
+    def data_handler(context=None): return "data"
+
+    topic1 = Topic(topic_name='topic1', data_handler=data_handler)
+    topic2 = Topic(topic_name='topic2', data_handler=data_handler)
+
+    publisher = Publisher(broker_handler, sm_service)
+    publisher.register_topic(topic1)
+    publisher.register_topic(topic2)
+
+    broker_handler.trigger_topics = Mock(return_value=['sent', 'buffered'])
+
+    outcomes = publisher.publish_many([('topic1', {}), ('topic2', None)])
+
+    assert ['sent', 'buffered'] == outcomes
+    broker_handler.trigger_topics.assert_called_once_with(topics=[(topic1, {}), (topic2, None)])
+
+
 def test_publisher__sync_topics():
 
     broker_handler = mock.Mock()
@@ -201,3 +259,38 @@ def test_publisher__sync_topics():
     assert 3 == mock_sm_create_topic.call_count
     for c in [call(topic_name='topic1'), call(topic_name='topic2'), call(topic_name='topic3')]:
         assert c in mock_sm_create_topic.mock_calls
+
+
+def test_publisher__register_topic__fan_out_topic__one_sm_topic_is_created_per_subject():
+    broker_handler = mock.Mock()
+    sm_service = mock.Mock()
+
+    topic = FanOutTopic(topic_name='airports', data_handler=lambda context=None: {}, subjects=['EBBR', 'LFPG'])
+
+    publisher = Publisher(broker_handler, sm_service)
+    publisher.register_topic(topic)
+
+    assert [call(topic_name='EBBR'), call(topic_name='LFPG')] == sm_service.create_topic.call_args_list
+    assert topic == publisher.topics_dict['airports']
+    broker_handler.add_topic.assert_called_once_with(topic)
+
+
+def test_publisher__register_topic__topic_is_assigned_to_the_publisher_in_the_broker_handler():
+    broker_handler = mock.Mock()
+    sm_service = mock.Mock()
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+
+    publisher = Publisher(broker_handler, sm_service)
+    publisher.register_topic(topic)
+
+    broker_handler.assign_topic.assert_called_once_with(topic, publisher.client_id)
+
+
+def test_publisher__set_weight__client_is_added_in_the_broker_handler_with_the_weight():
+    broker_handler = mock.Mock()
+
+    publisher = Publisher(broker_handler, mock.Mock())
+    publisher.set_weight(2)
+
+    broker_handler.add_client.assert_called_once_with(publisher.client_id, 2)
@@ -0,0 +1,153 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import copy
+import pickle
+from unittest import mock
+
+import proton
+import pytest
+
+from swim_pubsub.publisher.encoded import EncodedMessageCache, PreEncodedMessage, is_same_data
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _message(body, subject='topic'):
+    return proton.Message(body=body, subject=subject, content_type='application/json', priority=7)
+
+
+def test_encoded_message_cache__get__same_data__returns_a_new_pre_encoded_message_of_the_cached_bytes():
+    cache = EncodedMessageCache()
+    cached = cache.put('topic', 'data', 'application/json', _message('data'))
+
+    pre_encoded = cache.get('topic', 'data', 'application/json')
+
+    assert pre_encoded is not cached
+    assert cached.encoded is pre_encoded.encoded
+    assert ('topic', 'application/json', 7) == (pre_encoded.subject, pre_encoded.content_type, pre_encoded.priority)
+
+    decoded = proton.Message()
+    decoded.decode(pre_encoded.encode())
+    assert 'data' == decoded.body
+    assert 'topic' == decoded.subject
+
+
+@pytest.mark.parametrize('data, content_type', [
+    ('other data', 'application/json'),
+    ('data', 'text/plain'),
+    (b'data', 'application/json'),
+])
+def test_encoded_message_cache__get__different_data_or_content_type__returns_none(data, content_type):
+    cache = EncodedMessageCache()
+    cache.put('topic', 'data', 'application/json', _message('data'))
+
+    assert cache.get('topic', data, content_type) is None
+    assert cache.get('other_topic', 'data', 'application/json') is None
+
+
+@pytest.mark.parametrize('data, other', [
+    (1, 1.0),
+    (1, True),
+    ([1.0, 2.0], [1, 2]),
+    ({'alt': 1.0, 'on_ground': 1}, {'alt': 1, 'on_ground': True}),
+    ({'a': 1, 'b': 2}, {'b': 2, 'a': 1}),
+    ({1: 'a'}, {1.0: 'a'}),
+])
+def test_is_same_data__data_are_equal_but_encoded_differently__returns_false(data, other):
+    assert data == other
+    assert not is_same_data(data, other)
+
+
+@pytest.mark.parametrize('data', ['data', b'data', [1, 2.0, True, None], {'flights': [{'icao24': 'abc', 'alt': 1.5}]}])
+def test_is_same_data__identical_data__returns_true(data):
+    assert is_same_data(data, copy.deepcopy(data))
+
+
+def test_encoded_message_cache__get__data_equal_but_of_other_types__returns_none():
+    cache = EncodedMessageCache()
+    cache.put('topic', [1.0, 2.0], 'application/json', _message([1.0, 2.0]))
+
+    assert cache.get('topic', [1, 2], 'application/json') is None
+
+
+def test_encoded_message_cache__put__mutable_data_are_copied__later_changes_are_not_missed():
+    cache = EncodedMessageCache()
+    data = {'flights': [1, 2]}
+    cache.put('topic', data, 'application/json', _message(data))
+
+    data['flights'].append(3)
+
+    assert cache.get('topic', data, 'application/json') is None
+
+
+def test_encoded_message_cache__data_cannot_be_pickled__are_not_cached():
+    cache = EncodedMessageCache()
+    data = {'handler': lambda: None}
+    cache.put('topic', data, 'application/json', _message('data'))
+
+    assert cache.get('topic', data, 'application/json') is None
+    assert 0 == len(cache)
+
+
+def test_encoded_message_cache__put__after_a_miss__the_data_are_not_pickled_again():
+    cache = EncodedMessageCache()
+    data = {'flights': [1, 2]}
+
+    with mock.patch('swim_pubsub.publisher.encoded.pickle.dumps', wraps=pickle.dumps) as dumps:
+        assert cache.get('topic', data, 'application/json') is None
+        cache.put('topic', data, 'application/json', _message(data))
+        assert cache.get('topic', {'flights': [1, 2]}, 'application/json') is not None
+
+    assert 2 == dumps.call_count
+
+
+def test_encoded_message_cache__stats():
+    cache = EncodedMessageCache()
+    pre_encoded = cache.put('topic', 'data', 'application/json', _message('data'))
+
+    cache.get('topic', 'data', 'application/json')
+    cache.get('topic', 'other data', 'application/json')
+
+    assert {'subjects': 1, 'hits': 1, 'misses': 1, 'bytes': len(pre_encoded.encoded)} == cache.stats()
+
+
+@pytest.mark.parametrize('settle_mode, settled', [(proton.Link.SND_SETTLED, True), (proton.Link.SND_UNSETTLED, False)])
+def test_pre_encoded_message__send__encoded_bytes_are_streamed_in_a_new_delivery(settle_mode, settled):
+    sender = mock.Mock()
+    sender.snd_settle_mode = settle_mode
+    pre_encoded = PreEncodedMessage('topic', 'application/json', 4, b'encoded')
+
+    delivery = pre_encoded.send(sender)
+
+    assert sender.delivery.return_value is delivery
+    sender.delivery.assert_called_once_with(sender.delivery_tag.return_value)
+    sender.stream.assert_called_once_with(b'encoded')
+    sender.advance.assert_called_once_with()
+    assert settled == delivery.settle.called
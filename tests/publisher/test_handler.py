@@ -27,21 +27,50 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import asyncio
+import datetime
+import json
 import logging
+import threading
+import time
 from unittest import mock
 from unittest.mock import Mock
 
 import pytest
-from proton import Message
+from proton import Message, Delivery
+from proton.reactor import AtMostOnce
 
 from swim_pubsub.core.broker_handlers import BrokerHandler
+from swim_pubsub.core.codecs import CodecError, JSONCodec, create_default_registry
+from swim_pubsub.core.compression import ZLIB, LZMA, COMPRESSED_TEXT_PROPERTY, create_decompressor
+from swim_pubsub.publisher.encoded import PreEncodedMessage
+from swim_pubsub.core.delta import SNAPSHOT, DELTA, DELTA_KIND_PROPERTY, DELTA_SEQUENCE_PROPERTY
 from swim_pubsub.core.errors import BrokerHandlerError
-from swim_pubsub.core.topics.topics import ScheduledTopic, Topic, TopicDataHandlerError
+from swim_pubsub.core.topics.topics import ScheduledTopic, Topic, TopicDataHandlerError, AT_MOST_ONCE, \
+    AT_LEAST_ONCE, FanOutTopic, ScheduledFanOutTopic, StreamingTopic, ScheduledStreamingTopic, CONFLATE, DROP
 from swim_pubsub.publisher import PublisherBrokerHandler
+from swim_pubsub.publisher.buffers import DROP_NEWEST, STRICT
+from swim_pubsub.publisher.handler import SENT, BUFFERED, DROPPED, FAILED, PER_TOPIC, ACCEPTED, REJECTED, \
+    RELEASED, MODIFIED, SKIPPED, TIMED_OUT, UNCHANGED, THROTTLED
+from swim_pubsub.subscriber import SubscriberBrokerHandler
 
 __author__ = "EUROCONTROL (SWIM)"
 
 
+def _mock_sender(credit):
+    """
+    A sender whose credit is consumed upon sending
+    """
+    sender = Mock()
+    sender.credit = credit
+
+    def send(_):
+        sender.credit -= 1
+    sender.send = Mock(side_effect=send)
+
+    return sender
+
+
 def test_send_message__no_credit__message_is_not_sent_and_logs_message(caplog):
     caplog.set_level(logging.DEBUG)
 
@@ -59,6 +88,86 @@ def test_send_message__no_credit__message_is_not_sent_and_logs_message(caplog):
     assert f"No credit to send message {message}..." == log_message.message
 
 
+def test_send_message__no_credit__message_is_buffered():
+    handler = PublisherBrokerHandler(mock.Mock())
+    mock_sender = Mock()
+    mock_sender.credit = 0
+    handler._sender = mock_sender
+
+    message = Message(body="topic data")
+
+    handler.send_message(message=message, subject="subject")
+
+    mock_sender.send.assert_not_called()
+    assert 1 == len(handler.outbound_buffer)
+    assert 1 == handler.outbound_buffer.buffered
+
+
+def test_send_message__no_credit_and_buffer_is_full__message_is_dropped_and_logs_message(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock(), buffer_size=1, buffer_overflow_policy=DROP_NEWEST)
+    mock_sender = Mock()
+    mock_sender.credit = 0
+    handler._sender = mock_sender
+
+    message1 = Message(body="topic data 1")
+    message2 = Message(body="topic data 2")
+
+    handler.send_message(message=message1, subject="subject")
+    handler.send_message(message=message2, subject="subject")
+
+    assert 1 == len(handler.outbound_buffer)
+    assert 1 == handler.outbound_buffer.dropped
+
+    log_message = caplog.records[-1]
+    assert f"Outbound buffer is full, dropped message {message2}"[:100] + "..." == log_message.message
+
+
+def test_send_message__credit_and_pending_buffered_messages__messages_are_sent_in_order():
+    handler = PublisherBrokerHandler(mock.Mock())
+    mock_sender = Mock()
+    mock_sender.credit = 2
+    handler._sender = mock_sender
+
+    message1 = Message(body="topic data 1")
+    message2 = Message(body="topic data 2")
+    handler.outbound_buffer.put(message1)
+
+    handler.send_message(message=message2, subject="subject")
+
+    assert [mock.call(message1), mock.call(message2)] == mock_sender.send.call_args_list
+    assert 0 == len(handler.outbound_buffer)
+
+
+def test_on_sendable__buffered_messages_are_sent_as_long_as_there_is_credit():
+    handler = PublisherBrokerHandler(mock.Mock())
+    mock_sender = Mock()
+    mock_sender.credit = 0
+    handler._sender = mock_sender
+
+    messages = [Message(body=f"topic data {i}") for i in range(3)]
+    for message in messages:
+        handler.send_message(message=message, subject="subject")
+
+    mock_sender.send.assert_not_called()
+
+    # the broker grants credit for 2 messages
+    mock_sender.credit = 2
+
+    def send(_):
+        mock_sender.credit -= 1
+    mock_sender.send = Mock(side_effect=send)
+
+    event = Mock()
+    event.sender = mock_sender
+    handler.on_sendable(event)
+
+    assert [mock.call(messages[0]), mock.call(messages[1])] == mock_sender.send.call_args_list
+    assert 1 == len(handler.outbound_buffer)
+    assert 2 == handler.outbound_buffer.drained
+
+
 def test_send_message__enough_credit__message_is_sent_and_logs_message(caplog):
     caplog.set_level(logging.DEBUG)
 
@@ -103,6 +212,58 @@ def test_send_message__data_not_message_instance__message_is_converted_and_sent_
     assert f"Message sent: {message}..." == log_message.message
 
 
+def test_send_batch__credit_is_checked_once_and_the_rest_messages_are_buffered_or_dropped(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock(), buffer_size=1, buffer_overflow_policy=DROP_NEWEST)
+    mock_sender = Mock()
+    mock_sender.credit = 2
+    handler._sender = mock_sender
+
+    messages = [(Message(body=f"data {i}"), f"subject{i}") for i in range(4)]
+
+    outcomes = handler.send_batch(messages)
+
+    assert [SENT, SENT, BUFFERED, DROPPED] == outcomes
+    assert [mock.call(messages[0][0]), mock.call(messages[1][0])] == mock_sender.send.call_args_list
+    assert ["subject0", "subject1", "subject2", "subject3"] == [message.subject for message, _ in messages]
+
+    assert "Batch of 4 message(s): 2 sent, 1 buffered, 1 dropped" == caplog.records[-1].message
+
+
+def test_send_batch__pending_buffered_messages_are_sent_first():
+    handler = PublisherBrokerHandler(mock.Mock())
+    mock_sender = Mock()
+    mock_sender.credit = 1
+
+    def send(_):
+        mock_sender.credit -= 1
+    mock_sender.send = Mock(side_effect=send)
+    handler._sender = mock_sender
+
+    pending_message = Message(body="pending")
+    handler.outbound_buffer.put(pending_message)
+
+    outcomes = handler.send_batch([(Message(body="data"), "subject")])
+
+    assert [BUFFERED] == outcomes
+    mock_sender.send.assert_called_once_with(pending_message)
+
+
+def test_trigger_topics__data_handler_errors_are_reported_and_the_rest_are_sent_in_batch():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.send_batch = Mock(return_value=[SENT, BUFFERED])
+
+    topic1 = Topic(topic_name='topic1', data_handler=lambda context=None: "data1")
+    topic2 = Topic(topic_name='topic2', data_handler=Mock(side_effect=TopicDataHandlerError('error')))
+    topic3 = Topic(topic_name='topic3', data_handler=lambda context=None: context)
+
+    outcomes = handler.trigger_topics([(topic1, None), (topic2, None), (topic3, "data3")])
+
+    assert [SENT, FAILED, BUFFERED] == outcomes
+    handler.send_batch.assert_called_once_with([("data1", "topic1"), ("data3", "topic3")])
+
+
 def test_add_topic__topic_is_added():
     handler = PublisherBrokerHandler(mock.Mock())
 
@@ -230,3 +391,1495 @@ def test_on_start__no_errors():
 
         assert sender == handler._sender
         mock_init_scheduled_topic.assert_called_once_with(scheduled_topic)
+
+
+@pytest.mark.parametrize('sender_links', [0, -1, 'invalid', 1.5])
+def test_publisher_broker_handler__invalid_sender_links__raises_valueerror(sender_links):
+    with pytest.raises(ValueError) as e:
+        PublisherBrokerHandler(mock.Mock(), sender_links=sender_links)
+    assert f"sender_links should be a positive integer or 'per_topic', got {sender_links}" == str(e.value)
+
+
+def test_on_start__sharded_links__a_sender_is_created_per_link():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=3)
+    senders = [Mock(), Mock(), Mock()]
+    handler._create_sender = Mock(side_effect=senders)
+
+    with mock.patch.object(BrokerHandler, 'on_start'):
+        handler.on_start(Mock())
+
+    assert 3 == handler._create_sender.call_count
+    assert senders == [link.sender for link in handler._links.values()]
+    assert senders[0] == handler._sender
+
+
+def test_send_message__sharded_links__subjects_are_hashed_consistently_across_links():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=4)
+    for link in handler._links.values():
+        sender = Mock()
+        sender.credit = 10
+        handler._open_link(link, sender)
+
+    subjects = [f"subject{i}" for i in range(20)]
+    for subject in subjects * 2:
+        handler.send_message(message="data", subject=subject)
+
+    used_links = [link for link in handler._links.values() if link.sent]
+    assert 1 < len(used_links)
+    assert 40 == sum(link.sent for link in used_links)
+    for subject in subjects:
+        assert handler._get_link(subject) is handler._get_link(subject)
+        assert 0 == handler._get_link(subject).sent % 2
+
+
+def test_send_message__per_topic_links__each_topic_uses_its_own_link():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=PER_TOPIC)
+
+    busy_topic = Topic(topic_name='busy', data_handler=lambda context=None: "data")
+    quiet_topic = Topic(topic_name='quiet', data_handler=lambda context=None: "data")
+    handler.add_topic(busy_topic)
+    handler.add_topic(quiet_topic)
+
+    for link in handler._links.values():
+        handler._open_link(link, _mock_sender(credit=1))
+
+    # the busy topic consumes the credit of its own link only
+    assert SENT == handler.send_message(message="data", subject='busy')
+    assert BUFFERED == handler.send_message(message="data", subject='busy')
+    assert SENT == handler.send_message(message="data", subject='quiet')
+    assert SENT == handler.send_message(message="data", subject='not_registered')
+
+    assert {'default': 1, 'topic:busy': 1, 'topic:quiet': 1} == {name: link.sent
+                                                                for name, link in handler._links.items()}
+
+
+def test_add_topic__per_topic_links_and_handler_started__sender_fails__falls_back_to_default_link(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=PER_TOPIC)
+    handler.started = True
+    handler._create_sender = Mock(side_effect=BrokerHandlerError('proton error'))
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+    handler.add_topic(topic)
+
+    assert handler._default_link is handler._get_link('topic')
+    assert "Error while creating sender for link topic:topic: proton error" == caplog.records[0].message
+
+
+def test_on_sendable__only_the_link_of_the_sender_is_drained():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=2)
+    link1, link2 = handler._links.values()
+    sender1, sender2 = Mock(), Mock()
+    sender1.credit = sender2.credit = 5
+    handler._open_link(link1, sender1)
+    handler._open_link(link2, sender2)
+
+    link1.buffer.put(Message(body="data1"))
+    link2.buffer.put(Message(body="data2"))
+
+    event = Mock()
+    event.sender = sender2
+    handler.on_sendable(event)
+
+    assert 1 == len(link1.buffer)
+    assert 0 == len(link2.buffer)
+    sender1.send.assert_not_called()
+    sender2.send.assert_called_once()
+
+
+def test_link_stats():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=2)
+
+    stats = handler.link_stats()
+
+    assert ['default', 'shard-1'] == [link_stats['name'] for link_stats in stats]
+    assert {'name', 'delivery_mode', 'credit', 'sent', 'throughput', 'buffer'} == set(stats[0].keys())
+
+
+def test_send_message__track_deliveries__future_is_resolved_upon_acceptance_and_latency_is_recorded():
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True)
+    sender = Mock()
+    sender.credit = 1
+    delivery = Mock()
+    sender.send.return_value = delivery
+    handler._sender = sender
+
+    future = handler.send_message(message="data", subject="subject")
+
+    assert not future.done()
+    assert 1 == handler.in_flight
+
+    event = Mock()
+    event.delivery = delivery
+    handler.on_accepted(event)
+
+    assert ACCEPTED == future.result(timeout=0)
+    assert 0 == handler.in_flight
+    assert 1 == handler.delivery_outcomes[ACCEPTED]
+    assert 1 == handler.accept_latency.count
+
+
+@pytest.mark.parametrize('remote_state, expected_outcome', [
+    (Delivery.RELEASED, RELEASED),
+    (Delivery.MODIFIED, MODIFIED),
+])
+def test_on_released__track_deliveries__future_is_resolved_with_the_respective_outcome(remote_state,
+                                                                                       expected_outcome):
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True)
+    sender = Mock()
+    sender.credit = 1
+    handler._sender = sender
+
+    future = handler.send_message(message="data", subject="subject")
+
+    event = Mock()
+    event.delivery = sender.send.return_value
+    event.delivery.remote_state = remote_state
+    handler.on_released(event)
+
+    assert expected_outcome == future.result(timeout=0)
+    assert 1 == handler.delivery_outcomes[expected_outcome]
+    assert 0 == handler.accept_latency.count
+
+
+def test_on_rejected__track_deliveries__future_is_resolved():
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True)
+    sender = Mock()
+    sender.credit = 1
+    handler._sender = sender
+
+    future = handler.send_message(message="data", subject="subject")
+
+    event = Mock()
+    event.delivery = sender.send.return_value
+    handler.on_rejected(event)
+
+    assert REJECTED == future.result(timeout=0)
+
+
+def test_send_message__track_deliveries__buffered_message_is_tracked_once_sent_or_resolved_when_dropped():
+    handler = PublisherBrokerHandler(mock.Mock(), buffer_size=1, track_deliveries=True)
+    sender = Mock()
+    sender.credit = 0
+    handler._sender = sender
+
+    future1 = handler.send_message(message="data1", subject="subject")
+    future2 = handler.send_message(message="data2", subject="subject")
+
+    # the first message was dropped in favor of the second one
+    assert DROPPED == future1.result(timeout=0)
+    assert not future2.done()
+    assert 0 == handler.in_flight
+
+    sender.credit = 1
+    event = Mock()
+    event.sender = sender
+    handler.on_sendable(event)
+
+    assert 1 == handler.in_flight
+
+    event.delivery = sender.send.return_value
+    handler.on_accepted(event)
+
+    assert ACCEPTED == future2.result(timeout=0)
+
+
+def test_trigger_topic__track_deliveries__data_handler_error__returns_failed_future():
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True)
+    topic = Topic(topic_name='topic', data_handler=Mock(side_effect=TopicDataHandlerError('error')))
+
+    future = handler.trigger_topic(topic)
+
+    assert FAILED == future.result(timeout=0)
+
+
+def test_on_accepted__untracked_delivery__is_ignored():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    handler.on_accepted(Mock())
+
+    assert 0 == handler.delivery_outcomes[ACCEPTED]
+    assert {'in_flight', 'outcomes', 'accept_latency'} == set(handler.delivery_stats().keys())
+
+
+def test_publisher_broker_handler__invalid_delivery_mode__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        PublisherBrokerHandler(mock.Mock(), delivery_mode='invalid')
+    assert "Invalid delivery mode: invalid" == str(e.value)
+
+
+def test_add_topic__at_most_once_topic__goes_through_a_pre_settled_link():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=2)
+    handler._create_sender = Mock()
+
+    telemetry_topic = Topic(topic_name='positions', data_handler=lambda context=None: "data",
+                            delivery_mode=AT_MOST_ONCE)
+    topic = Topic(topic_name='arrivals', data_handler=lambda context=None: "data")
+    handler.add_topic(telemetry_topic)
+    handler.add_topic(topic)
+
+    with mock.patch.object(BrokerHandler, 'on_start'):
+        handler.on_start(Mock())
+
+    at_most_once_link = handler._links[AT_MOST_ONCE]
+    assert at_most_once_link is handler._get_link('positions')
+    assert at_most_once_link is not handler._get_link('arrivals')
+
+    options = [call[1].get('options') for call in handler._create_sender.call_args_list]
+    assert [None, None] == options[:2]
+    assert isinstance(options[2], AtMostOnce)
+
+
+def test_add_topic__per_topic_links__the_link_of_the_topic_has_the_delivery_mode_of_the_topic():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=PER_TOPIC, delivery_mode=AT_MOST_ONCE)
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data", delivery_mode=AT_LEAST_ONCE)
+    default_topic = Topic(topic_name='default_topic', data_handler=lambda context=None: "data")
+    handler.add_topic(topic)
+    handler.add_topic(default_topic)
+
+    assert AT_LEAST_ONCE == handler._get_link('topic').delivery_mode
+    assert AT_MOST_ONCE == handler._get_link('default_topic').delivery_mode
+    assert AT_MOST_ONCE == handler._default_link.delivery_mode
+
+
+def test_send_message__track_deliveries_and_at_most_once__future_is_resolved_upon_sending():
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True, delivery_mode=AT_MOST_ONCE)
+    sender = Mock()
+    sender.credit = 1
+    handler._sender = sender
+
+    future = handler.send_message(message="data", subject="subject")
+
+    assert SENT == future.result(timeout=0)
+    assert 0 == handler.in_flight
+
+
+def test_send_message__called_from_other_thread__is_handed_off_to_the_container_thread():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._injector = Mock()
+    handler._container_thread_id = -1
+    sender = Mock()
+    sender.credit = 1
+    handler._sender = sender
+
+    future = handler.send_message(message="data", subject="subject")
+
+    sender.send.assert_not_called()
+
+    handler.on_swim_pubsub_submissions(Mock())
+
+    assert SENT == future.result(timeout=0)
+    sender.send.assert_called_once()
+
+
+def _started_handler_with_workers(**kwargs):
+    handler = PublisherBrokerHandler(mock.Mock(), data_handler_workers=2, **kwargs)
+    handler.started = True
+    handler.container = Mock()
+    sender = Mock()
+    sender.credit = 10
+    handler._sender = sender
+
+    # pass the data back as if the container thread processed them
+    handler.submit = lambda f, *args, **kwargs: f(*args, **kwargs)
+
+    return handler
+
+
+def test_init_scheduled_topic__data_handler_workers__trigger_callback_is_set():
+    handler = PublisherBrokerHandler(mock.Mock(), data_handler_workers=1)
+    handler.container = mock.Mock()
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data", interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    assert scheduled_topic._trigger_callback == handler.trigger_topic
+
+
+def test_trigger_topic__data_handler_workers__data_handler_runs_in_worker_and_data_are_sent():
+    handler = _started_handler_with_workers()
+
+    threads = []
+
+    def data_handler(context=None):
+        threads.append(threading.current_thread())
+        return "data"
+
+    topic = Topic(topic_name='topic', data_handler=data_handler)
+
+    outcome = handler.trigger_topic(topic)
+
+    assert SENT == outcome.result(timeout=5)
+    assert threading.current_thread() not in threads
+    handler._sender.send.assert_called_once()
+
+
+def test_trigger_topic__data_handler_workers__data_handler_error__outcome_is_failed():
+    handler = _started_handler_with_workers()
+
+    topic = Topic(topic_name='topic', data_handler=Mock(side_effect=TopicDataHandlerError('error')))
+
+    assert FAILED == handler.trigger_topic(topic).result(timeout=5)
+    handler._sender.send.assert_not_called()
+
+
+def test_trigger_topic__data_handler_workers__max_concurrency_reached__trigger_is_skipped():
+    handler = _started_handler_with_workers()
+    release = threading.Event()
+
+    def data_handler(context=None):
+        release.wait(timeout=5)
+        return "data"
+
+    topic = Topic(topic_name='topic', data_handler=data_handler, max_concurrency=1)
+
+    outcome1 = handler.trigger_topic(topic)
+    outcome2 = handler.trigger_topic(topic)
+
+    assert SKIPPED == outcome2.result(timeout=0)
+
+    release.set()
+    assert SENT == outcome1.result(timeout=5)
+    assert 0 == handler._running_data_handlers['topic']
+
+
+def test_trigger_topic__data_handler_workers__timeout__outcome_is_timed_out_and_late_data_are_discarded():
+    handler = _started_handler_with_workers()
+    release = threading.Event()
+
+    def data_handler(context=None):
+        release.wait(timeout=5)
+        return "data"
+
+    topic = Topic(topic_name='topic', data_handler=data_handler, timeout=1)
+
+    outcome = handler.trigger_topic(topic)
+
+    delay, timer_task = handler.container.schedule.call_args[0]
+    assert 1 == delay
+
+    timer_task.on_timer_task(Mock())
+    assert TIMED_OUT == outcome.result(timeout=0)
+
+    release.set()
+    handler._executor.shutdown(wait=True)
+
+    handler._sender.send.assert_not_called()
+    assert 0 == handler._running_data_handlers['topic']
+
+
+def test_trigger_topics__data_handler_workers__every_topic_runs_in_worker():
+    handler = _started_handler_with_workers()
+
+    topic1 = Topic(topic_name='topic1', data_handler=lambda context=None: "data1")
+    topic2 = Topic(topic_name='topic2', data_handler=Mock(side_effect=TopicDataHandlerError('error')))
+
+    outcomes = handler.trigger_topics([(topic1, None), (topic2, None)])
+
+    assert [SENT, FAILED] == [outcome.result(timeout=5) for outcome in outcomes]
+
+
+def test_init_scheduled_topic__coroutine_data_handler__trigger_callback_is_set():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.container = mock.Mock()
+
+    async def data_handler(context=None):
+        return "data"
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=data_handler, interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    assert scheduled_topic._trigger_callback == handler.trigger_topic
+
+
+def test_trigger_topics__coroutine_data_handlers__are_awaited_concurrently_and_data_are_sent():
+    handler = _started_handler_with_workers()
+    handler._executor = None
+    running = []
+    events = {}
+
+    async def data_handler(context=None):
+        # the event is created within the loop of the handler
+        both_running = events.setdefault('both_running', asyncio.Event())
+        running.append(context)
+        if len(running) == 2:
+            both_running.set()
+        # neither handler can finish unless both run at the same time
+        await both_running.wait()
+        return context
+
+    topic1 = Topic(topic_name='topic1', data_handler=data_handler)
+    topic2 = Topic(topic_name='topic2', data_handler=data_handler)
+
+    try:
+        outcomes = handler.trigger_topics([(topic1, "data1"), (topic2, "data2")])
+
+        assert [SENT, SENT] == [outcome.result(timeout=5) for outcome in outcomes]
+        assert 2 == handler._sender.send.call_count
+    finally:
+        handler.on_connection_closed(Mock())
+
+    assert handler._event_loop is None
+
+
+def test_on_connection_closed__data_handler_workers__worker_pool_is_shut_down():
+    handler = _started_handler_with_workers()
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=lambda context=None: "data"))
+    assert SENT == outcome.result(timeout=5)
+
+    with mock.patch.object(BrokerHandler, 'on_connection_closed'):
+        handler.on_connection_closed(Mock())
+
+    with pytest.raises(RuntimeError):
+        handler._executor.submit(print)
+
+
+@pytest.mark.parametrize('is_async', [False, True])
+def test_on_connection_closed__data_handler_workers__later_triggers_are_skipped(is_async):
+    handler = _started_handler_with_workers()
+
+    async def coroutine_data_handler(context=None):
+        return "data"
+
+    data_handler = coroutine_data_handler if is_async else Mock(return_value="data")
+
+    with mock.patch.object(BrokerHandler, 'on_connection_closed'):
+        handler.on_connection_closed(Mock())
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=data_handler))
+
+    assert SKIPPED == outcome.result(timeout=0)
+    assert handler._event_loop is None
+    handler._sender.send.assert_not_called()
+
+
+def test_on_start__after_the_connection_closed__worker_pool_is_created_again():
+    handler = _started_handler_with_workers()
+    handler._create_sender = Mock(return_value=_mock_sender(credit=10))
+
+    with mock.patch.object(BrokerHandler, 'on_connection_closed'):
+        handler.on_connection_closed(Mock())
+
+    with mock.patch.object(BrokerHandler, 'on_start'):
+        handler.on_start(Mock())
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=lambda context=None: "data"))
+
+    try:
+        assert SENT == outcome.result(timeout=5)
+    finally:
+        handler._executor.shutdown(wait=True)
+
+
+def test_trigger_topic__coroutine_data_handler__timeout__coroutine_is_cancelled():
+    handler = _started_handler_with_workers()
+    cancelled = threading.Event()
+
+    async def data_handler(context=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    topic = Topic(topic_name='topic', data_handler=data_handler, timeout=1)
+
+    try:
+        outcome = handler.trigger_topic(topic)
+
+        _, timer_task = handler.container.schedule.call_args[0]
+        timer_task.on_timer_task(Mock())
+
+        assert TIMED_OUT == outcome.result(timeout=0)
+        assert cancelled.wait(timeout=5)
+    finally:
+        handler.on_connection_closed(Mock())
+
+    handler._sender.send.assert_not_called()
+
+
+def test_schedule_stats__returns_stats_of_scheduled_topics_only():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    scheduled_topic = ScheduledTopic(topic_name='s_topic', data_handler=Mock(), interval_in_sec=5, fixed_rate=True)
+    handler.topics = [scheduled_topic, Topic(topic_name='topic', data_handler=Mock())]
+
+    assert {'s_topic': scheduled_topic.schedule_stats()} == handler.schedule_stats()
+    assert handler.schedule_stats()['s_topic']['fixed_rate'] is True
+
+
+def test_init_scheduled_topic__timing_wheel__topic_is_scheduled_in_the_wheel():
+    handler = PublisherBrokerHandler(mock.Mock(), scheduler_tick_in_sec=0.1)
+    handler.container = mock.Mock()
+    handler._timing_wheel = Mock()
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(), interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    handler._timing_wheel.schedule.assert_called_once_with(scheduled_topic, 5)
+    handler.container.schedule.assert_not_called()
+
+
+def test_on_scheduler_tick__due_topics_are_sent_in_one_batch_and_rescheduled():
+    handler = PublisherBrokerHandler(mock.Mock(), scheduler_tick_in_sec=0.1)
+    handler.container = mock.Mock()
+    handler._sender = _mock_sender(credit=10)
+
+    topics = [ScheduledTopic(topic_name=f'topic{i}', data_handler=lambda context=None: "data", interval_in_sec=5)
+              for i in range(3)]
+
+    handler._timing_wheel = Mock()
+    handler._timing_wheel.advance.return_value = topics
+    handler.send_batch = Mock(return_value=[SENT] * 3)
+
+    handler._on_scheduler_tick()
+
+    handler.send_batch.assert_called_once_with([("data", topic.name) for topic in topics])
+    assert [mock.call(topic, 5) for topic in topics] == handler._timing_wheel.schedule.call_args_list
+    assert [1, 1, 1] == [topic.ticks for topic in topics]
+
+    # the wheel keeps ticking
+    delay, timer_task = handler.container.schedule.call_args[0]
+    assert handler._timing_wheel.next_tick_delay.return_value == delay
+    assert handler._on_scheduler_tick == timer_task.callback
+
+
+def test_on_scheduler_tick__no_due_topics__nothing_is_sent():
+    handler = PublisherBrokerHandler(mock.Mock(), scheduler_tick_in_sec=0.1)
+    handler.container = mock.Mock()
+    handler._timing_wheel = Mock()
+    handler._timing_wheel.advance.return_value = []
+    handler.send_batch = Mock()
+
+    handler._on_scheduler_tick()
+
+    handler.send_batch.assert_not_called()
+    handler.container.schedule.assert_called_once()
+
+
+def _first_tick_delays(handler, scheduled_topics):
+    handler.container = Mock()
+    for scheduled_topic in scheduled_topics:
+        handler._init_scheduled_topic(scheduled_topic)
+
+    return [call[0][0] for call in handler.container.schedule.call_args_list]
+
+
+def test_init_scheduled_topic__topics_with_same_interval__first_ticks_are_staggered():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    scheduled_topics = [ScheduledTopic(topic_name=f'topic{i}', data_handler=Mock(), interval_in_sec=5)
+                        for i in range(6)]
+    other_scheduled_topic = ScheduledTopic(topic_name='other', data_handler=Mock(), interval_in_sec=10)
+
+    delays = _first_tick_delays(handler, scheduled_topics + [other_scheduled_topic])
+
+    # the first topic of each interval keeps the interval
+    assert 5 == delays[0]
+    assert 10 == delays[-1]
+    assert 6 == len(set(delays[:-1]))
+    assert all(0 < delay <= 5 for delay in delays[:-1])
+
+
+def test_init_scheduled_topic__staggering_is_disabled__first_ticks_are_after_the_interval():
+    handler = PublisherBrokerHandler(mock.Mock(), stagger_scheduled_topics=False)
+
+    scheduled_topics = [ScheduledTopic(topic_name=f'topic{i}', data_handler=Mock(), interval_in_sec=5)
+                        for i in range(3)]
+
+    assert [5, 5, 5] == _first_tick_delays(handler, scheduled_topics)
+
+
+def test_init_scheduled_topic__jitter__is_added_to_the_first_tick():
+    handler = PublisherBrokerHandler(mock.Mock(), stagger_scheduled_topics=True, stagger_jitter_in_sec=1.)
+
+    scheduled_topics = [ScheduledTopic(topic_name=f'topic{i}', data_handler=Mock(), interval_in_sec=5)
+                        for i in range(2)]
+
+    with mock.patch('swim_pubsub.publisher.handler.random.uniform', return_value=0.5) as mock_uniform:
+        delays = _first_tick_delays(handler, scheduled_topics)
+
+    assert 5.5 == delays[0]
+    assert pytest.approx(5 * 0.618 + 0.5, abs=0.01) == delays[1]
+    mock_uniform.assert_called_with(0, 1.)
+
+
+def test_cache_stats__returns_stats_of_topics_with_cache_only():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    cached_topic = Topic(topic_name='cached', data_handler=Mock(), cache_ttl_in_sec=10)
+    handler.topics = [cached_topic, Topic(topic_name='topic', data_handler=Mock())]
+
+    assert {'cached': cached_topic.cache.stats()} == handler.cache_stats()
+
+
+def test_trigger_topic__scheduled_topic_skips_unchanged__unchanged_data_are_not_sent():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(side_effect=["data", "data", "new data"]),
+                                     interval_in_sec=5, skip_unchanged=True)
+
+    outcomes = [handler.trigger_topic(scheduled_topic) for _ in range(3)]
+
+    assert [SENT, UNCHANGED, SENT] == outcomes
+    assert 2 == handler._sender.send.call_count
+
+
+def test_trigger_topics__scheduled_topic_skips_unchanged__unchanged_data_are_not_sent():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+
+    scheduled_topic = ScheduledTopic(topic_name='s_topic', data_handler=lambda context=None: "data",
+                                     interval_in_sec=5, skip_unchanged=True)
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+
+    handler.trigger_topics([(scheduled_topic, None), (topic, None)])
+    outcomes = handler.trigger_topics([(scheduled_topic, None), (topic, None)])
+
+    assert [UNCHANGED, SENT] == outcomes
+    assert 3 == handler._sender.send.call_count
+
+
+@pytest.mark.parametrize('track_deliveries', [False, True])
+def test_trigger_topic__scheduled_topic_skips_unchanged__dropped_data_are_sent_again(track_deliveries):
+    handler = PublisherBrokerHandler(mock.Mock(), buffer_size=0, track_deliveries=track_deliveries)
+    handler._sender = _mock_sender(credit=0)
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data",
+                                     interval_in_sec=5, skip_unchanged=True)
+
+    outcome = handler.trigger_topic(scheduled_topic)
+    assert DROPPED == (outcome.result(timeout=0) if track_deliveries else outcome)
+
+    handler._sender.credit = 10
+    handler.trigger_topic(scheduled_topic)
+
+    handler._sender.send.assert_called_once()
+
+
+def test_trigger_topics__scheduled_topic_skips_unchanged__failed_data_are_sent_again():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data", codec='json',
+                                     interval_in_sec=5, skip_unchanged=True)
+    handler.add_topic(scheduled_topic)
+
+    with mock.patch.object(handler.codec_registry.get('json'), '_encode', side_effect=ValueError('error')):
+        assert [FAILED] == handler.trigger_topics([(scheduled_topic, None)])
+
+    assert [SENT] == handler.trigger_topics([(scheduled_topic, None)])
+    assert [UNCHANGED] == handler.trigger_topics([(scheduled_topic, None)])
+
+
+def test_trigger_topic__fan_out_topic_skips_unchanged__data_with_a_dropped_message_are_sent_again():
+    handler = PublisherBrokerHandler(mock.Mock(), buffer_size=0)
+    handler._sender = _mock_sender(credit=1)
+
+    topic = ScheduledFanOutTopic(topic_name='flights', subjects=['flights.a', 'flights.b'], interval_in_sec=5,
+                                 data_handler=lambda context=None: {'flights.a': 'a', 'flights.b': 'b'},
+                                 skip_unchanged=True)
+
+    assert {'flights.a': SENT, 'flights.b': DROPPED} == handler.trigger_topic(topic)
+
+    handler._sender.credit = 10
+    assert {'flights.a': SENT, 'flights.b': SENT} == handler.trigger_topic(topic)
+    assert UNCHANGED == handler.trigger_topic(topic)
+
+
+def test_trigger_topic__scheduled_topic_with_codec_skips_unchanged__digest_of_the_codec_payload():
+    class DateTimeCodec(JSONCodec):
+        name = 'datetime-json'
+
+        def _encode(self, data):
+            return json.dumps(data, default=datetime.datetime.isoformat)
+
+    registry = create_default_registry()
+    registry.register(DateTimeCodec())
+    handler = PublisherBrokerHandler(mock.Mock(), codec_registry=registry)
+    handler._sender = _mock_sender(credit=10)
+
+    data = [{'time': datetime.datetime(2020, 1, 1)}, {'time': datetime.datetime(2020, 1, 1)},
+            {'time': datetime.datetime(2020, 1, 2)}]
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=Mock(side_effect=data), codec='datetime-json',
+                                     interval_in_sec=5, skip_unchanged=True)
+    handler.add_topic(scheduled_topic)
+
+    assert [SENT, UNCHANGED, SENT] == [handler.trigger_topic(scheduled_topic) for _ in data]
+
+
+def test_trigger_topic__scheduled_topic_skips_unchanged__body_cannot_be_encoded__data_are_considered_as_changed():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: {1, 2},
+                                     interval_in_sec=5, skip_unchanged=True)
+
+    def prepare_message(message, subject, content_type):
+        return Message(subject=subject, content_type=content_type)
+
+    with mock.patch.object(handler, '_prepare_message', side_effect=prepare_message):
+        assert [SENT, SENT] == [handler.trigger_topic(scheduled_topic) for _ in range(2)]
+
+
+def test_trigger_topic__data_handler_workers__unchanged_data__outcome_is_unchanged():
+    handler = _started_handler_with_workers()
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data",
+                                     interval_in_sec=5, skip_unchanged=True)
+
+    assert SENT == handler.trigger_topic(scheduled_topic).result(timeout=5)
+    assert UNCHANGED == handler.trigger_topic(scheduled_topic).result(timeout=5)
+    handler._sender.send.assert_called_once()
+
+
+def test_add_topic__delta__messages_of_the_topic_are_delta_encoded():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+
+    handler.add_topic(Topic(topic_name='delta', data_handler=Mock(), delta=True, snapshot_interval=5))
+    handler.add_topic(Topic(topic_name='topic', data_handler=Mock()))
+
+    arrivals = [{'icao24': f'abc{i}', 'arrival': i} for i in range(10)]
+    handler.send_message(json.dumps(arrivals), subject='delta')
+    handler.send_batch([(json.dumps(arrivals[:-1]), 'delta'), (json.dumps(arrivals), 'topic')])
+
+    sent = [call[0][0] for call in handler._sender.send.call_args_list]
+    assert [SNAPSHOT, DELTA] == [message.properties[DELTA_KIND_PROPERTY] for message in sent[:2]]
+    assert sent[2].properties is None
+    assert {'delta': {'sequence': 2, 'snapshots': 1, 'deltas': 1}} == handler.delta_stats()
+
+
+def test_send_batch__delta_topic_data_are_not_json__message_fails_and_the_rest_are_sent(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+    handler.add_topic(Topic(topic_name='delta', data_handler=Mock(), delta=True))
+
+    outcomes = handler.send_batch([('ok', 'plain'), ('<xml/>', 'delta'), ('ok2', 'plain')])
+
+    assert [SENT, FAILED, SENT] == outcomes
+    assert ['ok', 'ok2'] == _sent_bodies(handler._sender)
+    assert any(r.message.startswith("Error while encoding message of topic delta: Error while delta encoding data: ")
+               for r in caplog.records)
+
+
+def test_send_message__delta_topic_data_are_not_json__returns_failed():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=10)
+    handler.add_topic(Topic(topic_name='delta', data_handler=Mock(), delta=True))
+
+    assert FAILED == handler.send_message({'flights': {1, 2}}, subject='delta')
+    handler._sender.send.assert_not_called()
+
+
+def test_trigger_topic__fan_out_topic__data_are_fetched_once_and_sent_in_one_batch():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.send_batch = Mock(return_value=[SENT, BUFFERED])
+    data_handler = Mock(return_value={'EBBR': "ebbr", 'LFPG': "lfpg"})
+
+    topic = FanOutTopic(topic_name='airports', data_handler=data_handler, subjects=['EBBR', 'LFPG'])
+
+    outcomes = handler.trigger_topic(topic)
+
+    assert {'EBBR': SENT, 'LFPG': BUFFERED} == outcomes
+    data_handler.assert_called_once_with(context=None)
+    handler.send_batch.assert_called_once_with([("ebbr", 'EBBR'), ("lfpg", 'LFPG')])
+
+
+def test_trigger_topics__fan_out_and_plain_topics__outcomes_are_mapped_back_to_their_topics():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.send_batch = Mock(return_value=[SENT, BUFFERED, DROPPED])
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+    fan_out_topic = FanOutTopic(topic_name='airports',
+                                data_handler=lambda context=None: {'EBBR': "ebbr", 'LFPG': "lfpg"},
+                                subjects=['EBBR', 'LFPG'])
+    empty_fan_out_topic = FanOutTopic(topic_name='empty', data_handler=lambda context=None: {}, subjects=['EHAM'])
+
+    outcomes = handler.trigger_topics([(fan_out_topic, None), (empty_fan_out_topic, None), (topic, None)])
+
+    assert [{'EBBR': SENT, 'LFPG': BUFFERED}, {}, DROPPED] == outcomes
+    handler.send_batch.assert_called_once_with([("ebbr", 'EBBR'), ("lfpg", 'LFPG'), ("data", 'topic')])
+
+
+def test_add_topic__fan_out_topic_and_per_topic_links__every_subject_gets_its_own_link():
+    handler = PublisherBrokerHandler(mock.Mock(), sender_links=PER_TOPIC)
+
+    topic = FanOutTopic(topic_name='airports', data_handler=lambda context=None: {}, subjects=['EBBR', 'LFPG'],
+                        delivery_mode=AT_MOST_ONCE)
+    handler.add_topic(topic)
+
+    assert AT_MOST_ONCE == handler._get_link('EBBR').delivery_mode
+    assert AT_MOST_ONCE == handler._get_link('LFPG').delivery_mode
+    assert handler._get_link('EBBR') is not handler._get_link('LFPG')
+
+
+def test_init_scheduled_topic__fan_out_topic__is_triggered_by_the_handler():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.container = mock.Mock()
+
+    scheduled_topic = ScheduledFanOutTopic(topic_name='airports', data_handler=lambda context=None: {},
+                                           subjects=['EBBR'], interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    assert scheduled_topic._trigger_callback == handler.trigger_topic
+
+
+def test_trigger_topic__streaming_topic__items_are_pulled_as_credit_becomes_available():
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=2)
+    handler._sender = sender
+    pulled = []
+
+    def data_handler(context=None):
+        for i in range(5):
+            pulled.append(i)
+            yield {'flight': i}
+
+    topic = StreamingTopic(topic_name='flights', data_handler=data_handler)
+
+    outcome = handler.trigger_topic(topic)
+
+    # one item is pulled ahead of the credit
+    assert [0, 1, 2] == pulled
+    assert 2 == sender.send.call_count
+    assert not outcome.done()
+    assert 0 == len(handler.outbound_buffer)
+
+    sender.credit = 5
+    handler.on_sendable(Mock(sender=sender))
+
+    assert 5 == sender.send.call_count
+    assert [{'flight': i} for i in range(5)] == [c[0][0].body for c in sender.send.call_args_list]
+    assert SENT == outcome.result(timeout=0)
+    assert {} == handler.stream_stats()
+
+
+def test_trigger_topic__streaming_topic__previous_stream_is_pending__trigger_is_skipped():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=0)
+
+    topic = StreamingTopic(topic_name='flights', data_handler=lambda context=None: iter(range(5)))
+
+    handler.trigger_topic(topic)
+    outcome = handler.trigger_topic(topic)
+
+    assert SKIPPED == outcome.result(timeout=0)
+    assert {'flights': {'subject': 'flights', 'sent': 0}} == handler.stream_stats()
+
+
+def test_trigger_topic__streaming_topic__iterator_fails__stream_fails_and_the_rest_keep_streaming(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+
+    def failing_data_handler(context=None):
+        yield 1
+        raise ValueError('upstream error')
+
+    failing_topic = StreamingTopic(topic_name='failing', data_handler=failing_data_handler)
+    topic = StreamingTopic(topic_name='flights', data_handler=lambda context=None: [1, 2, 3])
+
+    outcomes = handler.trigger_topics([(failing_topic, None), (topic, None)])
+
+    assert [FAILED, SENT] == [outcome.result(timeout=0) for outcome in outcomes]
+    assert 4 == sender.send.call_count
+    assert "Error while streaming data of topic failing: upstream error" in [r.message for r in caplog.records]
+
+
+def test_trigger_topic__streaming_topic__streams_of_the_same_link_take_turns():
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=0)
+    handler._sender = sender
+
+    handler.trigger_topic(StreamingTopic(topic_name='a', data_handler=lambda context=None: ['a1', 'a2']))
+    handler.trigger_topic(StreamingTopic(topic_name='b', data_handler=lambda context=None: ['b1', 'b2']))
+
+    sender.credit = 4
+    handler.on_sendable(Mock(sender=sender))
+
+    assert ['a1', 'b1', 'a2', 'b2'] == [c[0][0].body for c in sender.send.call_args_list]
+
+
+def test_on_connection_closed__pending_streams_are_dropped():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler._sender = _mock_sender(credit=0)
+
+    outcome = handler.trigger_topic(StreamingTopic(topic_name='flights', data_handler=lambda context=None: [1, 2]))
+
+    with mock.patch.object(BrokerHandler, 'on_connection_closed'):
+        handler.on_connection_closed(Mock())
+
+    assert DROPPED == outcome.result(timeout=0)
+    assert {} == handler.stream_stats()
+
+
+def test_on_connection_closed__tracked_messages_with_no_outcome__futures_are_resolved_with_dropped():
+    handler = PublisherBrokerHandler(mock.Mock(), track_deliveries=True, rate_limit=1, rate_burst=2)
+    handler._sender = _mock_sender(credit=1)
+
+    in_flight = handler.send_message(message="in flight", subject="subject")
+    buffered = handler.send_message(message="buffered", subject="subject")
+    throttled = handler.send_message(message="throttled", subject="subject")
+
+    assert 1 == handler.in_flight
+    assert 1 == len(handler.outbound_buffer)
+    assert 1 == handler.throttle_stats()['publisher']['pending']
+
+    with mock.patch.object(BrokerHandler, 'on_connection_closed'):
+        handler.on_connection_closed(Mock())
+
+    assert [DROPPED, DROPPED, DROPPED] == [future.result(timeout=0) for future in (in_flight, buffered, throttled)]
+    assert 0 == handler.in_flight
+    assert {} == handler._pending_futures
+
+
+def test_init_scheduled_topic__streaming_topic__is_triggered_by_the_handler():
+    handler = PublisherBrokerHandler(mock.Mock())
+    handler.container = mock.Mock()
+
+    scheduled_topic = ScheduledStreamingTopic(topic_name='flights', data_handler=lambda context=None: [],
+                                              interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    assert scheduled_topic._trigger_callback == handler.trigger_topic
+
+
+def test_trigger_topic__demand_driven__no_credit__data_handler_is_not_called_and_trigger_is_skipped(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock(), demand_driven=True)
+    handler._sender = _mock_sender(credit=0)
+    data_handler = Mock(return_value="data")
+
+    topic = Topic(topic_name='topic', data_handler=data_handler)
+
+    assert SKIPPED == handler.trigger_topic(topic)
+    assert SKIPPED == handler.trigger_topic(topic)
+
+    data_handler.assert_not_called()
+    assert 0 == len(handler.outbound_buffer)
+    assert {'topic': 2} == handler.no_credit_skips
+    assert "Skipped topic topic: no credit to send its data" == caplog.records[-1].message
+
+
+def test_trigger_topic__demand_driven__buffered_messages__trigger_is_skipped():
+    handler = PublisherBrokerHandler(mock.Mock(), demand_driven=True)
+    handler._sender = _mock_sender(credit=0)
+    handler.send_message(message="pending", subject='topic')
+    handler._sender.credit = 1
+    data_handler = Mock(return_value="data")
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=data_handler))
+
+    assert SKIPPED == outcome
+    data_handler.assert_not_called()
+
+
+def test_trigger_topic__demand_driven__credit__data_are_sent():
+    handler = PublisherBrokerHandler(mock.Mock(), demand_driven=True)
+    handler._sender = _mock_sender(credit=1)
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=lambda context=None: "data"))
+
+    assert SENT == outcome
+    assert {} == handler.no_credit_skips
+
+
+def test_trigger_topics__demand_driven__only_the_topics_of_links_with_credit_are_generated():
+    handler = PublisherBrokerHandler(mock.Mock(), demand_driven=True, sender_links=PER_TOPIC)
+    handler._sender = _mock_sender(credit=0)
+    starved_data_handler = Mock(return_value="data")
+
+    topic = Topic(topic_name='topic', data_handler=lambda context=None: "data")
+    starved_topic = Topic(topic_name='starved', data_handler=starved_data_handler)
+    handler.add_topic(topic)
+    handler.add_topic(starved_topic)
+    handler._open_link(handler._get_link('topic'), _mock_sender(credit=1))
+    handler._open_link(handler._get_link('starved'), _mock_sender(credit=0))
+
+    outcomes = handler.trigger_topics([(topic, None), (starved_topic, None)])
+
+    assert [SENT, SKIPPED] == outcomes
+    starved_data_handler.assert_not_called()
+
+
+def test_trigger_topic__demand_driven_and_data_handler_workers__no_credit__data_handler_is_not_submitted():
+    handler = _started_handler_with_workers(demand_driven=True)
+    handler._sender = _mock_sender(credit=0)
+    data_handler = Mock(return_value="data")
+
+    outcome = handler.trigger_topic(Topic(topic_name='topic', data_handler=data_handler))
+
+    assert SKIPPED == outcome.result(timeout=0)
+    data_handler.assert_not_called()
+
+
+def test_init_scheduled_topic__demand_driven__is_triggered_by_the_handler():
+    handler = PublisherBrokerHandler(mock.Mock(), demand_driven=True)
+    handler.container = mock.Mock()
+
+    scheduled_topic = ScheduledTopic(topic_name='topic', data_handler=lambda context=None: "data", interval_in_sec=5)
+
+    handler._init_scheduled_topic(scheduled_topic)
+
+    assert scheduled_topic._trigger_callback == handler.trigger_topic
+
+
+def _rate_limited_handler(**kwargs):
+    handler = PublisherBrokerHandler(mock.Mock(), **kwargs)
+    handler.started = True
+    handler.container = Mock()
+    handler._sender = _mock_sender(credit=100)
+
+    return handler
+
+
+def _sent_bodies(sender):
+    return [c[0][0].body for c in sender.send.call_args_list]
+
+
+def test_publisher_broker_handler__invalid_rate_limit_policy__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        PublisherBrokerHandler(mock.Mock(), rate_limit=1, rate_limit_policy='invalid')
+    assert "Invalid rate limit policy: invalid" == str(e.value)
+
+
+def test_send_message__rate_limit_exceeded__messages_are_delayed_and_released_in_order():
+    handler = _rate_limited_handler(rate_limit=1, rate_burst=2)
+
+    outcomes = [handler.send_message(message=i, subject='topic') for i in range(4)]
+
+    assert [SENT, SENT, THROTTLED, THROTTLED] == outcomes
+    assert [0, 1] == _sent_bodies(handler._sender)
+    handler.container.schedule.assert_called_once()
+
+    with mock.patch('swim_pubsub.publisher.throttling.time.monotonic', return_value=time.monotonic() + 1):
+        handler._release_throttled()
+
+    assert [0, 1, 2] == _sent_bodies(handler._sender)
+    assert 2 == handler.container.schedule.call_count
+    assert {'pending': 1, 'passed': 3, 'held': 2} == {key: value
+                                                      for key, value in handler.throttle_stats()['publisher'].items()
+                                                      if key in ('pending', 'passed', 'held')}
+
+
+def test_release_throttled__idle_throttle_with_tokens__release_is_scheduled_after_the_wait_of_the_held_message():
+    handler = _rate_limited_handler()
+    handler.add_topic(Topic(topic_name='slow', data_handler=Mock(), rate_limit=1))
+    handler.add_topic(Topic(topic_name='fast', data_handler=Mock(), rate_limit=100))
+
+    assert [SENT, THROTTLED] == [handler.send_message(message=i, subject='slow') for i in range(2)]
+    handler._release_throttled()
+
+    assert [0] == _sent_bodies(handler._sender)
+    assert 2 == handler.container.schedule.call_count
+    assert all(call[0][0] > 0 for call in handler.container.schedule.call_args_list)
+
+
+def test_release_throttled__handler_and_topic_rate_limits__release_waits_for_the_slowest_throttle_of_the_subject():
+    handler = _rate_limited_handler(rate_limit=100)
+    handler.add_topic(Topic(topic_name='slow', data_handler=Mock(), rate_limit=1))
+
+    assert [SENT, THROTTLED] == [handler.send_message(message=i, subject='slow') for i in range(2)]
+
+    delay, _ = handler.container.schedule.call_args[0]
+    assert 0.9 < delay <= 1
+
+
+def test_send_message__topic_rate_limit_conflate__only_the_latest_message_is_released():
+    handler = _rate_limited_handler(rate_limit_policy=DROP)
+    topic = Topic(topic_name='positions', data_handler=Mock(), rate_limit=1, rate_limit_policy=CONFLATE)
+    handler.add_topic(topic)
+
+    outcomes = [handler.send_message(message=i, subject='positions') for i in range(3)]
+    other_outcome = handler.send_message(message='other', subject='other')
+
+    assert [SENT, THROTTLED, THROTTLED] == outcomes
+    assert SENT == other_outcome
+
+    with mock.patch('swim_pubsub.publisher.throttling.time.monotonic', return_value=time.monotonic() + 1):
+        handler._release_throttled()
+
+    assert [0, 'other', 2] == _sent_bodies(handler._sender)
+    assert 1 == handler.throttle_stats()['positions']['conflated']
+
+
+def test_send_message__rate_limit_conflate__delta_topic__every_diff_is_released():
+    handler = _rate_limited_handler(rate_limit=1, rate_limit_policy=CONFLATE)
+    handler.add_topic(Topic(topic_name='positions', data_handler=Mock(), delta=True))
+
+    outcomes = [handler.send_message(message={'positions': i}, subject='positions') for i in range(4)]
+
+    assert [SENT, THROTTLED, THROTTLED, THROTTLED] == outcomes
+
+    for delay in range(1, 4):
+        with mock.patch('swim_pubsub.publisher.throttling.time.monotonic', return_value=time.monotonic() + delay):
+            handler._release_throttled()
+
+    assert [1, 2, 3, 4] == [c[0][0].properties[DELTA_SEQUENCE_PROPERTY] for c in handler._sender.send.call_args_list]
+
+
+def test_send_message__rate_limit_drop__message_is_dropped_and_its_future_is_resolved():
+    handler = _rate_limited_handler(rate_limit=1, rate_limit_policy=DROP, track_deliveries=True)
+
+    handler.send_message(message=0, subject='topic')
+    future = handler.send_message(message=1, subject='topic')
+
+    assert DROPPED == future.result(timeout=0)
+    assert [0] == _sent_bodies(handler._sender)
+
+
+def test_send_batch__rate_limit_exceeded__the_rest_are_throttled(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = _rate_limited_handler(rate_limit=2)
+
+    outcomes = handler.send_batch([(i, 'topic') for i in range(3)])
+
+    assert [SENT, SENT, THROTTLED] == outcomes
+    assert "Batch of 3 message(s): 2 sent, 0 buffered, 0 dropped, 1 throttled" == caplog.records[-1].message
+
+
+def test_trigger_topic__streaming_topic_with_rate_limit__items_are_pulled_at_the_rate():
+    handler = _rate_limited_handler()
+    pulled = []
+
+    def data_handler(context=None):
+        for i in range(3):
+            pulled.append(i)
+            yield i
+
+    topic = StreamingTopic(topic_name='flights', data_handler=data_handler, rate_limit=1)
+    handler.add_topic(topic)
+
+    outcome = handler.trigger_topic(topic)
+
+    assert [0] == _sent_bodies(handler._sender)
+    assert [0, 1] == pulled
+
+    for delay in (1, 2):
+        with mock.patch('swim_pubsub.publisher.throttling.time.monotonic', return_value=time.monotonic() + delay):
+            handler._release_throttled()
+
+    assert [0, 1, 2] == _sent_bodies(handler._sender)
+    assert SENT == outcome.result(timeout=0)
+
+
+def test_send_message__conflate_buffered__only_the_latest_message_per_subject_is_sent_once_credit_is_granted(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock(), conflate_buffered=True, track_deliveries=True)
+    sender = _mock_sender(credit=0)
+    handler._sender = sender
+
+    futures = [handler.send_message(message=i, subject='flight.1') for i in range(3)]
+    other_future = handler.send_message(message='other', subject='flight.2')
+
+    assert [DROPPED, DROPPED] == [future.result(timeout=0) for future in futures[:2]]
+    assert 2 == len([r for r in caplog.records if r.message.startswith("Conflated buffered message")])
+    assert 2 == len(handler.outbound_buffer)
+
+    sender.credit = 10
+    handler.on_sendable(Mock(sender=sender))
+
+    assert [2, 'other'] == [c[0][0].body for c in sender.send.call_args_list]
+    assert not futures[2].done()
+    assert not other_future.done()
+    assert 2 == handler.link_stats()[0]['buffer']['conflated']
+
+
+def test_publisher_broker_handler__invalid_priority_scheduling__raises_valueerror():
+    with pytest.raises(ValueError) as e:
+        PublisherBrokerHandler(mock.Mock(), priority_scheduling='invalid')
+    assert "Invalid priority scheduling: invalid" == str(e.value)
+
+
+def test_send_message__topic_priority__is_set_in_the_message():
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='urgent', data_handler=Mock(), priority=9))
+
+    handler.send_message(message="data", subject='urgent')
+    handler.send_message(message="data", subject='other')
+
+    assert [9, 4] == [c[0][0].priority for c in sender.send.call_args_list]
+
+
+def test_send_message__priority_scheduling__urgent_messages_do_not_queue_behind_bulk_ones():
+    handler = PublisherBrokerHandler(mock.Mock(), priority_scheduling=STRICT)
+    sender = _mock_sender(credit=0)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='snapshots', data_handler=Mock(), priority=1))
+    handler.add_topic(Topic(topic_name='alerts', data_handler=Mock(), priority=9))
+
+    for i in range(3):
+        handler.send_message(message=f"snapshot{i}", subject='snapshots')
+    handler.send_message(message="alert", subject='alerts')
+
+    sender.credit = 2
+    handler.on_sendable(Mock(sender=sender))
+
+    assert ["alert", "snapshot0"] == [c[0][0].body for c in sender.send.call_args_list]
+    lanes = handler.link_stats()[0]['buffer']['lanes']
+    assert {9: 0, 1: 2} == {priority: lane['size'] for priority, lane in lanes.items()}
+
+
+def test_add_client__invalid_weight__raises_valueerror():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    with pytest.raises(ValueError) as e:
+        handler.add_client('publisher', weight=0)
+    assert "weight should be a positive number, got 0" == str(e.value)
+
+
+def test_send_message__fair_sharing__clients_share_the_credit_by_weight():
+    handler = PublisherBrokerHandler(mock.Mock(), fair_sharing=True)
+    sender = _mock_sender(credit=0)
+    handler._sender = sender
+
+    greedy_topic = Topic(topic_name='greedy', data_handler=Mock())
+    topic = Topic(topic_name='topic', data_handler=Mock())
+    handler.assign_topic(greedy_topic, 'greedy_publisher')
+    handler.add_client('publisher', weight=3)
+    handler.assign_topic(topic, 'publisher')
+
+    for i in range(20):
+        handler.send_message(message=i, subject='greedy')
+    for i in range(6):
+        handler.send_message(message=i, subject='topic')
+
+    sender.credit = 8
+    handler.on_sendable(Mock(sender=sender))
+
+    subjects = [c[0][0].subject for c in sender.send.call_args_list]
+    assert 6 == subjects.count('topic')
+    assert 2 == subjects.count('greedy')
+
+    stats = handler.client_stats()
+    keys = ('weight', 'sent', 'backlog')
+    assert {'weight': 3, 'sent': 6, 'backlog': 0} == {key: stats['publisher'][key] for key in keys}
+    assert {'weight': 1., 'sent': 2, 'backlog': 18} == {key: stats['greedy_publisher'][key] for key in keys}
+
+
+def test_send_message__topic_with_codec__data_are_encoded_and_content_type_is_set():
+    handler = PublisherBrokerHandler(mock.Mock(), codec_registry=create_default_registry())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), codec='bytes'))
+    handler.add_topic(Topic(topic_name='positions', data_handler=Mock(), codec='json'))
+
+    handler.send_message(message=b'\x00\x01', subject='flights')
+    handler.send_message(message=Message(body={'icao24': 'abc'}), subject='positions')
+
+    messages = [c[0][0] for c in sender.send.call_args_list]
+    assert [b'\x00\x01', '{"icao24":"abc"}'] == [message.body for message in messages]
+    assert ['application/octet-stream', 'application/json'] == [message.content_type for message in messages]
+    assert 1 == handler.codec_stats()['json']['encoded']
+
+
+def test_add_topic__unknown_codec__raises_codecerror():
+    handler = PublisherBrokerHandler(mock.Mock())
+
+    with pytest.raises(CodecError) as e:
+        handler.add_topic(Topic(topic_name='topic', data_handler=Mock(), codec='unknown'))
+    assert "Unknown codec: unknown" == str(e.value)
+
+
+def test_send_batch__data_cannot_be_encoded__message_fails_and_the_rest_are_sent(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), codec='bytes'))
+
+    outcomes = handler.send_batch([("not bytes", 'flights'), (b'data', 'flights')])
+
+    assert [FAILED, SENT] == outcomes
+    assert "Error while encoding message of topic flights: The bytes codec expects bytes-like data, got str" in \
+        [r.message for r in caplog.records]
+    assert "Batch of 2 message(s): 1 sent, 0 buffered, 0 dropped, 1 failed" == caplog.records[-1].message
+
+
+def test_trigger_topic__delta_topic_with_json_codec__snapshot_is_the_json_string_of_the_data():
+    handler = PublisherBrokerHandler(mock.Mock(), codec_registry=create_default_registry())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    topic = Topic(topic_name='arrivals', data_handler=lambda context=None: {'flights': [1, 2]}, delta=True,
+                  codec='json')
+    handler.add_topic(topic)
+
+    assert SENT == handler.trigger_topic(topic)
+
+    message = sender.send.call_args[0][0]
+    assert SNAPSHOT == message.properties[DELTA_KIND_PROPERTY]
+    assert '{"flights":[1,2]}' == message.body
+    assert 'application/json' == message.content_type
+    assert 1 == handler.codec_stats()['json']['encoded']
+
+
+@pytest.mark.parametrize('compression', [None, ZLIB])
+def test_delta_topic_with_json_codec__subscriber_decoding_payloads__gets_the_data(compression):
+    registry = create_default_registry()
+    handler = PublisherBrokerHandler(mock.Mock(), codec_registry=registry)
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='arrivals', data_handler=Mock(), delta=True, codec='json',
+                            compression=compression, compression_threshold=0))
+
+    documents = [{'flights': [{'icao24': f'abc{i}'} for i in range(count)]} for count in (10, 9, 11)]
+    for document in documents:
+        handler.send_message(document, subject='arrivals')
+
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    subscriber = SubscriberBrokerHandler(mock.Mock(), decode_payloads=True, codec_registry=registry)
+    subscriber.receivers[receiver] = ('queue', callback)
+    for call in sender.send.call_args_list:
+        # as received from the wire
+        message = Message()
+        message.decode(call[0][0].encode())
+        subscriber.on_message(mock.Mock(receiver=receiver, message=message))
+
+    assert [SNAPSHOT, DELTA, DELTA] == [c[0][0].properties[DELTA_KIND_PROPERTY] for c in sender.send.call_args_list]
+    assert documents == [c[0][0].body for c in callback.call_args_list]
+
+
+def test_send_message__topic_with_compression__payloads_above_the_threshold_are_compressed():
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), compression=ZLIB, compression_threshold=100))
+    handler.add_topic(Topic(topic_name='positions', data_handler=Mock()))
+
+    flights = json.dumps([{'icao24': f'abc{i}'} for i in range(100)])
+    handler.send_message(flights, subject='flights')
+    handler.send_message('[]', subject='flights')
+    handler.send_message(flights, subject='positions')
+
+    compressed, small, uncompressed = [c[0][0] for c in sender.send.call_args_list]
+    assert 'deflate' == compressed.content_encoding
+    assert {COMPRESSED_TEXT_PROPERTY: True} == compressed.properties
+    assert flights.encode('utf-8') == create_decompressor('deflate').decompress(compressed.body)
+    assert '[]' == small.body
+    assert flights == uncompressed.body
+
+    stats = handler.compression_stats()
+    assert ['flights'] == list(stats)
+    assert 1 == stats['flights']['compressed']
+    assert 1 == stats['flights']['skipped']
+    assert len(flights) / len(compressed.body) == stats['flights']['ratio']
+
+
+def test_send_batch__codec_and_compression__payloads_are_encoded_then_compressed():
+    handler = PublisherBrokerHandler(mock.Mock())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), codec='json', compression=LZMA,
+                            compression_threshold=0))
+
+    flights = [{'icao24': f'abc{i}'} for i in range(100)]
+    handler.send_batch([(flights, 'flights')])
+
+    message = sender.send.call_args[0][0]
+    assert 'application/json' == message.content_type
+    assert 'xz' == message.content_encoding
+    assert flights == json.loads(create_decompressor('xz').decompress(message.body))
+
+
+def _decoded(pre_encoded):
+    message = Message()
+    message.decode(pre_encoded.encode())
+    return message
+
+
+def test_send_message__cache_encoded_messages__identical_data_reuse_the_encoded_message():
+    handler = PublisherBrokerHandler(mock.Mock(), cache_encoded_messages=True, codec_registry=create_default_registry())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), codec='json', compression=ZLIB,
+                            compression_threshold=0, priority=9))
+
+    flights = {'flights': [{'icao24': f'abc{i}'} for i in range(100)]}
+    for data in (flights, flights, {'flights': []}):
+        handler.send_message(data, subject='flights')
+
+    first, second, third = [c[0][0] for c in sender.send.call_args_list]
+    assert all(isinstance(message, PreEncodedMessage) for message in (first, second, third))
+    assert first is not second
+    assert first.encoded is second.encoded
+    assert first.encoded != third.encoded
+
+    decoded = _decoded(second)
+    assert ('flights', 'application/json', 'deflate', 9) == \
+        (decoded.subject, decoded.content_type, decoded.content_encoding, decoded.priority)
+    assert flights == json.loads(create_decompressor('deflate').decompress(decoded.body))
+    # identical data are not encoded again
+    assert 2 == handler.codec_stats()['json']['encoded']
+    assert {'subjects': 1, 'hits': 1, 'misses': 2, 'bytes': len(third.encoded)} == handler.encoded_cache_stats()
+
+
+def test_send_message__cache_encoded_messages__equal_data_of_other_types_are_encoded_again():
+    handler = PublisherBrokerHandler(mock.Mock(), cache_encoded_messages=True, codec_registry=create_default_registry())
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='flights', data_handler=Mock(), codec='json'))
+
+    handler.send_message({'alt': 1, 'on_ground': True}, subject='flights')
+    handler.send_message({'alt': 1.0, 'on_ground': 1}, subject='flights')
+
+    assert ['{"alt":1,"on_ground":true}', '{"alt":1.0,"on_ground":1}'] == \
+        [_decoded(c[0][0]).body for c in sender.send.call_args_list]
+
+
+def test_send_batch__cache_encoded_messages__pre_encoded_messages_are_buffered_and_throttled_as_the_rest():
+    handler = PublisherBrokerHandler(mock.Mock(), cache_encoded_messages=True, priority_scheduling=STRICT)
+    sender = _mock_sender(credit=1)
+    handler._sender = sender
+    handler.add_topic(Topic(topic_name='alerts', data_handler=Mock(), priority=9))
+    handler.add_topic(Topic(topic_name='bulk', data_handler=Mock(), priority=1))
+
+    outcomes = handler.send_batch([('data', 'bulk'), ('data', 'bulk'), ('alert', 'alerts')])
+    assert [SENT, BUFFERED, BUFFERED] == outcomes
+
+    sender.credit = 2
+    handler.on_sendable(Mock(sender=sender))
+
+    sent = [_decoded(c[0][0]) for c in sender.send.call_args_list]
+    assert ['bulk', 'alerts', 'bulk'] == [message.subject for message in sent]
+    assert ['data', 'alert', 'data'] == [message.body for message in sent]
+
+
+def test_trigger_topic__cache_encoded_messages__delta_and_proton_messages_are_not_cached():
+    handler = PublisherBrokerHandler(mock.Mock(), cache_encoded_messages=True)
+    sender = _mock_sender(credit=10)
+    handler._sender = sender
+    delta_topic = Topic(topic_name='arrivals', data_handler=lambda context=None: {'flights': [1, 2]}, delta=True)
+    message_topic = Topic(topic_name='departures', data_handler=lambda context=None: Message(body='data'))
+    handler.add_topic(delta_topic)
+    handler.add_topic(message_topic)
+
+    for topic in (delta_topic, delta_topic, message_topic, message_topic):
+        handler.trigger_topic(topic)
+
+    assert all(isinstance(c[0][0], Message) for c in sender.send.call_args_list)
+    assert {'subjects': 0, 'hits': 0, 'misses': 0, 'bytes': 0} == handler.encoded_cache_stats()
+
+
+def test_encoded_cache_stats__cache_encoded_messages_is_disabled__returns_none():
+    assert PublisherBrokerHandler(mock.Mock()).encoded_cache_stats() is None
@@ -0,0 +1,71 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+from unittest.mock import Mock
+
+from swim_pubsub.publisher.buffers import OutboundBuffer
+from swim_pubsub.publisher.links import SenderLink
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_sender_link__not_opened__has_no_credit_and_no_throughput():
+    link = SenderLink('link', OutboundBuffer())
+
+    assert 0 == link.credit
+    assert 0. == link.throughput
+
+
+def test_sender_link__send__message_is_sent_and_counted():
+    link = SenderLink('link', OutboundBuffer())
+    sender = Mock()
+    sender.credit = 5
+    link.open(sender)
+
+    message = Mock()
+    delivery = link.send(message)
+
+    sender.send.assert_called_once_with(message)
+    assert sender.send.return_value == delivery
+    assert 1 == link.sent
+    assert 5 == link.credit
+
+
+def test_sender_link__throughput():
+    link = SenderLink('link', OutboundBuffer())
+
+    with mock.patch('swim_pubsub.publisher.links.time.monotonic', return_value=100.):
+        link.open(Mock())
+
+    link.sent = 50
+
+    with mock.patch('swim_pubsub.publisher.links.time.monotonic', return_value=110.):
+        assert 5. == link.throughput
+        assert 5. == link.stats()['throughput']
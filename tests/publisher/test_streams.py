@@ -0,0 +1,77 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from swim_pubsub.publisher.streams import TopicStream, END
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_topic_stream__next_item__items_are_pulled_one_at_a_time_until_end():
+    pulled = []
+
+    def items():
+        for item in range(2):
+            pulled.append(item)
+            yield item
+
+    stream = TopicStream('topic', items())
+
+    assert 0 == stream.next_item()
+    assert [0] == pulled
+    assert 1 == stream.next_item()
+    assert END is stream.next_item()
+
+
+def test_topic_stream__put_back__item_is_returned_again():
+    stream = TopicStream('topic', iter([1, 2]))
+
+    item = stream.next_item()
+    stream.put_back(item)
+
+    assert [1, 2, END] == [stream.next_item() for _ in range(3)]
+
+
+def test_topic_stream__close__generator_is_closed_and_outcome_is_resolved():
+    closed = []
+
+    def items():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    stream = TopicStream('topic', items())
+    stream.next_item()
+
+    stream.close('sent')
+    stream.close('dropped')
+
+    assert [True] == closed
+    assert 'sent' == stream.outcome.result(timeout=0)
@@ -0,0 +1,130 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative:
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from proton import Message
+
+from swim_pubsub.core.delta import DeltaEncoder
+from swim_pubsub.core.topics.topics import DELAY, CONFLATE, DROP
+from swim_pubsub.publisher.throttling import TokenBucket, Throttle
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _message(body, subject='topic'):
+    return Message(body=body, subject=subject)
+
+
+@pytest.mark.parametrize('rate, burst, expected_error', [
+    (0, None, "rate should be a positive number, got 0"),
+    (-1, None, "rate should be a positive number, got -1"),
+    (1, 0, "burst should be at least 1, got 0"),
+])
+def test_token_bucket__invalid_rate_or_burst__raise_valueerror(rate, burst, expected_error):
+    with pytest.raises(ValueError) as e:
+        TokenBucket(rate, burst)
+    assert expected_error == str(e.value)
+
+
+@pytest.mark.parametrize('rate, burst, expected_burst', [(10, None, 10), (0.5, None, 1), (10, 2, 2)])
+def test_token_bucket__burst__defaults_to_the_rate(rate, burst, expected_burst):
+    assert expected_burst == TokenBucket(rate, burst).burst
+
+
+def test_token_bucket__tokens_are_consumed_and_refilled_at_the_rate():
+    with mock.patch('swim_pubsub.publisher.throttling.time.monotonic', return_value=100.):
+        bucket = TokenBucket(rate=2, burst=2)
+
+    assert bucket.has_token(now=100.)
+    bucket.consume()
+    bucket.consume()
+    assert not bucket.has_token(now=100.)
+    assert 0.5 == bucket.wait_time(now=100.)
+
+    assert bucket.has_token(now=100.5)
+    assert 0. == bucket.wait_time(now=100.5)
+
+    # never above the burst
+    assert bucket.has_token(now=200.)
+    bucket.consume()
+    bucket.consume()
+    assert not bucket.has_token(now=200.)
+
+
+def test_throttle__invalid_policy__raise_valueerror():
+    with pytest.raises(ValueError) as e:
+        Throttle('topic', rate=1, policy='invalid')
+    assert "Invalid rate limit policy: invalid" == str(e.value)
+
+
+def test_throttle__hold__delay__messages_are_held_in_order_and_the_oldest_is_dropped_when_full():
+    throttle = Throttle('topic', rate=1, policy=DELAY, max_pending=2)
+    messages = [_message(i) for i in range(3)]
+
+    dropped = [throttle.hold(message) for message in messages]
+
+    assert [None, None, messages[0]] == dropped
+    assert messages[1] is throttle.pop()
+    assert messages[2] is throttle.peek()
+    assert 1 == len(throttle)
+    assert 1 == throttle.dropped
+
+
+def test_throttle__hold__conflate__only_the_latest_message_per_subject_is_held():
+    throttle = Throttle('topic', rate=1, policy=CONFLATE)
+    old_a, b, new_a = _message(1, 'a'), _message(2, 'b'), _message(3, 'a')
+
+    dropped = [throttle.hold(message) for message in (old_a, b, new_a)]
+
+    assert [None, None, old_a] == dropped
+    assert [new_a, b] == [throttle.pop(), throttle.pop()]
+    assert 1 == throttle.conflated
+
+
+def test_throttle__hold__conflate__delta_messages__are_not_conflated():
+    throttle = Throttle('topic', rate=1, policy=CONFLATE)
+    encoder = DeltaEncoder()
+
+    messages = [encoder.encode(_message({'flights': i}, 'a')) for i in range(3)]
+    for message in messages:
+        assert throttle.hold(message) is None
+
+    assert messages == [throttle.pop() for _ in range(len(throttle))]
+    assert 0 == throttle.conflated
+
+
+def test_throttle__hold__drop__message_is_dropped():
+    throttle = Throttle('topic', rate=1, policy=DROP)
+    message = _message(1)
+
+    assert message is throttle.hold(message)
+    assert 0 == len(throttle)
+    assert 1 == throttle.stats()['dropped']
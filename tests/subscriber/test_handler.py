@@ -27,12 +27,17 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import json
 import logging
 import uuid
 from unittest import mock
 
 import pytest
+from proton import Message
 
+from swim_pubsub.core.codecs import create_default_registry
+from swim_pubsub.core.compression import ZLIB, create_compressor, compress_message
+from swim_pubsub.core.delta import DeltaEncoder
 from swim_pubsub.core.errors import BrokerHandlerError, AppError
 from swim_pubsub.subscriber import SubscriberBrokerHandler
 
@@ -110,3 +115,130 @@ def test_on_message__callback_raises_AppError__error_is_logged(caplog):
     callback.assert_called_once_with(event.message)
     log_message = caplog.records[0]
     assert f"Error while processing message {event.message} from queue {queue}: error" == log_message.message
+
+
+def _on_messages(handler, receiver, messages):
+    for message in messages:
+        event = mock.Mock()
+        event.receiver = receiver
+        event.message = message
+        handler.on_message(event)
+
+
+def test_on_message__delta_encoded_messages__callback_gets_the_rebuilt_data():
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', callback)
+
+    documents = [[{'icao24': f'abc{i}'} for i in range(count)] for count in (10, 9, 11)]
+    encoder = DeltaEncoder()
+    _on_messages(handler, receiver, [encoder.encode(json.dumps(document)) for document in documents])
+
+    assert documents == [json.loads(call[0][0].body) for call in callback.call_args_list]
+
+
+def test_on_message__delta_encoded_messages__gap__callback_is_not_called_until_next_snapshot(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', callback)
+
+    documents = [[{'icao24': f'abc{i}'} for i in range(count)] for count in (10, 9, 11, 12)]
+    encoder = DeltaEncoder(snapshot_interval=3)
+    messages = [encoder.encode(json.dumps(document)) for document in documents]
+
+    # the second message is lost
+    _on_messages(handler, receiver, messages[:1] + messages[2:])
+
+    assert [documents[0], documents[3]] == [json.loads(call[0][0].body) for call in callback.call_args_list]
+    assert "Gap in the delta sequence (1 -> 3), waiting for the next snapshot" in caplog.messages
+
+
+def test_remove_receiver__delta_decoder_is_removed():
+    receiver = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', mock.Mock())
+
+    _on_messages(handler, receiver, [DeltaEncoder().encode(Message(body='[]'))])
+    assert receiver in handler._delta_decoders
+
+    handler.remove_receiver('queue')
+    assert receiver not in handler._delta_decoders
+
+
+def test_on_message__decode_payloads__callback_gets_the_decoded_body_by_content_type():
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock(), decode_payloads=True, codec_registry=create_default_registry())
+    handler.receivers[receiver] = ('queue', callback)
+
+    _on_messages(handler, receiver, [
+        Message(body='{"icao24":"abc"}', content_type='application/json'),
+        Message(body='plain text', content_type='text/plain'),
+    ])
+
+    assert [{'icao24': 'abc'}, 'plain text'] == [call[0][0].body for call in callback.call_args_list]
+    assert 1 == handler.codec_registry.get('json').decoded
+
+
+def test_on_message__decode_payloads__payload_cannot_be_decoded__callback_is_not_called(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock(), decode_payloads=True)
+    handler.receivers[receiver] = ('queue', callback)
+
+    _on_messages(handler, receiver, [Message(body='{invalid', content_type='application/json')])
+
+    callback.assert_not_called()
+    assert caplog.records[-1].message.startswith("Error while decoding message from queue queue: "
+                                                 "Error while decoding payload with json: ")
+
+
+def test_on_message__decode_payloads_is_disabled__body_is_passed_as_it_is():
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', callback)
+
+    _on_messages(handler, receiver, [Message(body='{"icao24":"abc"}', content_type='application/json')])
+
+    assert '{"icao24":"abc"}' == callback.call_args[0][0].body
+
+
+def test_on_message__compressed_messages__callback_gets_the_decompressed_body():
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', callback)
+
+    flights = json.dumps([{'icao24': f'abc{i}'} for i in range(100)])
+    encoder = DeltaEncoder()
+    compressor = create_compressor(ZLIB, threshold=0)
+
+    _on_messages(handler, receiver, [
+        compress_message(Message(body=flights), compressor),
+        compress_message(encoder.encode(Message(body=flights)), compressor),
+    ])
+
+    assert [flights, flights] == [call[0][0].body for call in callback.call_args_list]
+    assert 2 == handler.decompression_stats()['deflate']['decompressed']
+
+
+def test_on_message__unknown_content_encoding__callback_is_not_called(caplog):
+    caplog.set_level(logging.DEBUG)
+
+    receiver = mock.Mock()
+    callback = mock.Mock()
+    handler = SubscriberBrokerHandler(mock.Mock())
+    handler.receivers[receiver] = ('queue', callback)
+
+    _on_messages(handler, receiver, [Message(body=b'data', content_encoding='br')])
+
+    callback.assert_not_called()
+    assert "Error while decompressing message from queue queue: Unknown content encoding: br" == \
+        caplog.records[-1].message